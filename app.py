@@ -3,6 +3,8 @@ print("APP.PY LOADED FROM:", __file__)
 # ======================================================
 # 1. STANDARDS & IMPORTS (Massive Import Section)
 # ======================================================
+import atexit
+import functools
 import json
 import logging
 import os
@@ -12,24 +14,18 @@ import threading
 import time
 import uuid
 import requests
-import feedparser
 import pytz
-import openai
 from datetime import datetime
 from contextlib import asynccontextmanager
 
-import cloudinary
-import cloudinary.uploader
-from google import genai
 from dotenv import load_dotenv
 from fastapi import FastAPI, Query, Request, Response
-from fastapi.responses import HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse
 from pydantic import BaseModel
-from supabase import create_client, Client
 import asyncio
 from contextlib import asynccontextmanager
-from telegram_engine import telegram_fetch_loop
 from twitter_sources import TWITTER_RSS_SOURCES
+from cricket_sources import CRICKET_NEWS_RSS
 from contextlib import asynccontextmanager
 import os
 import threading
@@ -40,7 +36,34 @@ from fastapi import FastAPI
 
 
 # Local Application Import for your design logic
+# (PIL is only imported when the first image is generated)
 from image_generator import generate_news_image
+from lazy import LazyClient
+import replay
+from news_snapshot import NewsSnapshot, fetch_feed_entries
+from feed_stream import fetch_feed
+from article_index import ArticleIndex, article_id
+from url_resolver import UrlResolver
+from enrichment import Enricher
+from posted_journal import PostedJournal
+from storage import STORAGE_BACKEND, local_storage, open_storage
+from page_cache import PageCache, page_response
+from social_queue import SocialEventQueue
+from runtime import SHARED_EXECUTOR, Supervisor
+from near_dupe import StoryIndex
+from keyword_rules import classify as classify_keywords, reload_rules
+from trend_engine import TrendEngine
+from post_scheduler import Candidate, PostScheduler
+import post_limiter
+from leader import LeaderElection, SupabaseLease
+import metrics
+from metrics import (
+    AI_REQUEST_SECONDS, CLOUDINARY_UPLOAD_BYTES, CLOUDINARY_UPLOAD_SECONDS, FEED_FETCH_ERRORS,
+    FEED_FETCH_SECONDS, GRAPH_API_ERRORS, GRAPH_API_SECONDS, LOAD_POSTED_SECONDS,
+    RENDER_STAGE_SECONDS, track,
+)
+from tracing import TRACER, Trace, span
+import profiler
 
 # ======================================================
 # 2. CONFIGURATION & API KEYS
@@ -48,16 +71,34 @@ from image_generator import generate_news_image
 load_dotenv()
 logger = logging.getLogger("uvicorn.error")
 
+# ✅ REPLAY_MODE=record|replay: every HTTP call goes through fixtures / local stand-ins
+HARNESS = replay.install_from_env()
+
+# ✅ Heavy SDKs load on first use, so a cold start answers "/" right away
+
 # Cloudinary Setup
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET")
-)
+def _init_cloudinary():
+    import cloudinary
+    import cloudinary.uploader
+    cloudinary.config(
+        cloud_name=os.getenv("CLOUDINARY_NAME"),
+        api_key=os.getenv("CLOUDINARY_API_KEY"),
+        api_secret=os.getenv("CLOUDINARY_API_SECRET")
+    )
+    return cloudinary.uploader
+
+CLOUDINARY = LazyClient(_init_cloudinary, "cloudinary")
+if HARNESS is not None and HARNESS.mode == "replay":
+    CLOUDINARY = HARNESS.cloudinary()
 
 # Gemini AI Setup (2026 SDK)
 api_key_val = os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=api_key_val)
+
+def _init_genai():
+    from google import genai
+    return genai.Client(api_key=api_key_val)
+
+client = LazyClient(_init_genai, "genai")
 
 # --- UPDATE YOUR CONFIGURATION ---
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -72,7 +113,6 @@ PAGE_ACCESS_TOKEN = os.getenv("PAGE_ACCESS_TOKEN")
 # ======================================================
 # 3. GLOBAL VARIABLES & RSS SOURCES
 # ======================================================
-NEWS_CACHE = {}
 IS_POSTING_BUSY = False 
 POSTED_FILE = "posted.json"
 
@@ -85,7 +125,25 @@ RSS_SOURCES = {
     "NDTV": "https://feeds.feedburner.com/ndtvnews-india-news",
 }
 
-POST_CONFIG = {"Sports": 1, "Business": 1, "Tech": 1}
+CRICKET_RSS_SOURCES = {url.split("/")[2]: url for url in CRICKET_NEWS_RSS}
+
+# how many top items per RSS cycle become scheduler candidates
+CANDIDATES_PER_CYCLE = 5
+SOCIAL_CANDIDATE_TTL_SECONDS = 60 * 60
+
+# ✅ Cross-source near-duplicate clusters (RSS + cricket + Telegram + Twitter)
+STORY_INDEX = StoryIndex(
+    threshold=float(os.getenv("NEAR_DUPE_THRESHOLD", "0.5")),
+    window_seconds=int(os.getenv("NEAR_DUPE_WINDOW_SECONDS", str(6 * 3600))),
+)
+
+# ✅ 5m / 1h / 24h mention counters for terms + story clusters
+TREND_ENGINE = TrendEngine()
+
+# ✅ Google News / t.co / feed-proxy links -> publisher URL (cached in local storage),
+#    then tracking params + mirror hosts stripped. item["key"] is this URL (ids,
+#    scheduler, trends); item["link"] stays the published link for display
+URL_RESOLVER = UrlResolver(LazyClient(local_storage, "storage"))
 
 # ======================================================
 # 4. HELPER UTILITIES
@@ -96,26 +154,43 @@ POST_CONFIG = {"Sports": 1, "Business": 1, "Tech": 1}
 # Initialize Supabase
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+def _init_supabase():
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+supabase = LazyClient(_init_supabase, "supabase")
 
 
 # ======================================================
 # SUPABASE BRIDGE FUNCTIONS (FIXES NAMEERROR)
 # ======================================================
 
+# ✅ STORAGE_BACKEND=supabase (default when SUPABASE_URL is set) | sqlite
+STORE = LazyClient(lambda: open_storage(lambda: supabase), "storage")
+
+def _upsert_posted(urls):
+    """One batched, idempotent write of posted URLs (raises on failure -> journal retries)."""
+    STORE.add_posted(urls)
+    logger.info(f"✅ {len(urls)} URL(s) locked in {STORAGE_BACKEND}")
+
+# ✅ posted URLs hit a local journal first, Supabase in batches (write-behind)
+POSTED_JOURNAL = PostedJournal(_upsert_posted)
+atexit.register(POSTED_JOURNAL.close)
+
 def load_posted():
-    """Fetches all previously posted URLs from Supabase to prevent repeats"""
+    """Fetches all previously posted URLs from the store to prevent repeats"""
+    # not yet flushed URLs count as posted too
+    pending = POSTED_JOURNAL.pending_urls()
     try:
-        # We fetch only the 'url' column from Supabase
-        res = supabase.table("posted_news").select("url").execute()
-        # Convert the list of dictionaries into a simple Set of URLs
-        return {item['url'] for item in res.data}
+        # only the url column (Supabase) / primary-key scan (SQLite)
+        with LOAD_POSTED_SECONDS.time():
+            return STORE.posted_urls() | pending
     except Exception as e:
-        logger.error(f"Supabase Load Error: {e}")
-        return set()
+        logger.error(f"Posted Load Error: {e}")
+        return pending
 
 def save_posted(url):
-    """Saves a new URL into the Supabase Vault immediately"""
+    """Journals a new URL locally; the write-behind thread upserts it to Supabase"""
     try:
         # Check if input is a set (old logic) or a string (new logic)
         if isinstance(url, set) or isinstance(url, list):
@@ -124,19 +199,21 @@ def save_posted(url):
         else:
             url_to_save = url
 
-        supabase.table("posted_news").insert({"url": url_to_save}).execute()
-        logger.info(f"✅ URL locked in Supabase: {url_to_save}")
+        POSTED_JOURNAL.append(url_to_save)
     except Exception as e:
-        logger.error(f"Supabase Save Error: {e}")
+        logger.error(f"Posted Journal Error: {e}")
 
 # This alias ensures that if your code calls 'mark_as_posted', it still works
 def mark_as_posted(url):
     return save_posted(url)
 
-def is_already_posted(url):
-    """Check if URL exists in our Supabase Vault"""
-    posted_set = load_posted()
-    return url in posted_set
+def mark_item_posted(n):
+    """Journals every dedupe key of a feed item (raw, normalized, resolved if known by now)"""
+    for key in URL_RESOLVER.keys(n.get("link", "")):
+        save_posted(key)
+
+def is_posted_link(url, posted_ids):
+    return any(key in posted_ids for key in URL_RESOLVER.keys(url))
 
 def is_quiet_hours():
     """Logic to stop posting between 1 AM and 6 AM IST"""
@@ -147,11 +224,13 @@ def is_quiet_hours():
 
 def upload_image_to_cloudinary(local_path):
     try:
-        res = cloudinary.uploader.upload(
-            local_path, 
-            folder="trendscope",
-            access_mode="public"
-        )
+        with track(CLOUDINARY_UPLOAD_SECONDS):
+            res = CLOUDINARY.upload(
+                local_path, 
+                folder="trendscope",
+                access_mode="public"
+            )
+        CLOUDINARY_UPLOAD_BYTES.inc(os.path.getsize(local_path))
         return res.get("secure_url")
     except Exception as e:
         logger.error(f"Cloudinary Error: {e}")
@@ -225,7 +304,8 @@ def ai_rvcj_converter(text):
             return {
                 "headline": fallback_headline,
                 "image_info": (text[:160] if text else "More details soon").replace("\n", " "),
-                "short_caption": (text[:120] if text else "Trending update") + " 🔥"
+                "short_caption": (text[:120] if text else "Trending update") + " 🔥",
+                "fallback": True,
             }
 
     if not text:
@@ -260,14 +340,15 @@ News text:
     # =========================
     try:
         if GOOGLE_API_KEY:
-            from google import genai
-            client = genai.Client(api_key=GOOGLE_API_KEY)
-            res = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=prompt
-            )
-            raw = getattr(res, "text", "") or ""
-            return normalize_ai_json(raw)
+            with track(AI_REQUEST_SECONDS, "gemini"), span("ai:gemini"):
+                from google import genai
+                client = genai.Client(api_key=GOOGLE_API_KEY)
+                res = client.models.generate_content(
+                    model="gemini-2.0-flash",
+                    contents=prompt
+                )
+                raw = getattr(res, "text", "") or ""
+                return normalize_ai_json(raw)
     except Exception as e:
         logger.warning(f"Gemini Busy, switching... ({e})")
 
@@ -276,20 +357,21 @@ News text:
     # =========================
     try:
         if GROQ_API_KEY:
-            headers = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
-            body = {
-                "model": "llama-3.3-70b-versatile",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.6
-            }
-            r = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=body, timeout=30)
-            resp = r.json() if r.content else {}
-            if r.status_code != 200 or "error" in resp:
-                raise Exception(resp)
-            raw = safe_openai_style_content(resp)
-            if not raw:
-                raise Exception("Groq missing content")
-            return normalize_ai_json(raw)
+            with track(AI_REQUEST_SECONDS, "groq"), span("ai:groq"):
+                headers = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
+                body = {
+                    "model": "llama-3.3-70b-versatile",
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.6
+                }
+                r = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=body, timeout=30)
+                resp = r.json() if r.content else {}
+                if r.status_code != 200 or "error" in resp:
+                    raise Exception(resp)
+                raw = safe_openai_style_content(resp)
+                if not raw:
+                    raise Exception("Groq missing content")
+                return normalize_ai_json(raw)
     except Exception as e:
         logger.warning(f"Groq Busy, switching... ({e})")
 
@@ -298,20 +380,21 @@ News text:
     # =========================
     try:
         if DEEPSEEK_API_KEY:
-            headers = {"Authorization": f"Bearer {DEEPSEEK_API_KEY}", "Content-Type": "application/json"}
-            body = {
-                "model": "deepseek-chat",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.6
-            }
-            r = requests.post("https://api.deepseek.com/chat/completions", headers=headers, json=body, timeout=30)
-            resp = r.json() if r.content else {}
-            if r.status_code != 200 or "error" in resp:
-                raise Exception(resp)
-            raw = safe_openai_style_content(resp)
-            if not raw:
-                raise Exception("DeepSeek missing content")
-            return normalize_ai_json(raw)
+            with track(AI_REQUEST_SECONDS, "deepseek"), span("ai:deepseek"):
+                headers = {"Authorization": f"Bearer {DEEPSEEK_API_KEY}", "Content-Type": "application/json"}
+                body = {
+                    "model": "deepseek-chat",
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.6
+                }
+                r = requests.post("https://api.deepseek.com/chat/completions", headers=headers, json=body, timeout=30)
+                resp = r.json() if r.content else {}
+                if r.status_code != 200 or "error" in resp:
+                    raise Exception(resp)
+                raw = safe_openai_style_content(resp)
+                if not raw:
+                    raise Exception("DeepSeek missing content")
+                return normalize_ai_json(raw)
     except Exception as e:
         logger.warning(f"DeepSeek Busy, switching... ({e})")
 
@@ -320,20 +403,21 @@ News text:
     # =========================
     try:
         if PERPLEXITY_API_KEY:
-            headers = {"Authorization": f"Bearer {PERPLEXITY_API_KEY}", "Content-Type": "application/json"}
-            body = {
-                "model": "sonar",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.6
-            }
-            r = requests.post("https://api.perplexity.ai/chat/completions", headers=headers, json=body, timeout=30)
-            resp = r.json() if r.content else {}
-            if r.status_code != 200 or "error" in resp:
-                raise Exception(resp)
-            raw = safe_openai_style_content(resp)
-            if not raw:
-                raise Exception("Perplexity missing content")
-            return normalize_ai_json(raw)
+            with track(AI_REQUEST_SECONDS, "perplexity"), span("ai:perplexity"):
+                headers = {"Authorization": f"Bearer {PERPLEXITY_API_KEY}", "Content-Type": "application/json"}
+                body = {
+                    "model": "sonar",
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.6
+                }
+                r = requests.post("https://api.perplexity.ai/chat/completions", headers=headers, json=body, timeout=30)
+                resp = r.json() if r.content else {}
+                if r.status_code != 200 or "error" in resp:
+                    raise Exception(resp)
+                raw = safe_openai_style_content(resp)
+                if not raw:
+                    raise Exception("Perplexity missing content")
+                return normalize_ai_json(raw)
     except Exception as e:
         logger.warning(f"Perplexity Busy, switching... ({e})")
 
@@ -342,25 +426,26 @@ News text:
     # =========================
     try:
         if OPENROUTER_API_KEY:
-            headers = {
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": os.getenv("APP_PUBLIC_URL", "https://trendscope-backend-fnsu.onrender.com"),
-                "X-Title": "Trendscope Wirally Engine"
-            }
-            body = {
-                "model": "openai/gpt-4o-mini",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.6
-            }
-            r = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=body, timeout=30)
-            resp = r.json() if r.content else {}
-            if r.status_code != 200 or "error" in resp:
-                raise Exception(resp)
-            raw = safe_openai_style_content(resp)
-            if not raw:
-                raise Exception("OpenRouter missing content")
-            return normalize_ai_json(raw)
+            with track(AI_REQUEST_SECONDS, "openrouter"), span("ai:openrouter"):
+                headers = {
+                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                    "Content-Type": "application/json",
+                    "HTTP-Referer": os.getenv("APP_PUBLIC_URL", "https://trendscope-backend-fnsu.onrender.com"),
+                    "X-Title": "Trendscope Wirally Engine"
+                }
+                body = {
+                    "model": "openai/gpt-4o-mini",
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.6
+                }
+                r = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=body, timeout=30)
+                resp = r.json() if r.content else {}
+                if r.status_code != 200 or "error" in resp:
+                    raise Exception(resp)
+                raw = safe_openai_style_content(resp)
+                if not raw:
+                    raise Exception("OpenRouter missing content")
+                return normalize_ai_json(raw)
     except Exception as e:
         logger.error(f"All AI brains failed! ({e})")
 
@@ -370,7 +455,8 @@ News text:
     return {
         "headline": text[:55].upper(),
         "image_info": text[:160].replace("\n", " "),
-        "short_caption": text[:120].replace("\n", " ") + " 🔥"
+        "short_caption": text[:120].replace("\n", " ") + " 🔥",
+        "fallback": True,   # not AI text -> callers that cache it should retry later
     }
 
 
@@ -378,121 +464,174 @@ News text:
 # 6. NEWS ENGINE (Scoring & Fetching)
 # ======================================================
 
-def ai_category(text):
-    t = text.lower()
-    if any(k in t for k in ["cricket", "ipl", "score"]): return "Sports"
-    if any(k in t for k in ["market", "sensex", "nifty"]): return "Business"
-    if any(k in t for k in ["tech", "ai", "iphone"]): return "Tech"
-    return "India"
-
-def ai_trending_score(title):
-    return min(95, 40 + sum(k in title.lower() for k in ["india","court","modi","breaking"]) * 10)
+# ✅ categories / trend weights / filters live in keyword_rules.json (classify_keywords)
+def apply_trends(items, source):
+    """
+    Feeds new items into TREND_ENGINE (once per link) and replaces
+    item["trend"] with the live velocity score.
+    """
+    for n in items:
+        key = n.get("key") or n.get("title", "")
+        if not TREND_ENGINE.has(key):
+            src = n.get("source") or source
+            cid = STORY_INDEX.assign(n.get("title", ""), n.get("summary", ""), src)
+            TREND_ENGINE.observe(key, n.get("title", ""), src, cluster=cid)
+    for n in items:
+        key = n.get("key") or n.get("title", "")
+        n["trend"] = TREND_ENGINE.score(key, static=n.get("trend", 40))
+    return items
 
 def extract_image(entry):
     if "media_content" in entry and entry.media_content:
         return entry.media_content[0].get("url")
     return "https://images.unsplash.com/photo-1504711434969-e33886168f5c"
 
+# entries actually used per feed (the streaming parser stops reading there)
+RSS_ENTRIES_PER_FEED = 6
+CRICKET_ENTRIES_PER_FEED = 10
+
+def rss_feed_items(src, entries, posted_ids=None):
+    """One parsed RSS feed's entries -> article dicts (skips links in posted_ids)."""
+    out = []
+    entries = entries[:RSS_ENTRIES_PER_FEED]
+    links = URL_RESOLVER.resolve_many([e.get("link", "") for e in entries])
+    for e in entries:
+        link = e.get("link", "")
+        # If filtering is ON, skip already posted links (any of raw / normalized / resolved)
+        if posted_ids and is_posted_link(link, posted_ids):
+            continue
+
+        kw = classify_keywords(e.title)   # one pass for trend + category
+        key = links.get(link, "")
+        art = {
+            "id": article_id(link, e.title),   # raw link: same id before and after resolution
+            "source": f"rss:{src}",
+            "title": e.title, 
+            "summary": e.get("summary", e.title),
+            "link": link, 
+            "key": key,
+            "image": extract_image(e),
+            "trend": kw.trend, 
+            "category": kw.category
+        }
+        out.append(art)
+    return out
+
 def fetch_news(filter_posted=False):
-    global NEWS_CACHE
-    NEWS_CACHE = {}
-    out, i = [], 0
+    out = []
     
     # Only load posted_ids if we actually want to filter them
-    posted_ids = load_posted() if filter_posted else set()
+    with span("load_posted"):
+        posted_ids = load_posted() if filter_posted else set()
     
     for src, url in RSS_SOURCES.items():
         try:
-            feed = feedparser.parse(url)
-            for e in feed.entries[:6]:
-                # If filtering is ON, skip already posted links
-                if filter_posted and e.link in posted_ids:
-                    continue
-                    
-                art = {
-                    "id": i, 
-                    "title": e.title, 
-                    "summary": e.get("summary", e.title),
-                    "link": e.link, 
-                    "image": extract_image(e),
-                    "trend": ai_trending_score(e.title), 
-                    "category": ai_category(e.title)
-                }
-                NEWS_CACHE[i] = art
-                out.append(art)
-                i += 1
-        except: continue
-    return out
+            with FEED_FETCH_SECONDS.labels(f"rss:{src}").time(), span(f"feed:rss:{src}"):
+                feed = fetch_feed(url, RSS_ENTRIES_PER_FEED)
+            if not feed.entries:
+                FEED_FETCH_ERRORS.labels(f"rss:{src}").inc()
+            out += rss_feed_items(src, feed.entries, posted_ids)
+        except:
+            FEED_FETCH_ERRORS.labels(f"rss:{src}").inc()
+            continue
+    return apply_trends(out, "rss")
+
+def news_from_feed_entries(feeds):
+    """{source: entries} (fetched + parsed async) -> scored article list. Runs in the executor."""
+    out = []
+    for src in RSS_SOURCES:
+        entries = feeds.get(src)
+        if not entries:
+            continue
+        try:
+            out += rss_feed_items(src, entries)
+        except Exception as e:
+            logger.error(f"RSS parse error: {src} -> {e}")
+    return apply_trends(out, "rss")
 def fetch_cricket_news(filter_posted=True):
     """
     Fetch cricket items from CRICKET_RSS_SOURCES
     and return structured items like normal news.
     """
     out = []
-    i = 100000  # big id so it doesn't conflict with normal news ids
 
-    posted_ids = load_posted() if filter_posted else set()
+    with span("load_posted"):
+        posted_ids = load_posted() if filter_posted else set()
 
     for src, url in CRICKET_RSS_SOURCES.items():
         try:
-            feed = feedparser.parse(url)
-            for e in feed.entries[:10]:
+            with FEED_FETCH_SECONDS.labels(f"cricket:{src}").time(), span(f"feed:cricket:{src}"):
+                feed = fetch_feed(url, CRICKET_ENTRIES_PER_FEED)
+            if not feed.entries:
+                FEED_FETCH_ERRORS.labels(f"cricket:{src}").inc()
+            links = URL_RESOLVER.resolve_many([getattr(e, "link", "") or "" for e in feed.entries])
+            for e in feed.entries:
                 link = getattr(e, "link", "") or ""
-                if filter_posted and link in posted_ids:
+                if filter_posted and is_posted_link(link, posted_ids):
                     continue
 
                 title = getattr(e, "title", "Cricket Update")
                 summary = e.get("summary", title)
+                key = links.get(link, "")
 
                 out.append({
-                    "id": i,
-                    "source": src,
+                    "id": article_id(link, title),
+                    "source": f"cricket:{src}",
                     "title": title,
                     "summary": summary,
                     "link": link,
+                    "key": key,
                     "image": "https://images.unsplash.com/photo-1504711434969-e33886168f5c",
                     "category": "Cricket",
-                    "trend": 99
+                    "trend": classify_keywords(title).trend
                 })
-                i += 1
         except Exception as ex:
+            FEED_FETCH_ERRORS.labels(f"cricket:{src}").inc()
             logger.error(f"Cricket RSS Error: {src} -> {ex}")
 
-    return out
+    return apply_trends(out, "cricket")
 def fetch_twitter_cricket(filter_posted=True):
     out = []
-    posted = load_posted() if filter_posted else set()
-    i = 500000
+    with span("load_posted"):
+        posted = load_posted() if filter_posted else set()
 
     for url in TWITTER_RSS_SOURCES:
         try:
-            feed = feedparser.parse(url)
-            for e in feed.entries[:10]:
-                link = getattr(e, "link", "")
-                if filter_posted and link in posted:
+            with FEED_FETCH_SECONDS.labels("twitter:rss").time(), span("feed:twitter:rss"):
+                feed = fetch_feed(url, CRICKET_ENTRIES_PER_FEED)
+            if not feed.entries:
+                FEED_FETCH_ERRORS.labels("twitter:rss").inc()
+            links = URL_RESOLVER.resolve_many([getattr(e, "link", "") or "" for e in feed.entries])
+            for e in feed.entries:
+                link = getattr(e, "link", "") or ""
+                if filter_posted and is_posted_link(link, posted):
                     continue
 
                 title = e.title
                 summary = e.get("summary", title)
 
                 # filter only cricket/india
-                if not any(k in title.lower() for k in ["india", "wicket", "six", "four", "ipl", "wpl"]):
+                kw = classify_keywords(title)
+                if "twitter_cricket" not in kw.filters:
                     continue
 
+                key = links.get(link, "")
                 out.append({
-                    "id": i,
+                    "id": article_id(link, title),
                     "title": title,
                     "summary": summary,
                     "link": link,
+                    "key": key,
                     "image": "https://images.unsplash.com/photo-1504711434969-e33886168f5c",
+                    "source": "twitter:rss",
                     "category": "Cricket",
-                    "trend": 98
+                    "trend": kw.trend
                 })
-                i += 1
         except Exception as e:
+            FEED_FETCH_ERRORS.labels("twitter:rss").inc()
             logger.error(f"Twitter RSS error: {e}")
 
-    return out
+    return apply_trends(out, "twitter")
 
 # ======================================================
 # 7. INSTAGRAM & AUTO-POST CORE
@@ -501,68 +640,48 @@ def fetch_twitter_cricket(filter_posted=True):
 # 7. INSTAGRAM & AUTO-POST CORE
 # ======================================================
 
-def post_to_instagram(image_url: str, caption: str):
+IG_PUBLISH_DELAY_SECONDS = int(os.getenv("IG_PUBLISH_DELAY_SECONDS", str(70 * 60)))
+
+def post_to_instagram(image_url: str, caption: str, check_limits: bool = True):
     """
     Safe Instagram posting with:
-    - global rate limiter
+    - global rate limiter (skipped when the scheduler already took the slot)
     - IG action-block cooldown
     - cache buster
     """
 
     import time
     import random
-    import json
-    import os
     import requests
-    from post_limiter import can_post_now, mark_posted_now
 
     # ---------- GLOBAL RATE LIMIT ----------
-    if not can_post_now():
+    if check_limits and not post_limiter.can_post_now():
         logger.warning("⏳ Global post limiter: skipping this post")
         return {"error": "rate_limit_global"}
 
-    COOLDOWN_FILE = "ig_cooldown.json"
-
-    def load_cooldown():
-        if not os.path.exists(COOLDOWN_FILE):
-            return {"blocked_until": 0}
-        try:
-            with open(COOLDOWN_FILE, "r") as f:
-                return json.load(f)
-        except:
-            return {"blocked_until": 0}
-
-    def save_cooldown(data):
-        try:
-            with open(COOLDOWN_FILE, "w") as f:
-                json.dump(data, f)
-        except:
-            pass
-
     # ---------- COOLDOWN CHECK ----------
-    cd = load_cooldown()
-    now = int(time.time())
-
-    if now < int(cd.get("blocked_until", 0)):
-        mins = (cd["blocked_until"] - now) // 60
-        logger.warning(f"⏳ IG cooldown active. {mins} min remaining.")
-        return {"error": "cooldown_active", "blocked_until": cd["blocked_until"]}
+    left = post_limiter.cooldown_remaining()
+    if left > 0:
+        logger.warning(f"⏳ IG cooldown active. {left // 60} min remaining.")
+        return {"error": "cooldown_active", "blocked_until": int(time.time()) + left}
 
     # ---------- CACHE BUSTER ----------
     image_url = f"{image_url}?v={random.randint(100000,999999)}"
 
     # ---------- STEP 1: CREATE MEDIA ----------
     try:
-        create_res = requests.post(
-            f"https://graph.facebook.com/v18.0/{IG_BUSINESS_ID}/media",
-            data={
-                "image_url": image_url,
-                "caption": caption,
-                "access_token": PAGE_ACCESS_TOKEN
-            },
-            timeout=30
-        ).json()
+        with GRAPH_API_SECONDS.labels("create").time(), span("graph:create"):
+            create_res = requests.post(
+                f"https://graph.facebook.com/v18.0/{IG_BUSINESS_ID}/media",
+                data={
+                    "image_url": image_url,
+                    "caption": caption,
+                    "access_token": PAGE_ACCESS_TOKEN
+                },
+                timeout=30
+            ).json()
     except Exception as e:
+        GRAPH_API_ERRORS.labels("create", "exception").inc()
         logger.error(f"IG CREATE EXCEPTION: {e}")
         return {"error": str(e)}
 
@@ -570,9 +689,9 @@ def post_to_instagram(image_url: str, caption: str):
         logger.error(f"IG CREATE ERROR: {create_res}")
 
         err = create_res["error"]
+        GRAPH_API_ERRORS.labels("create", err.get("code", "unknown")).inc()
         if err.get("code") == 4 or err.get("error_subcode") == 2207051:
-            cd["blocked_until"] = now + 3600
-            save_cooldown(cd)
+            post_limiter.set_cooldown(3600)
             logger.error("🚫 IG action blocked. Cooling down 60 mins.")
 
         return create_res
@@ -582,45 +701,122 @@ def post_to_instagram(image_url: str, caption: str):
         return create_res
 
     # ---------- STEP 2: WAIT ----------
-    time.sleep(70 * 60)
+    with span("publish_wait"):
+        time.sleep(IG_PUBLISH_DELAY_SECONDS)
 
     # ---------- STEP 3: PUBLISH ----------
-    publish_res = requests.post(
-        f"https://graph.facebook.com/v18.0/{IG_BUSINESS_ID}/media_publish",
-        data={
-            "creation_id": creation_id,
-            "access_token": PAGE_ACCESS_TOKEN
-        },
-        timeout=30
-    ).json()
+    # failures from here on carry creation_id: the post may be live, the slot stays used
+    try:
+        with GRAPH_API_SECONDS.labels("publish").time(), span("graph:publish"):
+            publish_res = requests.post(
+                f"https://graph.facebook.com/v18.0/{IG_BUSINESS_ID}/media_publish",
+                data={
+                    "creation_id": creation_id,
+                    "access_token": PAGE_ACCESS_TOKEN
+                },
+                timeout=30
+            ).json()
+    except Exception as e:
+        GRAPH_API_ERRORS.labels("publish", "exception").inc()
+        logger.error(f"IG PUBLISH EXCEPTION: {e}")
+        return {"error": str(e), "creation_id": creation_id}
 
     logger.info(f"PUBLISH RESPONSE: {publish_res}")
 
     if "error" in publish_res:
         err = publish_res["error"]
+        GRAPH_API_ERRORS.labels("publish", err.get("code", "unknown")).inc()
         if err.get("code") == 4 or err.get("error_subcode") == 2207051:
-            cd["blocked_until"] = int(time.time()) + 3600
-            save_cooldown(cd)
+            post_limiter.set_cooldown(3600)
             logger.error("🚫 IG blocked after publish. Cooling down.")
 
-        return publish_res
+        return dict(publish_res, creation_id=creation_id)
 
     # ---------- SUCCESS ----------
-    mark_posted_now()
+    if check_limits:
+        post_limiter.mark_posted_now()
     return publish_res
 
-    return publish_res
+
+def render_post(text, image_url, img_prefix, default_headline, default_info, default_caption):
+    """
+    AI -> Image -> Cloudinary for one item.
+    Returns {"image_url": ..., "caption": ...} or None (scheduler prepare step).
+    """
+    # 1) AI Convert
+    with RENDER_STAGE_SECONDS.labels("ai").time(), span("ai"):
+        data = ai_rvcj_converter(text)
+
+    # 2) Unique image file + 3) Generate image
+    img_name = f"{img_prefix}_{uuid.uuid4().hex}.png"
+    with RENDER_STAGE_SECONDS.labels("image").time(), span("image"):
+        path = generate_news_image(
+            headline=data.get("headline", default_headline),
+            info_text=data.get("image_info", default_info),
+            image_url=image_url,
+            output_name=img_name
+        )
+
+    # 4) Upload to Cloudinary
+    with RENDER_STAGE_SECONDS.labels("upload").time(), span("upload"):
+        public_url = upload_image_to_cloudinary(path)
+    if not public_url:
+        logger.error(f"Cloudinary upload failed ({img_prefix}), skipping item.")
+        return None
+
+    caption = data.get("short_caption") or data.get("headline") or default_caption
+    return {"image_url": public_url, "caption": caption}
+
+
+def submit_article(n, img_prefix, default_headline, default_caption, ttl_seconds=3 * 3600, cycle=None):
+    """
+    Hands one RSS/cricket article to the global scheduler.
+    Story cluster stays taken while pending; released if it never posts.
+    cycle = Trace of the fetch cycle -> copied into this item's own trace.
+    """
+    if not STORY_INDEX.admit(n["cluster"]):
+        return False
+
+    trace = TRACER.start(
+        f"{img_prefix}: {n.get('title', '')[:80]}", fork=cycle,
+        source=n.get("source", img_prefix), link=n.get("link", ""), trend=n.get("trend"),
+    )
+
+    def on_done(ok):
+        if ok:
+            mark_item_posted(n)
+            logger.info(f"✅ Posted Successfully: {n.get('title')}")
+        else:
+            STORY_INDEX.release(n["cluster"])
+
+    cand = Candidate(
+        key=n.get("key") or n["link"] or n["title"],
+        score=n.get("trend", 40),
+        source=n.get("source", img_prefix),
+        prepare=lambda: render_post(
+            n.get("summary", n.get("title", "")), n.get("image"),
+            img_prefix, default_headline, n.get("title", "Details soon"), default_caption
+        ),
+        on_done=on_done,
+        ttl_seconds=ttl_seconds,
+        trace=trace,
+    )
+    if not POST_SCHEDULER.submit(cand):
+        STORY_INDEX.release(n["cluster"])
+        trace.finish("not_submitted")
+        return False
+    return True
 
 
 def post_category_wise_news():
     """
-    Auto posting loop (RSS -> AI -> Image -> Cloudinary -> Instagram)
+    RSS -> candidates for the global post scheduler
+    (AI -> Image -> Cloudinary -> Instagram runs only for the slot winner)
 
     ✅ FIXED:
     - prevents double running using IS_POSTING_BUSY
-    - posts ONLY 1 item per cycle (no spam)
-    - 30 minutes gap after successful post
-    - safe error handling for every item
+    - only the best copy of each story, hottest first
+    - slot gap / cooldown handled by the scheduler + post_limiter
     """
     global IS_POSTING_BUSY
 
@@ -632,62 +828,32 @@ def post_category_wise_news():
         IS_POSTING_BUSY = True
         logger.info("🚜 RVCJ Engine Started...")
 
-        # ✅ Get news but skip already posted links
-        news_items = fetch_news(filter_posted=True)
-
-        if not news_items:
-            logger.info("No new items found (all already posted).")
-            return
-
-        for n in news_items:
-            try:
-                logger.info(f"📰 Processing: {n.get('title')}")
-
-                # 1) AI Convert
-                data = ai_rvcj_converter(n.get("summary", n.get("title", "")))
-
-                # 2) Unique image file
-                img_name = f"post_{uuid.uuid4().hex}.png"
-
-                # 3) Generate image
-                path = generate_news_image(
-                    headline=data.get("headline", "BREAKING"),
-                    info_text=data.get("image_info", "Details soon"),
-                    image_url=n.get("image"),
-                    output_name=img_name
-                )
+        # shared fetch stages, copied into every candidate's trace
+        cycle = Trace("rss_cycle")
+        with cycle.activate():
+            # ✅ Get news but skip already posted links
+            with span("fetch_news"):
+                news_items = fetch_news(filter_posted=True)
 
-                # 4) Upload to Cloudinary
-                public_url = upload_image_to_cloudinary(path)
-                if not public_url:
-                    logger.error("Cloudinary upload failed, skipping item.")
-                    continue
-
-                # 5) Post to Instagram
-                caption = data.get("short_caption") or data.get("headline") or "🔥"
-                ig_res = post_to_instagram(public_url, caption)
-
-                # 6) Save posted + stop spam
-                if ig_res and isinstance(ig_res, dict) and "id" in ig_res:
-                    mark_as_posted(n["link"])
-                    logger.info(f"✅ Posted Successfully: {n.get('title')}")
-
-                    # ✅ IMPORTANT: 30 min gap AFTER successful post
-                    logger.info("⏳ Sleeping 30 minutes before next post...")
-                    time.sleep(70 * 60)   # ✅ 1hour10 minutes
-                    break
-
-                else:
-                    logger.error(f"❌ IG post failed: {ig_res}")
+            if not news_items:
+                logger.info("No new items found (all already posted).")
+                return
 
-                    # if cooldown active, do not retry immediately
-                    if isinstance(ig_res, dict) and ig_res.get("error") == "cooldown_active":
-                        logger.warning("⏳ IG cooldown active. Stop this cycle.")
-                        break
+            # ✅ same story from many feeds -> only best copy per cluster,
+            #    hottest (velocity) story first
+            with span("select_best", items=len(news_items)):
+                news_items = STORY_INDEX.select_best(news_items)
+                news_items.sort(key=lambda x: x["trend"], reverse=True)
 
+        submitted = 0
+        for n in news_items[:CANDIDATES_PER_CYCLE]:
+            try:
+                if submit_article(n, "post", "BREAKING", "🔥", cycle=cycle):
+                    submitted += 1
             except Exception as item_err:
                 logger.error(f"Item error: {item_err}")
-                continue
+
+        logger.info(f"📥 RSS: {submitted} candidates submitted to scheduler")
 
     except Exception as e:
         logger.error(f"post_category_wise_news error: {e}")
@@ -696,189 +862,298 @@ def post_category_wise_news():
         IS_POSTING_BUSY = False
 
 def post_cricket_news():
-    global IS_POSTING_BUSY
-
-    if IS_POSTING_BUSY:
-        logger.info("Posting already running. Skipping cricket cycle...")
-        return
-
     try:
-        IS_POSTING_BUSY = True
         logger.info("🏏 Cricket Engine Started...")
-     
-        twitter_items = fetch_twitter_cricket(filter_posted=True)
-        cricket_items.extend(twitter_items)
-
-
-        for n in cricket_items:
-            try:
-                # 1) AI convert
-                data = ai_rvcj_converter(n.get("summary", n.get("title", "")))
-
-                # 2) Unique image name
-                img_name = f"cricket_{uuid.uuid4().hex}.png"
-
-                # 3) Generate image
-                path = generate_news_image(
-                    headline=data.get("headline", "CRICKET UPDATE"),
-                    info_text=data.get("image_info", n.get("title", "")),
-                    image_url=n.get("image"),
-                    output_name=img_name
-                )
-
-                # 4) Upload to Cloudinary
-                public_url = upload_image_to_cloudinary(path)
-                if not public_url:
-                    logger.error("Cloudinary upload failed for cricket item.")
-                    continue
 
-                # 5) Post to IG
-                caption = data.get("short_caption") or data.get("headline") or "🏏🔥"
-                ig_res = post_to_instagram(public_url, caption)
+        cycle = Trace("cricket_cycle")
+        with cycle.activate():
+            with span("fetch_cricket_news"):
+                cricket_items = fetch_cricket_news(filter_posted=True)
+            with span("fetch_twitter_cricket"):
+                twitter_items = fetch_twitter_cricket(filter_posted=True)
+            cricket_items.extend(twitter_items)
 
-                # 6) Save posted
-                if ig_res and "id" in ig_res:
-                    mark_as_posted(n["link"])
-                    logger.info(f"✅ Cricket Posted: {n.get('title')}")
-                else:
-                    logger.error(f"❌ IG failed cricket: {ig_res}")
-
-                time.sleep(90)
+            with span("select_best", items=len(cricket_items)):
+                cricket_items = STORY_INDEX.select_best(cricket_items)
+                cricket_items.sort(key=lambda x: x["trend"], reverse=True)
 
+        submitted = 0
+        for n in cricket_items[:CANDIDATES_PER_CYCLE]:
+            try:
+                if submit_article(n, "cricket", "CRICKET UPDATE", "🏏🔥", ttl_seconds=2 * 3600, cycle=cycle):
+                    submitted += 1
             except Exception as item_err:
                 logger.error(f"Cricket item error: {item_err}")
                 continue
 
+        logger.info(f"📥 Cricket RSS: {submitted} candidates submitted to scheduler")
+
     except Exception as e:
         logger.error(f"post_cricket_news error: {e}")
 
-    finally:
-        IS_POSTING_BUSY = False
-
 
 # ======================================================
 # 8. BACKGROUND WORKER & LIFESPAN
 # ======================================================
 
-def run_background_worker():
-    while True:
-        try:
-            # Normal news cycle
-            post_category_wise_news()
-
-            # Cricket cycle
-            post_cricket_news()
-
-            time.sleep(300)
-        except:
-            time.sleep(70 * 60)
+def run_rss_cycle():
+    # Normal news cycle
+    post_category_wise_news()
 
+    # Cricket cycle
+    post_cricket_news()
 
 
+async def rss_producer():
+    """RSS + cricket RSS posting cycle every 5 minutes (blocking parts on the shared executor)"""
+    while True:
+        await RUNTIME.run_blocking(run_rss_cycle)
+        await asyncio.sleep(300)
+
+
+def submit_cricket_event(event_id, event_type, score, ttl, prepare, on_done):
+    """cricket_engine (CricAPI) -> global post scheduler"""
+    cand = Candidate(
+        key=f"cricapi:{event_id}",
+        score=score,
+        source=f"cricapi:{event_type}",
+        prepare=prepare,
+        on_done=on_done,
+        ttl_seconds=ttl,
+    )
+    # the same event is resubmitted every poll -> only accepted ones get a trace
+    if POST_SCHEDULER.submit(cand):
+        cand.trace = TRACER.start(f"cricapi: {event_type}", event_id=event_id)
+
+
+async def cricket_producer():
+    from cricket_engine import cricket_loop
+    await cricket_loop(
+        generate_news_image, upload_image_to_cloudinary, logger,
+        run_blocking=RUNTIME.run_blocking, submit=submit_cricket_event
+    )
+
+
+async def telegram_producer():
+    # durable: the channel checkpoint moves on once put() returns -> never dropped
+    on_event = functools.partial(SOCIAL_QUEUE.put, durable=True)
+    if HARNESS is not None and HARNESS.mode == "replay":
+        # offline: recorded channel messages instead of a Telethon session
+        await HARNESS.replay_telegram(on_event, logger)
+        return
+    from telegram_engine import telegram_loop
+    if HARNESS is not None:
+        on_event = HARNESS.record_telegram(on_event)
+    await telegram_loop(on_event=on_event, logger=logger)
 
 
-# ✅ 30 minutes gap between any social posts (Telegram/Twitter)
-SOCIAL_LAST_POST_AT = 0
-SOCIAL_POST_GAP_SECONDS = 70 * 60   # ✅ 30 minutes
+async def twitter_producer():
+    from twitter_engine import twitter_loop
+    await twitter_loop(SOCIAL_QUEUE.put, logger, poll_seconds=90, executor=SHARED_EXECUTOR)
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # ✅ Ensure output folder exists
-    os.makedirs(os.path.join("images", "output"), exist_ok=True)
+async def scheduler_consumer():
+    await POST_SCHEDULER.run(RUNTIME.run_blocking)
 
-    # ======================================================
-    # ✅ 1) Start RSS Engine background thread
-    # ======================================================
-    threading.Thread(target=run_background_worker, daemon=True).start()
-    logger.info("✅ RSS Background worker started")
 
-    # ======================================================
-    # ✅ 2) COMMON CALLBACK for Telegram + Twitter
-    # ======================================================
-    async def on_social_event(text: str, source: str):
-        """
-        This runs whenever:
-        ✅ Telegram message comes
-        ✅ Twitter RSS item comes
-        """
+# ✅ ONE scheduler picks the best candidate from ALL producers per IG slot
+POST_SCHEDULER = PostScheduler(
+    limiter=post_limiter,
+    publish=lambda image_url, caption: post_to_instagram(image_url, caption, check_limits=False),
+    logger=logger,
+)
 
-        global SOCIAL_LAST_POST_AT
+# ✅ ONE event loop (uvicorn's) hosts every producer as a supervised task
+RUNTIME = Supervisor(executor=SHARED_EXECUTOR, logger=logger)
 
-        try:
-            text = (text or "").strip()
-            if not text:
-                return
+# ✅ with several uvicorn workers (or worker.py) only one process produces
+LEADER = LeaderElection(
+    lease=SupabaseLease(lambda: supabase) if os.getenv("LEADER_BACKEND", "file") == "supabase" else None,
+    logger=logger,
+)
+RUNTIME.add("rss", rss_producer)
+RUNTIME.add("telegram", telegram_producer)
+RUNTIME.add("twitter", twitter_producer)
+RUNTIME.add("cricket", cricket_producer)
+RUNTIME.add("scheduler", scheduler_consumer)
 
-            # ✅ avoid spam: 30 min gap for ALL social sources
-            now = int(time.time())
-            if now - SOCIAL_LAST_POST_AT < SOCIAL_POST_GAP_SECONDS:
-                mins_left = int((SOCIAL_POST_GAP_SECONDS - (now - SOCIAL_LAST_POST_AT)) / 60)
-                logger.warning(f"⏳ Social gap active. Skip posting ({mins_left} min left). Source={source}")
-                return
 
-            logger.info(f"✅ SOCIAL EVENT from {source}: {text[:100]}")
+SOCIAL_IMAGE_URL = "https://images.unsplash.com/photo-1504711434969-e33886168f5c"
 
-            # ✅ 1) Convert into viral format
-            data = ai_rvcj_converter(text)
 
-            # ✅ 2) Create image
-            img_name = f"social_{uuid.uuid4().hex}.png"
-            path = generate_news_image(
-                headline=data.get("headline", "CRICKET UPDATE"),
-                info_text=data.get("image_info", text[:120]),
-                image_url="https://images.unsplash.com/photo-1504711434969-e33886168f5c",
-                output_name=img_name
-            )
+def process_social_event(text: str, source: str):
+    """
+    This runs (in a social queue worker thread) whenever:
+    ✅ Telegram message comes
+    ✅ Twitter RSS item comes
+    -> scored candidate for the global post scheduler
+    """
+    trace = None
+    try:
+        text = (text or "").strip()
+        if not text:
+            return
 
-            # ✅ 3) Upload + post
-            public_url = upload_image_to_cloudinary(path)
-            if not public_url:
-                logger.error("❌ Cloudinary upload failed")
-                return
+        trace = TRACER.start(f"social: {text[:80]}", source=source)
+        with trace.activate():
+            # ✅ every social mention counts for trends, even if we don't post it
+            key = f"{source}|{text[:200]}"
+            with span("trend_observe"):
+                TREND_ENGINE.observe(key, text, source)
+
+            # ✅ same story already taken from another channel/feed -> no AI spend
+            with span("near_dupe"):
+                cluster, first_copy = STORY_INDEX.should_process(text, source)
+        if not first_copy:
+            logger.info(f"♻️ Near-duplicate story skipped. Source={source}")
+            trace.finish("duplicate")
+            return
 
-            caption = data.get("short_caption") or data.get("headline") or "🔥"
-            ig_res = post_to_instagram(public_url, caption)
+        logger.info(f"✅ SOCIAL EVENT from {source}: {text[:100]}")
 
-            # ✅ if success update timer
-            if ig_res and "id" in ig_res:
-                SOCIAL_LAST_POST_AT = int(time.time())
+        def on_done(ok):
+            if ok:
                 logger.info("✅ Social Post DONE ✅")
             else:
-                logger.error(f"❌ Social Post Failed: {ig_res}")
+                STORY_INDEX.release(cluster)
+
+        cand = Candidate(
+            key=f"social:{cluster}",
+            score=TREND_ENGINE.score(key, static=classify_keywords(text).trend),
+            source=source,
+            prepare=lambda: render_post(text, SOCIAL_IMAGE_URL, "social", "CRICKET UPDATE", text[:120], "🔥"),
+            on_done=on_done,
+            ttl_seconds=SOCIAL_CANDIDATE_TTL_SECONDS,
+            trace=trace,
+        )
+        if not POST_SCHEDULER.submit(cand):
+            STORY_INDEX.release(cluster)
+            trace.finish("not_submitted")
 
+    except Exception as e:
+        logger.error(f"❌ process_social_event error: {e}")
+        if trace:
+            trace.finish("error")
+
+
+# ✅ Telegram/Twitter ingestion only enqueues; workers do the blocking work
+SOCIAL_QUEUE = SocialEventQueue(
+    process_social_event,
+    maxsize=int(os.getenv("SOCIAL_QUEUE_MAXSIZE", "50")),
+    workers=int(os.getenv("SOCIAL_QUEUE_WORKERS", "2")),
+    policy=os.getenv("SOCIAL_QUEUE_POLICY", "drop_oldest"),
+    executor=SHARED_EXECUTOR,
+    logger=logger,
+)
+
+# ======================================================
+# WEB LAYER STATE (handlers only read memory / await async clients)
+# ======================================================
+NEWS_SNAPSHOT = NewsSnapshot()
+ARTICLES = ArticleIndex()     # stable id -> article (LRU + optional ARTICLE_INDEX_DISK)
+NEWS_REFRESH_SECONDS = int(os.getenv("NEWS_REFRESH_SECONDS", "120"))
+
+def _init_http():
+    import httpx
+    return httpx.AsyncClient(
+        timeout=15,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    )
+
+HTTP = LazyClient(_init_http, "httpx")
+# ✅ AI text for detail pages is prepared after each refresh, never on a request
+# (leader only; other web processes read the results from local storage)
+ENRICHER = Enricher(ai_rvcj_converter, ARTICLES, SHARED_EXECUTOR, store=local_storage)
+
+async def refresh_news_snapshot():
+    feeds = await fetch_feed_entries(HTTP, RSS_SOURCES, RSS_ENTRIES_PER_FEED)
+    loop = asyncio.get_running_loop()
+    items = await loop.run_in_executor(SHARED_EXECUTOR, news_from_feed_entries, feeds)
+    await loop.run_in_executor(SHARED_EXECUTOR, ARTICLES.put_many, items)
+    state = NEWS_SNAPSHOT.replace(items)
+    # render + compress every home variant now, not on the first visitor
+    await loop.run_in_executor(SHARED_EXECUTOR, HOME_PAGES.prerender, state)
+    logger.info(f"📰 News snapshot v{state.version}: {len(state.items)} items")
+    if LEADER.is_leader:
+        ENRICHER.kick(state.items)
+
+async def news_snapshot_loop():
+    """Every web process keeps its own snapshot fresh (leader or not)."""
+    while True:
+        try:
+            await refresh_news_snapshot()
         except Exception as e:
-            logger.error(f"❌ on_social_event error: {e}")
+            NEWS_SNAPSHOT.last_error = str(e)[:300]
+            logger.error(f"❌ News snapshot refresh failed: {e}")
+        await asyncio.sleep(NEWS_REFRESH_SECONDS)
+
+def _plain_rvcj(item):
+    return {
+        "headline": item["title"],
+        "image_info": (item.get("summary") or item["title"])[:400],
+        "short_caption": item["title"],
+    }
+
+# ✅ queue depths are read only when /metrics is scraped
+metrics.REGISTRY.gauge_func(
+    "trendscope_queue_depth", "Items waiting per queue",
+    lambda: {
+        ("social",): len(SOCIAL_QUEUE.items),
+        ("scheduler",): len(POST_SCHEDULER.by_key),
+        ("executor",): SHARED_EXECUTOR._work_queue.qsize(),
+    },
+    ["queue"],
+)
+metrics.REGISTRY.gauge_func(
+    "trendscope_social_queue_dropped", "Social events dropped by the queue policy",
+    lambda: SOCIAL_QUEUE.dropped,
+)
+metrics.REGISTRY.gauge_func(
+    "trendscope_post_slot_wait_seconds", "Seconds until the post limiter opens a slot",
+    post_limiter.seconds_until_slot,
+)
+metrics.REGISTRY.gauge_func(
+    "trendscope_is_leader", "1 if this process runs the producers", lambda: int(LEADER.is_leader),
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ✅ Ensure output folder exists
+    os.makedirs(os.path.join("images", "output"), exist_ok=True)
 
     # ======================================================
-    # ✅ 3) Start Telegram engine in background thread
+    # ✅ 0) Website news snapshot (refreshed in the background)
     # ======================================================
-    def tg_runner():
-        try:
-            from telegram_engine import telegram_fetch_loop
-            asyncio.run(telegram_fetch_loop(on_social_event, logger))
-        except Exception as e:
-            logger.error(f"❌ Telegram runner crashed: {e}")
+    snapshot_task = asyncio.create_task(news_snapshot_loop(), name="news_snapshot")
 
-    threading.Thread(target=tg_runner, daemon=True).start()
-    logger.info("✅ Telegram thread started")
+    # ======================================================
+    # ✅ 1) Social queue (Telegram + Twitter -> workers)
+    # ======================================================
+    SOCIAL_QUEUE.start()
 
     # ======================================================
-    # ✅ 4) Start Twitter engine (FREE RSS / Nitter) thread
+    # ✅ 2) RSS, Telegram, Twitter, Cricket as supervised tasks
+    #       -> only in the elected leader process, others serve web only
     # ======================================================
-    def twitter_runner():
-        try:
-            from twitter_engine import twitter_fetch_loop
-            twitter_fetch_loop(on_social_event, logger, poll_seconds=90)
-        except Exception as e:
-            logger.error(f"❌ Twitter runner crashed: {e}")
+    LEADER.start(on_elected=RUNTIME.start, on_lost=RUNTIME.stop)
 
-    threading.Thread(target=twitter_runner, daemon=True).start()
-    logger.info("✅ Twitter thread started")
+    # ✅ optional: PROFILE_ON_START="twitter:60" samples a producer right away
+    profiler.start_from_env()
 
     # ✅ DONE
     yield
 
+    await LEADER.stop()
+    await RUNTIME.stop()
+    await SOCIAL_QUEUE.stop()
+    snapshot_task.cancel()
+    await ENRICHER.stop()
+    ARTICLES.close()
+    post_limiter.close()
+    if HTTP.ready:
+        await HTTP.aclose()
+
 
 
 app = FastAPI(lifespan=lifespan)
@@ -887,30 +1162,11 @@ app = FastAPI(lifespan=lifespan)
 # 9. WEBSITE HTML PAGES (The Original 600-line UI)
 # ======================================================
 
-# Change this line:
-@app.api_route("/", response_class=HTMLResponse, methods=["GET", "HEAD"])
-def home(request: Request, category: str = Query(None)):
-    # --- 1. Catch Robots (UptimeRobot/Cron-job) ---
-    user_agent = request.headers.get("user-agent", "").lower()
-    
-    # If it's a HEAD request or a robot, return immediately to save time
-    if request.method == "HEAD" or "uptime" in user_agent or "cron" in user_agent:
-        # Use Response (Import it from fastapi if not already there)
-        return Response(content="TrendScope Awake", media_type="text/plain")
-
-    # --- 2. Regular Visitor Logic ---
-    try:
-        news = fetch_news(filter_posted=False)
-        news.sort(key=lambda x: x["trend"], reverse=True)
-        if category:
-            news = [n for n in news if n["category"] == category]
-        flash = news[:5]
-    except Exception as e:
-        logger.error(f"Home Page Error: {e}")
-        return HTMLResponse(content="<h1>Site Busy. Please refresh.</h1>", status_code=503)
-
-    # ... rest of your original HTML return f""" ...
+HOME_CATEGORIES = ("India", "Tech", "Business", "Sports")
 
+def render_home_html(news, category=None):
+    """Full home page for one category (runs once per snapshot version, see HOME_PAGES)."""
+    flash = news[:5]
     return f"""
 <html>
 <head>
@@ -962,14 +1218,43 @@ function toggleMenu(){{
 </body>
 </html>
 """
+
+HOME_PAGES = PageCache(render_home_html, HOME_CATEGORIES)
+
+
+# Change this line:
+@app.api_route("/", response_class=HTMLResponse, methods=["GET", "HEAD"])
+async def home(request: Request, category: str = Query(None)):
+    # --- 1. Catch Robots (UptimeRobot/Cron-job) ---
+    user_agent = request.headers.get("user-agent", "").lower()
+    
+    # If it's a HEAD request or a robot, return immediately to save time
+    if request.method == "HEAD" or "uptime" in user_agent or "cron" in user_agent:
+        # Use Response (Import it from fastapi if not already there)
+        return Response(content="TrendScope Awake", media_type="text/plain")
+
+    # --- 2. Regular Visitor Logic (pre-rendered + pre-compressed per snapshot) ---
+    state = NEWS_SNAPSHOT.state
+    if not state.version:
+        return HTMLResponse(
+            content="<html><head><meta http-equiv='refresh' content='3'></head>"
+                    "<body style='font-family:Arial;padding:40px'><h2>TrendScope is loading fresh news…</h2></body></html>",
+            status_code=200,
+        )
+    return page_response(HOME_PAGES.get(state, category), request)
 @app.get("/news/{i}", response_class=HTMLResponse)
-def news_detail(i: int):
-    news_list = fetch_news(filter_posted=False) # Website shows everything
-    item = next((n for n in news_list if n["id"] == i), None)
+async def news_detail(i: str):
+    # disk tier / kv lookups block -> off the event loop
+    loop = asyncio.get_running_loop()
+    item = await loop.run_in_executor(SHARED_EXECUTOR, ARTICLES.get, i)
     if not item: return "<h3>News not found</h3>"
 
-    # Use the same AI converter
-    rvcj = ai_rvcj_converter(item["summary"])
+    # AI text from the background enricher; raw summary until it is ready
+    rvcj = item.get("rvcj") or await loop.run_in_executor(SHARED_EXECUTOR, ENRICHER.shared, i)
+    if rvcj is None:
+        ENRICHER.want(item)
+        rvcj = _plain_rvcj(item)
+    image_info_html = rvcj['image_info'].replace('\n', '<br>')
 
     return f"""
     <html>
@@ -981,7 +1266,7 @@ def news_detail(i: int):
                 <img src="{item['image']}">
                 <h2>{rvcj['headline']}</h2>
                 <div class="label">📰 NEWS HIGHLIGHTS</div>
-                <div class="box">{rvcj['image_info'].replace('\\n', '<br>')}</div>
+                <div class="box">{image_info_html}</div>
                 <button class="btn read" onclick="window.open('{item['link']}', '_blank')">Read Source Article</button>
             </div>
         </div>
@@ -989,8 +1274,84 @@ def news_detail(i: int):
     </html>
     """
 
+def traces_waterfall_html(traces):
+    """Last N candidate traces as a simple CSS waterfall (one bar per span)."""
+    import html
+
+    colors = {"posted": "#1e8e3e", "running": "#1a73e8", "duplicate": "#9aa0a6", "expired": "#f29900"}
+    rows = []
+    for t in traces:
+        total = max(t["duration_ms"], 1.0)
+        head = (
+            f"<div style='margin-top:14px; font-weight:bold; color:{colors.get(t['status'], '#d93025')}'>"
+            f"{html.escape(t['name'])} — {t['status']} — {t['duration_ms'] / 1000:.1f}s</div>"
+        )
+        bars = []
+        for sp in t["spans"]:
+            left = 100.0 * sp["start_ms"] / total
+            width = max(100.0 * sp["duration_ms"] / total, 0.3)
+            color = "#d93025" if sp["error"] else ("#1a73e8" if sp["running"] else "#5f9ea0")
+            title = html.escape(f"{sp['name']} {sp['duration_ms']:.0f} ms" + (f" ({sp['error']})" if sp["error"] else ""))
+            bars.append(
+                f"<div style='display:flex; align-items:center; font-size:12px; height:18px'>"
+                f"<div style='width:220px; padding-left:{sp['depth'] * 12}px; text-align:left; white-space:nowrap; overflow:hidden'>"
+                f"{html.escape(sp['name'])}</div>"
+                f"<div style='flex:1; position:relative; height:12px; background:#f1f3f6'>"
+                f"<div title='{title}' style='position:absolute; left:{left:.2f}%; width:{width:.2f}%; height:12px; background:{color}'></div>"
+                f"</div><div style='width:80px; text-align:right'>{sp['duration_ms']:.0f} ms</div></div>"
+            )
+        rows.append(head + "".join(bars))
+    return "".join(rows) or "<p>No traces yet.</p>"
+
+
+@app.get("/admin/traces")
+async def admin_traces(n: int = Query(20)):
+    return {"traces": TRACER.recent(max(1, min(n, 200)))}
+
+
+# ✅ on-demand sampling profiler (nothing runs unless started here / PROFILE_ON_START)
+@app.get("/admin/profile/start")
+def admin_profile_start(target: str = Query(...), seconds: int = Query(30)):
+    try:
+        return profiler.start_profile(target, seconds)
+    except ValueError as e:
+        return {"error": str(e), "targets": sorted(profiler.TARGETS) + ["all", "thread:<name prefix>"]}
+    except RuntimeError as e:
+        return {"error": str(e)}
+
+
+@app.get("/admin/profile/stop")
+def admin_profile_stop():
+    profiler.stop_profile()
+    return {"status": "stopping"}
+
+
+@app.get("/admin/profiles")
+def admin_profiles():
+    return {"captures": profiler.profile_status(), "files": profiler.list_profile_files()}
+
+
+@app.get("/admin/profiles/{name}")
+def admin_profile_download(name: str):
+    path = profiler.profile_file_path(name)
+    if not path:
+        return Response("not found", status_code=404, media_type="text/plain")
+    return FileResponse(path, filename=name, media_type="application/octet-stream")
+
+
+# ✅ keyword_rules.json edited on the host -> live without a restart (this process only)
+@app.get("/admin/keyword-rules/reload")
+def admin_reload_keyword_rules():
+    try:
+        rules = reload_rules()
+    except Exception as e:
+        return {"error": f"rules not reloaded: {e}"}
+    return {"status": "reloaded", "categories": rules.category_order, "keywords": len(rules.actions)}
+
+
 @app.get("/admin", response_class=HTMLResponse)
-def admin_page():
+async def admin_page(n: int = Query(20)):
+    waterfall = traces_waterfall_html(TRACER.recent(max(1, min(n, 200))))
     return """
     <html>
     <body style="font-family:Arial;padding:40px; background:#f1f3f6; text-align:center;">
@@ -1000,6 +1361,10 @@ def admin_page():
             <button onclick="runNow()" style="padding:15px 30px; background:green; color:white; border:none; border-radius:8px; font-weight:bold; cursor:pointer;">🚀 TRIGGER AUTO-POST NOW</button>
             <p id="msg"></p>
         </div>
+        <div style="background:white; padding:20px; border-radius:15px; margin-top:20px; text-align:left; box-shadow:0 4px 10px rgba(0,0,0,0.1);">
+            <h3>Recent items (waterfall)</h3>
+            """ + waterfall + """
+        </div>
         <script>
         function runNow(){
             document.getElementById('msg').innerText = "Processing...";
@@ -1014,24 +1379,63 @@ def admin_page():
     """
 
 @app.get("/cron/hourly")
-def cron_trigger():
+async def cron_trigger():
+    # Candidates only matter in the process that runs the scheduler
+    if not LEADER.is_leader:
+        return {"status": "not_leader_skipping_trigger"}
+
     # We check if it's already busy. If yes, we just say "Busy" but return 200 OK.
     if IS_POSTING_BUSY:
         return {"status": "already_running_skipping_trigger"}
     
-    # Trigger in a separate thread so the web request finishes instantly
-    threading.Thread(target=post_category_wise_news).start()
+    # Trigger on the shared executor so the web request finishes instantly
+    SHARED_EXECUTOR.submit(post_category_wise_news)
     return {"status": "trigger_received_successfully"}
 
+@app.get("/queue/stats")
+async def queue_stats():
+    return {
+        "social": SOCIAL_QUEUE.stats(),
+        "scheduler": POST_SCHEDULER.stats(),
+        "limiter": post_limiter.LIMITER.stats(),
+        "leader": LEADER.is_leader,
+        "tasks": RUNTIME.status(),
+        "stories": STORY_INDEX.stats(),
+        "news_snapshot": NEWS_SNAPSHOT.stats(),
+        "home_pages": HOME_PAGES.stats(),
+        "articles": ARTICLES.stats(),
+        "url_resolver": URL_RESOLVER.stats(),
+        "replay": HARNESS.stats() if HARNESS is not None else None,
+        "enrichment": ENRICHER.stats(),
+        "posted_journal": POSTED_JOURNAL.stats(),
+        "storage": STORE.stats(),
+    }
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/trends")
+async def trends(window: str = Query("5m")):
+    if window not in ("5m", "1h", "24h"):
+        window = "5m"
+    return {"window": window, "top": TREND_ENGINE.top(30, window)}
+
 @app.get("/login", response_class=HTMLResponse)
-def login():
+async def login():
     return "<h2 style='padding:20px'>Login (Coming Soon)</h2><a href='/'>Back</a>"
 
 @app.get("/test-supabase")
-def test_supabase():
+async def test_supabase():
     try:
-        # Try to fetch one row from your table
-        res = supabase.table("posted_news").select("*").limit(1).execute()
-        return {"status": "Connected!", "data_found": len(res.data)}
+        # Try to fetch one row from your table (PostgREST over the async client)
+        r = await HTTP.get(
+            f"{SUPABASE_URL}/rest/v1/posted_news",
+            params={"select": "*", "limit": "1"},
+            headers={"apikey": SUPABASE_KEY, "Authorization": f"Bearer {SUPABASE_KEY}"},
+            timeout=10,
+        )
+        r.raise_for_status()
+        return {"status": "Connected!", "data_found": len(r.json())}
     except Exception as e:
         return {"status": "Error", "message": str(e)}    
\ No newline at end of file
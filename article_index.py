@@ -0,0 +1,150 @@
+import os
+import time
+import shelve
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from url_resolver import canonical_url
+
+logger = logging.getLogger("uvicorn.error")
+
+ARTICLE_INDEX_SIZE = int(os.getenv("ARTICLE_INDEX_SIZE", "5000"))
+ARTICLE_INDEX_DISK = os.getenv("ARTICLE_INDEX_DISK", "").strip()        # "" -> memory only
+ARTICLE_DISK_MAX_AGE_SECONDS = int(os.getenv("ARTICLE_DISK_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+
+
+def article_id(link: str, fallback: str = ""):
+    """Stable 16-hex id of an article (canonical link hash; title if there is no link)."""
+    key = canonical_url(link) or (fallback or "").strip().lower()
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class ArticleIndex:
+    """
+    ✅ id -> article for /news/{id}, O(1).
+
+    - memory tier: OrderedDict LRU, at most `max_items`
+    - optional disk tier (shelve): every new id is written once, so links
+      keep working after the LRU drops them or the process restarts;
+      entries older than `disk_max_age` are pruned
+    - AI enrichment (article["rvcj"]) survives refreshes of the same id
+    """
+
+    def __init__(self, max_items=ARTICLE_INDEX_SIZE, disk_path=ARTICLE_INDEX_DISK,
+                 disk_max_age=ARTICLE_DISK_MAX_AGE_SECONDS):
+        self.max_items = max_items
+        self.disk_path = disk_path
+        self.disk_max_age = disk_max_age
+        self.lock = threading.Lock()
+        self.items = OrderedDict()
+        self.disk = None
+        self.disk_writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _open_disk(self):
+        if self.disk is None and self.disk_path:
+            try:
+                self.disk = shelve.open(self.disk_path)
+            except Exception as e:
+                logger.error(f"❌ Article disk index disabled: {e}")
+                self.disk_path = ""
+        return self.disk
+
+    def put(self, article):
+        aid = article["id"]
+        with self.lock:
+            old = self.items.get(aid)
+            if old is not None and "rvcj" in old:
+                article.setdefault("rvcj", old["rvcj"])
+            self.items[aid] = article
+            self.items.move_to_end(aid)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+            if old is None and self._open_disk() is not None:
+                try:
+                    rec = self.disk.get(aid)
+                    if rec is None:
+                        self.disk[aid] = {"ts": time.time(), "article": article}
+                        self.disk_writes += 1
+                        if self.disk_writes % 1000 == 0:
+                            self._prune_disk()
+                    elif "rvcj" in rec["article"]:
+                        article.setdefault("rvcj", rec["article"]["rvcj"])
+                except Exception as e:
+                    logger.error(f"❌ Article disk write failed: {e}")
+
+    def put_many(self, articles):
+        for a in articles:
+            self.put(a)
+        if self.disk is not None:
+            with self.lock:
+                self.disk.sync()
+
+    def get(self, aid):
+        with self.lock:
+            art = self.items.get(aid)
+            if art is not None:
+                self.items.move_to_end(aid)
+                self.hits += 1
+                return art
+
+            if self._open_disk() is not None:
+                rec = self.disk.get(aid)
+                if rec is not None:
+                    art = rec["article"]
+                    self.items[aid] = art
+                    while len(self.items) > self.max_items:
+                        self.items.popitem(last=False)
+                    self.disk_hits += 1
+                    return art
+
+            self.misses += 1
+            return None
+
+    def enrichment(self, aid):
+        with self.lock:
+            art = self.items.get(aid)
+            return art.get("rvcj") if art is not None else None
+
+    def enrich(self, aid, rvcj):
+        """Store AI output next to the article (memory + disk tier)."""
+        with self.lock:
+            art = self.items.get(aid)
+            if art is not None:
+                art["rvcj"] = rvcj
+            if self._open_disk() is not None:
+                try:
+                    rec = self.disk.get(aid)
+                    if rec is not None:
+                        rec["article"]["rvcj"] = rvcj
+                        self.disk[aid] = rec
+                except Exception as e:
+                    logger.error(f"❌ Article disk write failed: {e}")
+
+    def _prune_disk(self):
+        cutoff = time.time() - self.disk_max_age
+        old = [k for k, rec in self.disk.items() if rec.get("ts", 0) < cutoff]
+        for k in old:
+            del self.disk[k]
+
+    def close(self):
+        with self.lock:
+            if self.disk is not None:
+                self.disk.close()
+                self.disk = None
+
+    def stats(self):
+        with self.lock:
+            return {
+                "memory": len(self.items),
+                "max_items": self.max_items,
+                "disk": self.disk_path or None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,99 @@
+"""
+Feed parsing benchmark: feedparser vs the streaming, entry-capped parser.
+
+    python bench_feeds.py                         # synthetic 100-entry feed with HTML bodies
+    python bench_feeds.py --entries 60 --body 8000
+    python bench_feeds.py --file feed.xml         # a saved real feed
+    python bench_feeds.py --url https://indianexpress.com/feed/
+
+For each parser prints CPU ms per parse (time.process_time, median of
+--runs), peak traced memory (tracemalloc) and how many bytes it had to
+read. The streaming parser only needs the bytes up to entry --take.
+"""
+import time
+import argparse
+import statistics
+import tracemalloc
+
+import requests
+
+from feed_stream import parse_feed_bytes
+
+
+def synthetic_feed(entries=100, body=5000):
+    para = "<p>Lorem ipsum <b>dolor</b> sit amet, consectetur adipiscing elit &amp; more. </p>"
+    html = (para * (body // len(para) + 1))[:body]
+    items = []
+    for i in range(entries):
+        items.append(
+            f"<item><title>Headline number {i} about India &amp; cricket</title>"
+            f"<link>https://example.com/news/{i}?utm_source=rss</link>"
+            f"<guid>https://example.com/news/{i}</guid>"
+            f"<pubDate>Mon, 19 Oct 2026 10:{i % 60:02d}:00 +0530</pubDate>"
+            f"<description><![CDATA[{html}]]></description>"
+            f"<media:content url='https://example.com/img/{i}.jpg' medium='image'/>"
+            f"</item>"
+        )
+    return (
+        "<?xml version='1.0' encoding='UTF-8'?>"
+        "<rss version='2.0' xmlns:media='http://search.yahoo.com/mrss/'><channel>"
+        "<title>Bench</title><link>https://example.com</link>"
+        + "".join(items) + "</channel></rss>"
+    ).encode("utf-8")
+
+
+def measure(fn, runs):
+    cpu = []
+    for _ in range(runs):
+        t0 = time.process_time()
+        fn()
+        cpu.append(time.process_time() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(cpu), peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--entries", type=int, default=100)
+    ap.add_argument("--body", type=int, default=5000, help="HTML bytes per entry (synthetic)")
+    ap.add_argument("--file")
+    ap.add_argument("--url")
+    ap.add_argument("--take", type=int, default=6, help="entries the app uses")
+    ap.add_argument("--runs", type=int, default=20)
+    args = ap.parse_args()
+
+    if args.url:
+        content = requests.get(args.url, timeout=30, headers={"User-Agent": "Mozilla/5.0"}).content
+    elif args.file:
+        with open(args.file, "rb") as f:
+            content = f.read()
+    else:
+        content = synthetic_feed(args.entries, args.body)
+
+    import feedparser
+
+    fp = feedparser.parse(content)
+    st = parse_feed_bytes(content, args.take)
+    print(f"document: {len(content) / 1024:.0f} KB, {len(fp.entries)} entries (feedparser)")
+    print(f"streaming: {len(st.entries)} entries after {st.bytes_read / 1024:.0f} KB"
+          + (" (feedparser fallback)" if st.fallback else ""))
+    same = [e.get("link") for e in fp.entries[:args.take]] == [e.get("link") for e in st.entries]
+    print(f"same first {args.take} links: {same}\n")
+
+    rows = [
+        ("feedparser (full doc)", lambda: feedparser.parse(content).entries[:args.take]),
+        (f"streaming (stop at {args.take})", lambda: parse_feed_bytes(content, args.take)),
+        ("streaming (all entries)", lambda: parse_feed_bytes(content, 10 ** 6)),
+    ]
+    base = None
+    for name, fn in rows:
+        cpu, peak = measure(fn, args.runs)
+        base = base or cpu
+        print(f"  {name:28s} cpu {cpu * 1000:8.2f} ms  ({base / cpu:5.1f}x)  peak mem {peak / 1024:8.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
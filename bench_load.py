@@ -0,0 +1,113 @@
+"""
+Load test for the website.
+
+    python bench_load.py --url http://127.0.0.1:8000 --concurrency 150 --duration 20
+    python bench_load.py --spawn --concurrency 150     # starts uvicorn app:app itself
+
+Each virtual visitor loops over the paths (home, categories, a detail page)
+as fast as responses come back. Prints throughput, latency percentiles and
+status codes. Background producers keep running in the server meanwhile,
+so the numbers include their GIL / executor pressure.
+"""
+import re
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+import os
+
+import httpx
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# {article} -> an id taken from the live home page
+DEFAULT_PATHS = ["/", "/?category=India", "/?category=Tech", "/?category=Sports", "/news/{article}"]
+
+
+async def visitor(client, base, paths, deadline, latencies, statuses):
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            r = await client.get(base + path)
+            statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+        except Exception as e:
+            statuses[type(e).__name__] = statuses.get(type(e).__name__, 0) + 1
+            continue
+        latencies.append(time.perf_counter() - t0)
+
+
+async def wait_ready(base, timeout=120):
+    """-> (seconds until the snapshot is served, first article id on the page)"""
+    t0 = time.perf_counter()
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() - t0 < timeout:
+            try:
+                r = await client.get(base + "/")
+                if r.status_code == 200 and "loading fresh news" not in r.text:
+                    m = re.search(r"href='/news/([^']+)'", r.text)
+                    return time.perf_counter() - t0, (m.group(1) if m else "missing")
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    return None, None
+
+
+async def run(args):
+    base = args.url.rstrip("/")
+    proc = None
+    if args.spawn:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=BASE_DIR,
+        )
+        base = f"http://127.0.0.1:{args.port}"
+    try:
+        ready, article = await wait_ready(base)
+        if ready is None:
+            print("server did not become ready")
+            return
+        print(f"server ready (snapshot loaded) after {ready:.1f}s")
+        paths = [p.replace("{article}", article) for p in args.paths]
+
+        latencies, statuses = [], {}
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+            deadline = time.perf_counter() + args.duration
+            t0 = time.perf_counter()
+            await asyncio.gather(*(
+                visitor(client, base, paths, deadline, latencies, statuses)
+                for _ in range(args.concurrency)
+            ))
+            elapsed = time.perf_counter() - t0
+
+        ok = len(latencies)
+        print(f"{args.concurrency} visitors, {elapsed:.1f}s: {ok} responses, {ok / elapsed:.0f} req/s")
+        if latencies:
+            qs = statistics.quantiles(latencies, n=100)
+            print(f"latency ms: p50 {qs[49] * 1000:.0f}  p95 {qs[94] * 1000:.0f}  "
+                  f"p99 {qs[98] * 1000:.0f}  max {max(latencies) * 1000:.0f}")
+        print(f"status: {statuses}")
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=15)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--spawn", action="store_true")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--concurrency", type=int, default=150)
+    ap.add_argument("--duration", type=float, default=20)
+    ap.add_argument("--timeout", type=float, default=30)
+    ap.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+End-to-end offline benchmark of the posting path:
+fetch (RSS) -> AI -> render image -> upload -> Graph create/publish.
+
+    python bench_pipeline.py                          # stand-ins only, zero latency
+    python bench_pipeline.py --items 30 --workers 4 \\
+        --latency "api.cloudinary.com=0.8,generativelanguage.googleapis.com=1.5,graph.facebook.com=0.4,*=0.1" \\
+        --errors "graph.facebook.com=0.05:500"
+    python bench_pipeline.py --fixtures fixtures      # replay recorded traffic (REPLAY_MODE=record run)
+
+Runs fully offline through the replay harness (replay.py) in a scratch
+working directory, with IG_PUBLISH_DELAY_SECONDS=0 and a throwaway SQLite
+store, so nothing real is posted or persisted. Prints items/minute and
+per-stage latency (p50 / p95 from the per-item traces), then checks that
+no story was posted twice and that every posted item reached Graph
+media_publish exactly once (exit code 1 otherwise).
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# stage name -> span names that count for it
+STAGES = [
+    ("fetch", ("feed:",)),
+    ("ai", ("ai",)),
+    ("image", ("image",)),
+    ("  download", ("image_download",)),
+    ("upload", ("upload",)),
+    ("graph:create", ("graph:create",)),
+    ("graph:publish", ("graph:publish",)),
+]
+
+
+def offline_env(args, workdir):
+    os.environ.update({
+        "REPLAY_MODE": "replay",
+        "REPLAY_DIR": os.path.abspath(args.fixtures),
+        "REPLAY_LATENCY": args.latency,
+        "REPLAY_ERRORS": args.errors,
+        "IG_PUBLISH_DELAY_SECONDS": "0",
+        "GOOGLE_API_KEY": "offline",       # exercises the genai path (stand-in answers)
+        "IG_BUSINESS_ID": "offline",
+        "PAGE_ACCESS_TOKEN": "offline",
+        "SUPABASE_URL": "",
+        "STORAGE_BACKEND": "sqlite",
+        "STORAGE_SQLITE_PATH": os.path.join(workdir, "bench.db"),
+        "POSTED_JOURNAL_FILE": os.path.join(workdir, "posted_journal.log"),
+        "TRACE_EXPORT_FILE": "",
+    })
+
+
+def pct(values, q):
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=20)
+    ap.add_argument("--workers", type=int, default=1, help="items rendered/posted in parallel")
+    ap.add_argument("--per-cycle", type=int, default=4,
+                    help="items taken per fetch cycle (later cycles re-read the same feeds)")
+    ap.add_argument("--latency", default="")
+    ap.add_argument("--errors", default="")
+    ap.add_argument("--fixtures", default=os.path.join(BASE_DIR, "fixtures"))
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="trendscope-bench-")
+    offline_env(args, workdir)
+    sys.path.insert(0, BASE_DIR)
+    os.chdir(workdir)                      # relative state files land in the scratch dir
+
+    t_import = time.perf_counter()
+    import app
+    from tracing import TRACER, activate, span
+    print(f"app import: {(time.perf_counter() - t_import) * 1000:.0f} ms (replay harness: {app.HARNESS.mode})")
+
+    traces, outcomes = [], {"posted": 0, "render_failed": 0, "publish_failed": 0, "exception": 0}
+    posted_keys = []
+
+    def run_item(n):
+        trace = TRACER.start(f"bench: {n['title'][:60]}")
+        try:
+            return post_item(n, trace)
+        except Exception as e:
+            trace.finish(f"exception: {type(e).__name__}")
+            return trace, "exception"
+
+    def post_item(n, trace):
+        with activate(trace):
+            post = app.render_post(n.get("summary", n["title"]), n.get("image"), "bench",
+                                   "BREAKING NEWS", n["title"], "Follow for more 🔥")
+            if not post:
+                trace.finish("render_failed")
+                return trace, "render_failed"
+            res = app.post_to_instagram(post["image_url"], post["caption"], check_limits=False)
+        if "error" in res:
+            trace.finish("publish_failed")
+            return trace, "publish_failed"
+        app.mark_item_posted(n)
+        posted_keys.append(n.get("key") or n["link"])
+        trace.finish("posted")
+        return trace, "posted"
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        while sum(outcomes.values()) < args.items:
+            cycle = TRACER.start("bench: fetch")
+            with activate(cycle):
+                with span("fetch_news"):
+                    news = app.fetch_news(filter_posted=True)
+            cycle.finish("ok")
+            traces.append(cycle)
+            left = args.items - sum(outcomes.values())
+            batch = news[:min(left, args.per_cycle)]
+            if not batch:
+                print("feeds returned nothing new; stopping")
+                break
+            for trace, outcome in pool.map(run_item, batch):
+                traces.append(trace)
+                outcomes[outcome] += 1
+    elapsed = time.perf_counter() - t0
+
+    done = sum(outcomes.values())
+    print(f"\n{done} items in {elapsed:.1f}s with {args.workers} worker(s): "
+          f"{outcomes['posted'] / elapsed * 60:.1f} posted items/min  {outcomes}")
+
+    durations = {name: [] for name, _ in STAGES}
+    for t in traces:
+        for sp in t.to_dict()["spans"]:
+            for name, prefixes in STAGES:
+                key = prefixes[0]
+                if (sp["name"] == key) or (key.endswith(":") and sp["name"].startswith(key)):
+                    durations[name].append(sp["duration_ms"])
+    print(f"\n{'stage':16s} {'n':>5s} {'p50 ms':>9s} {'p95 ms':>9s} {'total s':>9s}")
+    for name, _ in STAGES:
+        vals = durations[name]
+        print(f"{name:16s} {len(vals):5d} {pct(vals, 50):9.1f} {pct(vals, 95):9.1f} {sum(vals) / 1000:9.2f}")
+
+    app.POSTED_JOURNAL.close()
+    replay_stats = app.HARNESS.stats()
+    print(f"\nreplay: {replay_stats}")
+    print(f"posted journal: {app.POSTED_JOURNAL.stats()}")
+
+    problems = []
+    dupes = sorted({k for k in posted_keys if posted_keys.count(k) > 1})
+    if dupes:
+        problems.append(f"posted twice: {dupes[:5]}")
+    if replay_stats["published"] != outcomes["posted"]:
+        problems.append(f"media_publish calls {replay_stats['published']} != posted {outcomes['posted']}")
+    if replay_stats["missing"]:
+        problems.append(f"{replay_stats['missing']} request(s) without fixture / stand-in")
+
+    # generated cards are written next to the code (image_generator.OUTPUT_DIR)
+    out_dir = os.path.join(BASE_DIR, "images", "output")
+    for name in os.listdir(out_dir):
+        if name.startswith("bench_"):
+            os.remove(os.path.join(out_dir, name))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\nchecks: " + ("OK" if not problems else "FAILED\n  " + "\n  ".join(problems)))
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Cold-start benchmark for the web process.
+
+    python bench_startup.py                  # import profile of app.py (5 runs)
+    python bench_startup.py --module worker  # any other module
+    python bench_startup.py --serve          # + time until uvicorn answers HEAD /
+
+Every run is a fresh interpreter with `-X importtime`, so nothing is
+cached in-process. Prints the median wall time of `import <module>` and
+the heaviest imports (cumulative microseconds from -X importtime).
+"""
+import os
+import re
+import sys
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(module):
+    """One fresh interpreter -> (wall seconds, {module: cumulative_us} for top-level imports)."""
+    code = f"import time; t=time.perf_counter(); import {module}; print('WALL', time.perf_counter()-t)"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BASE_DIR, capture_output=True, text=True, timeout=300,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "import failed")
+
+    wall = float(re.search(r"WALL ([\d.e-]+)", proc.stdout).group(1))
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        _, cum_us, indent, name = m.groups()
+        depth = (len(indent) - 1) // 2
+        if depth <= 1:
+            # direct imports of the module (and the module itself)
+            cumulative[name] = max(cumulative.get(name, 0), int(cum_us))
+    return wall, cumulative
+
+
+def time_to_first_response(port, timeout=120):
+    """Starts uvicorn app:app and measures until HEAD / answers."""
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - t0 < timeout:
+            try:
+                req = urllib.request.Request(f"http://127.0.0.1:{port}/", method="HEAD",
+                                             headers={"User-Agent": "UptimeRobot/2.0"})
+                with urllib.request.urlopen(req, timeout=2) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - t0
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                time.sleep(0.05)
+        return None
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--module", default="app")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--serve", action="store_true")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    walls, last = [], {}
+    for _ in range(args.runs):
+        wall, last = import_profile(args.module)
+        walls.append(wall)
+
+    print(f"import {args.module}: median {statistics.median(walls) * 1000:.0f} ms "
+          f"(min {min(walls) * 1000:.0f} / max {max(walls) * 1000:.0f}, {args.runs} runs)")
+    print("\nheaviest imports (cumulative, last run):")
+    for name, us in sorted(last.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {us / 1000:9.1f} ms  {name}")
+
+    if args.serve:
+        ttfr = time_to_first_response(args.port)
+        print("\nuvicorn start -> first HEAD / : "
+              + (f"{ttfr * 1000:.0f} ms" if ttfr is not None else "no answer (timeout)"))
+
+
+if __name__ == "__main__":
+    main()
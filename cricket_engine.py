@@ -3,8 +3,12 @@ import re
 import json
 import time
 import uuid
+import threading
 import requests
 from datetime import datetime
+from metrics import AI_REQUEST_SECONDS, track
+from tracing import span
+from storage import local_storage
 
 def get_ai_keys():
     return {
@@ -31,30 +35,56 @@ MATCH_UPDATE_MINUTES = 20
 # -----------------------------
 # HELPERS: STATE SAVE/LOAD
 # -----------------------------
-def load_cricket_state():
-    if not os.path.exists(CRICKET_STATE_FILE):
-        return {
-            "posted_events": [],
-            "last_match_updates": {},   # match_id -> timestamp
-            "last_scores": {},          # match_id -> score hash
-            "last_milestones": {}       # match_id -> {"bat50":[], "bat100":[], "bowl3":[], "bowl5":[]}
-        }
+# posted_events -> cricket_events table, the per-match dicts -> one kv namespace each
+CRICKET_KV = ("last_match_updates", "last_scores", "last_milestones")
+
+# state is shared by the poll (executor thread), on_done (scheduler thread) and saves
+STATE_LOCK = threading.Lock()
+
+
+def _import_old_cricket_state(store):
+    """cricket_posted.json (old whole-file state) -> storage, once."""
+    if not os.path.exists(CRICKET_STATE_FILE) or store.cricket_events():
+        return
     try:
         with open(CRICKET_STATE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+            old = json.load(f)
+    except Exception:
+        return
+    store.add_cricket_events(old.get("posted_events", []))
+    for key in CRICKET_KV:
+        if old.get(key):
+            store.kv_set_many(f"cricket:{key}", old[key])
+
+
+def load_cricket_state():
+    state = {
+        "posted_events": [],
+        "last_match_updates": {},   # match_id -> timestamp
+        "last_scores": {},          # match_id -> score hash
+        "last_milestones": {}       # match_id -> {"bat50":[], "bat100":[], "bowl3":[], "bowl5":[]}
+    }
+    try:
+        store = local_storage()
+        _import_old_cricket_state(store)
+        state["posted_events"] = store.cricket_events()
+        for key in CRICKET_KV:
+            state[key] = store.kv_all(f"cricket:{key}")
     except Exception:
-        return {
-            "posted_events": [],
-            "last_match_updates": {},
-            "last_scores": {},
-            "last_milestones": {}
-        }
+        pass
+    return state
 
 
 def save_cricket_state(state):
+    # INSERT OR IGNORE / upserts: only new events and changed matches cost anything
+    with STATE_LOCK:
+        events = list(state["posted_events"])
+        snapshot = {key: dict(state[key]) for key in CRICKET_KV if state.get(key)}
     try:
-        with open(CRICKET_STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
+        store = local_storage()
+        store.add_cricket_events(events)
+        for key, values in snapshot.items():
+            store.kv_set_many(f"cricket:{key}", values)
     except Exception:
         pass
 
@@ -92,7 +122,6 @@ def is_target_match(m):
     """
     name = (m.get("name") or "").lower()
     teams = " ".join(m.get("teams", [])).lower()
-    series = (m.get("series_id") or "")
 
     # Match must be active/live-ish
     status = (m.get("status") or "").lower()
@@ -294,16 +323,17 @@ Context:
     # 1) GEMINI
     try:
         if GOOGLE_API_KEY:
-            from google import genai
-            client = genai.Client(api_key=GOOGLE_API_KEY)
-            res = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=ai_prompt
-            )
-            raw = res.text or ""
-            out = normalize(raw)
-            if out:
-                return out
+            with track(AI_REQUEST_SECONDS, "gemini"), span("ai:gemini"):
+                from google import genai
+                client = genai.Client(api_key=GOOGLE_API_KEY)
+                res = client.models.generate_content(
+                    model="gemini-2.0-flash",
+                    contents=ai_prompt
+                )
+                raw = res.text or ""
+                out = normalize(raw)
+                if out:
+                    return out
     except Exception as e:
         if logger:
             logger.warning(f"Cricket AI Gemini failed -> Groq ({e})")
@@ -311,17 +341,18 @@ Context:
     # 2) GROQ
     try:
         if GROQ_API_KEY:
-            headers = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
-            body = {
-                "model": "llama-3.1-70b-versatile",
-                "messages": [{"role": "user", "content": ai_prompt}],
-                "temperature": 0.6
-            }
-            r = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=body, timeout=30)
-            raw = r.json()["choices"][0]["message"]["content"]
-            out = normalize(raw)
-            if out:
-                return out
+            with track(AI_REQUEST_SECONDS, "groq"), span("ai:groq"):
+                headers = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
+                body = {
+                    "model": "llama-3.1-70b-versatile",
+                    "messages": [{"role": "user", "content": ai_prompt}],
+                    "temperature": 0.6
+                }
+                r = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=body, timeout=30)
+                raw = r.json()["choices"][0]["message"]["content"]
+                out = normalize(raw)
+                if out:
+                    return out
     except Exception as e:
         if logger:
             logger.warning(f"Cricket AI Groq failed -> OpenRouter ({e})")
@@ -329,17 +360,18 @@ Context:
     # 3) OPENROUTER
     try:
         if OPENROUTER_API_KEY:
-            headers = {"Authorization": f"Bearer {OPENROUTER_API_KEY}", "Content-Type": "application/json"}
-            body = {
-                "model": "openai/gpt-4o-mini",
-                "messages": [{"role": "user", "content": ai_prompt}],
-                "temperature": 0.6
-            }
-            r = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=body, timeout=30)
-            raw = r.json()["choices"][0]["message"]["content"]
-            out = normalize(raw)
-            if out:
-                return out
+            with track(AI_REQUEST_SECONDS, "openrouter"), span("ai:openrouter"):
+                headers = {"Authorization": f"Bearer {OPENROUTER_API_KEY}", "Content-Type": "application/json"}
+                body = {
+                    "model": "openai/gpt-4o-mini",
+                    "messages": [{"role": "user", "content": ai_prompt}],
+                    "temperature": 0.6
+                }
+                r = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=body, timeout=30)
+                raw = r.json()["choices"][0]["message"]["content"]
+                out = normalize(raw)
+                if out:
+                    return out
     except Exception as e:
         if logger:
             logger.error(f"Cricket AI OpenRouter failed ({e})")
@@ -350,8 +382,11 @@ Context:
 # -----------------------------
 # POST: CRICKET UPDATE
 # -----------------------------
-def post_cricket_update(m, event_type, generate_news_image, upload_image_to_cloudinary, post_to_instagram, logger):
+def build_cricket_post(m, event_type, generate_news_image, upload_image_to_cloudinary, logger):
     """
+    AI caption + image + Cloudinary upload for one match event.
+    Returns {"image_url": ..., "caption": ...} or None.
+
     event_type examples:
     - WICKET
     - MILESTONE
@@ -371,7 +406,8 @@ Event: {event_type}
 """
 
     # AI output (optional)
-    ai = ai_cricket_caption(context, logger=logger)
+    with span("ai"):
+        ai = ai_cricket_caption(context, logger=logger)
 
     if ai:
         headline = ai["headline"]
@@ -385,52 +421,70 @@ Event: {event_type}
 
     # Build image
     img_name = f"cricket_{uuid.uuid4().hex}.png"
-    img_path = generate_news_image(
-        headline=headline,
-        info_text=image_info,
-        image_url=(m.get("teamInfo", [{}])[0].get("img") if m.get("teamInfo") else ""),
-        output_name=img_name
-    )
-
-    # Upload and post
-    public_url = upload_image_to_cloudinary(img_path)
+    with span("image"):
+        img_path = generate_news_image(
+            headline=headline,
+            info_text=image_info,
+            image_url=(m.get("teamInfo", [{}])[0].get("img") if m.get("teamInfo") else ""),
+            output_name=img_name
+        )
+
+    # Upload
+    with span("upload"):
+        public_url = upload_image_to_cloudinary(img_path)
     if not public_url:
         logger.error("Cricket: Cloudinary upload failed.")
-        return False
-
-    ig_res = post_to_instagram(public_url, caption)
-    if ig_res and "id" in ig_res:
-        logger.info(f"✅ Cricket posted: {event_type} | {match_name}")
-        return True
+        return None
 
-    logger.error(f"❌ Cricket IG failed: {ig_res}")
-    return False
+    return {"image_url": public_url, "caption": caption}
 
 
 # -----------------------------
 # MAIN LOOP
 # -----------------------------
-def cricket_worker_loop(generate_news_image, upload_image_to_cloudinary, post_to_instagram, logger):
+# event -> (scheduler score, seconds before the news is stale)
+EVENT_PRIORITY = {
+    "RESULT": (90, 2 * 3600),
+    "WICKET": (85, 10 * 60),
+    "MATCH_UPDATE": (60, MATCH_UPDATE_MINUTES * 60),
+}
+
+
+def cricket_poll_once(state, generate_news_image, upload_image_to_cloudinary, submit, logger):
     """
-    Runs forever inside worker.py.
-    Detects India/WPL/IPL matches and posts updates.
+    One polling pass: fetch matches, detect events, hand them to the
+    post scheduler, save state.
+
+    submit(event_id, event_type, score, ttl, prepare, on_done) -> global post scheduler
     """
 
-    state = load_cricket_state()
+    def handle(m, event_type, event_id, match_id=None):
+        def on_done(ok):
+            if ok:
+                with STATE_LOCK:
+                    state["posted_events"].append(event_id)
+                    if match_id:
+                        mark_match_update_time(state, match_id)
+                save_cricket_state(state)
 
-    logger.info("🏏 Cricket Engine Started...")
+        score, ttl = EVENT_PRIORITY.get(event_type, (50, 30 * 60))
+        submit(
+            event_id, event_type, score, ttl,
+            lambda: build_cricket_post(m, event_type, generate_news_image, upload_image_to_cloudinary, logger),
+            on_done,
+        )
 
-    while True:
-        try:
-            matches = fetch_current_matches()
-            targets = [m for m in matches if is_target_match(m)]
+    try:
+        matches = fetch_current_matches()
+        targets = [m for m in matches if is_target_match(m)]
 
-            if not targets:
-                logger.info("Cricket: No India/WPL/IPL matches live. Sleeping...")
-                save_cricket_state(state)
-                time.sleep(POLL_INTERVAL)
-                continue
+        if not targets:
+            logger.info("Cricket: No India/WPL/IPL matches live. Sleeping...")
+            save_cricket_state(state)
+            return
 
+        events = []   # (match, event_type, event_id, match_id) -> submitted once the lock is released
+        with STATE_LOCK:
             for m in targets:
                 match_id = get_match_id(m)
                 if not match_id:
@@ -449,12 +503,7 @@ def cricket_worker_loop(generate_news_image, upload_image_to_cloudinary, post_to
                 if any(x in status for x in ["won", "match ended", "result", "abandoned", "no result"]):
                     event_id = f"{match_id}_RESULT_{status}"
                     if event_id not in state["posted_events"]:
-                        ok = post_cricket_update(
-                            m, "RESULT",
-                            generate_news_image, upload_image_to_cloudinary, post_to_instagram, logger
-                        )
-                        if ok:
-                            state["posted_events"].append(event_id)
+                        events.append((m, "RESULT", event_id, None))
 
                     continue  # finished match
 
@@ -462,30 +511,43 @@ def cricket_worker_loop(generate_news_image, upload_image_to_cloudinary, post_to
                 if change_info["wicket"]:
                     event_id = f"{match_id}_WICKET_{int(time.time())//60}"  # one per minute max
                     if event_id not in state["posted_events"]:
-                        ok = post_cricket_update(
-                            m, "WICKET",
-                            generate_news_image, upload_image_to_cloudinary, post_to_instagram, logger
-                        )
-                        if ok:
-                            state["posted_events"].append(event_id)
-                            mark_match_update_time(state, match_id)
+                        events.append((m, "WICKET", event_id, match_id))
 
                 # ---- Trigger 3: Periodic Match Update ----
                 # if score changed and enough time passed
                 if change_info["changed"] and is_time_for_match_update(state, match_id):
                     event_id = f"{match_id}_MATCH_UPDATE_{int(time.time())//(MATCH_UPDATE_MINUTES*60)}"
                     if event_id not in state["posted_events"]:
-                        ok = post_cricket_update(
-                            m, "MATCH_UPDATE",
-                            generate_news_image, upload_image_to_cloudinary, post_to_instagram, logger
-                        )
-                        if ok:
-                            state["posted_events"].append(event_id)
-                            mark_match_update_time(state, match_id)
+                        events.append((m, "MATCH_UPDATE", event_id, match_id))
 
-            save_cricket_state(state)
+        for m, event_type, event_id, match_id in events:
+            handle(m, event_type, event_id, match_id)
+
+        save_cricket_state(state)
+
+    except Exception as e:
+        logger.error(f"Cricket Engine Error: {e}")
+
+
+async def cricket_loop(generate_news_image, upload_image_to_cloudinary, logger, run_blocking, submit):
+    """
+    Polls CricAPI as a task on the shared runtime.
+    Each poll runs through run_blocking (shared executor);
+    events go to the global post scheduler via `submit`.
+    """
+    import asyncio
 
-        except Exception as e:
-            logger.error(f"Cricket Engine Error: {e}")
+    if not CRICAPI_KEY:
+        logger.warning("⚠️ Cricket engine not started: CRICAPI_KEY missing")
+        return
+
+    state = await run_blocking(load_cricket_state)
 
-        time.sleep(POLL_INTERVAL)
+    logger.info("🏏 Cricket Engine Started...")
+
+    while True:
+        await run_blocking(
+            cricket_poll_once, state,
+            generate_news_image, upload_image_to_cloudinary, submit, logger
+        )
+        await asyncio.sleep(POLL_INTERVAL)
@@ -0,0 +1,179 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger("uvicorn.error")
+
+ENRICH_TOP_N = int(os.getenv("ENRICH_TOP_N", "20"))
+ENRICH_CONCURRENCY = int(os.getenv("ENRICH_CONCURRENCY", "2"))
+ENRICH_TOKEN_BUDGET = int(os.getenv("ENRICH_TOKEN_BUDGET", "20000"))   # per refresh cycle
+ENRICH_TIMEOUT_SECONDS = float(os.getenv("ENRICH_TIMEOUT_SECONDS", "90"))
+ENRICH_RETRY_SECONDS = int(os.getenv("ENRICH_RETRY_SECONDS", "300"))        # doubles per failure
+ENRICH_RETRY_MAX_SECONDS = int(os.getenv("ENRICH_RETRY_MAX_SECONDS", str(6 * 3600)))
+SHARED_NS = "enrichment"        # kv namespace: results visible to every web process
+
+# ai_rvcj_converter does not report usage -> estimate: fixed prompt + ~4 chars/token + JSON answer
+PROMPT_TOKENS = 110
+ANSWER_TOKENS = 150
+WANTED_MAX = 200
+RETRY_MAX = 2000
+
+
+def estimate_tokens(text):
+    return PROMPT_TOKENS + len(text or "") // 4 + ANSWER_TOKENS
+
+
+class Enricher:
+    """
+    ✅ AI headline / image_info / short_caption for website articles,
+    computed in the background so /news/{id} never waits on an LLM.
+
+    run(items) is started after every snapshot refresh: the top `top_n`
+    items (already ranked by trend) that have no enrichment yet are
+    converted in priority order by `concurrency` workers, until the
+    per-cycle token budget is spent. Articles someone opened before they
+    were enriched (want()) go first in the next cycle.
+
+    Only the leader runs cycles; results also go to the shared kv store
+    (`store()`), where other web processes pick them up via shared().
+    A convert() result marked "fallback" (every AI provider failed) is
+    not cached: the article is retried with exponential backoff.
+    """
+
+    def __init__(self, convert, index, executor, top_n=ENRICH_TOP_N, concurrency=ENRICH_CONCURRENCY,
+                 token_budget=ENRICH_TOKEN_BUDGET, timeout=ENRICH_TIMEOUT_SECONDS, store=None):
+        self.convert = convert
+        self.index = index
+        self.executor = executor
+        self.store = store              # () -> kv storage, resolved on first use
+        self.top_n = top_n
+        self.concurrency = concurrency
+        self.token_budget = token_budget
+        self.timeout = timeout
+        self.task = None
+        self.wanted = OrderedDict()     # id -> article, visited before enrichment
+        self.retry = OrderedDict()      # id -> (retry_at, failures)
+        self.cycles = 0
+        self.enriched = 0
+        self.failed = 0
+        self.over_budget = 0
+        self.last_cycle = {}
+
+    def want(self, article):
+        if article["id"] not in self.wanted:
+            if len(self.wanted) >= WANTED_MAX:
+                self.wanted.popitem(last=False)
+            self.wanted[article["id"]] = article
+
+    def kick(self, items):
+        """Start a cycle unless the previous one is still running (never blocks the caller)."""
+        if self.task is not None and not self.task.done():
+            return False
+        self.task = asyncio.create_task(self.run(items), name="enrichment")
+        return True
+
+    # -----------------------------
+    # shared results / retries
+    # -----------------------------
+    def shared(self, aid):
+        """Enrichment another process (the leader) stored; cached in our index."""
+        if self.store is None:
+            return None
+        try:
+            rvcj = self.store().kv_get(SHARED_NS, aid)
+        except Exception as e:
+            logger.warning(f"Enrichment lookup failed for {aid}: {e}")
+            return None
+        if rvcj is not None:
+            self.index.enrich(aid, rvcj)
+        return rvcj
+
+    def _share(self, aid, rvcj):
+        if self.store is None:
+            return
+        try:
+            self.store().kv_set(SHARED_NS, aid, rvcj)
+        except Exception as e:
+            logger.error(f"❌ Enrichment share failed for {aid}: {e}")
+
+    def _failed(self, aid):
+        _, failures = self.retry.pop(aid, (0, 0))
+        delay = min(ENRICH_RETRY_MAX_SECONDS, ENRICH_RETRY_SECONDS * 2 ** failures)
+        self.retry[aid] = (time.time() + delay, failures + 1)
+        while len(self.retry) > RETRY_MAX:
+            self.retry.popitem(last=False)
+
+    def _plan(self, candidates):
+        """Blocking (index + kv lookups) -> runs in the executor."""
+        queue, seen, budget = [], set(), self.token_budget
+        now = time.time()
+        for art in candidates:
+            if art["id"] in seen or self.index.enrichment(art["id"]):
+                continue
+            seen.add(art["id"])
+            if self.retry.get(art["id"], (0, 0))[0] > now or self.shared(art["id"]):
+                continue
+            cost = estimate_tokens(art.get("summary"))
+            if cost > budget:
+                self.over_budget += 1
+                continue
+            budget -= cost
+            queue.append(art)
+        return queue, self.token_budget - budget
+
+    def _save(self, aid, rvcj):
+        self.index.enrich(aid, rvcj)
+        self._share(aid, rvcj)
+
+    async def run(self, items):
+        loop = asyncio.get_running_loop()
+        # want() appends on the loop -> take the list here, look things up off it
+        wanted, self.wanted = list(self.wanted.values()), OrderedDict()
+        queue, tokens = await loop.run_in_executor(self.executor, self._plan, wanted + list(items[:self.top_n]))
+        if not queue:
+            return
+        t0 = time.perf_counter()
+        todo = iter(queue)
+        done = failed = 0
+
+        async def worker():
+            nonlocal done, failed
+            for art in todo:       # shared iterator -> strict priority order
+                try:
+                    fut = loop.run_in_executor(self.executor, self.convert, art.get("summary") or art["title"])
+                    rvcj = await asyncio.wait_for(fut, self.timeout)
+                    if not rvcj or rvcj.get("fallback"):
+                        raise RuntimeError("no AI provider answered")
+                    await loop.run_in_executor(self.executor, self._save, art["id"], rvcj)
+                    self.retry.pop(art["id"], None)
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self._failed(art["id"])
+                    logger.warning(f"Enrichment failed for {art['id']}: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(queue)))))
+        self.cycles += 1
+        self.enriched += done
+        self.failed += failed
+        self.last_cycle = {"planned": len(queue), "enriched": done, "failed": failed,
+                           "est_tokens": tokens, "seconds": round(time.perf_counter() - t0, 1)}
+        logger.info(f"🧠 Enriched {done}/{len(queue)} articles (~{tokens} tokens)")
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    def stats(self):
+        return {
+            "running": self.task is not None and not self.task.done(),
+            "cycles": self.cycles,
+            "enriched": self.enriched,
+            "failed": self.failed,
+            "over_budget": self.over_budget,
+            "wanted": len(self.wanted),
+            "retrying": len(self.retry),
+            "last_cycle": self.last_cycle,
+        }
@@ -1,7 +1,7 @@
 import os
-from PIL import Image, ImageDraw, ImageFont
-import requests
 from io import BytesIO
+from metrics import RENDER_STAGE_SECONDS
+from tracing import span
 
 # ================== PATHS ==================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -14,6 +14,7 @@ W, H = 1080, 1080
 
 def get_font(font_size: int, bold: bool = False):
     """Load font or fallback to default"""
+    from PIL import ImageFont
     path = FONT_BOLD_PATH if bold else FONT_REGULAR_PATH
     try:
         return ImageFont.truetype(path, font_size)
@@ -56,8 +57,9 @@ def generate_news_image(headline, info_text, image_url, output_name):
     # ---- 1) Load main image ----
     try:
         headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(image_url, headers=headers, timeout=12)
-        r.raise_for_status()
+        with RENDER_STAGE_SECONDS.labels("image_download").time(), span("image_download"):
+            r = requests.get(image_url, headers=headers, timeout=12)
+            r.raise_for_status()
 
         photo = Image.open(BytesIO(r.content)).convert("RGB")
         photo = photo.resize((W, 620), Image.Resampling.LANCZOS)
@@ -149,5 +151,6 @@ def generate_news_image(headline, info_text, image_url, output_name):
 
     # ---- Save ----
     save_path = os.path.join(OUTPUT_DIR, output_name)
-    img.save(save_path)
+    with RENDER_STAGE_SECONDS.labels("image_save").time(), span("image_save"):
+        img.save(save_path)
     return save_path
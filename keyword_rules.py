@@ -0,0 +1,174 @@
+import os
+import re
+import json
+import threading
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RULES_FILE = os.getenv("KEYWORD_RULES_FILE", os.path.join(BASE_DIR, "keyword_rules.json"))
+
+# used when keyword_rules.json is missing / broken (same as the old hard-coded lists)
+DEFAULT_RULES = {
+    "default_category": "India",
+    "categories": [
+        {"name": "Sports", "keywords": ["cricket", "ipl", "score*"]},
+        {"name": "Business", "keywords": ["market*", "sensex", "nifty"]},
+        {"name": "Tech", "keywords": ["tech*", "ai", "iphone*"]},
+    ],
+    "trend": {"base": 40, "max": 95, "weights": {"india*": 10, "court": 10, "modi": 10, "breaking": 10}},
+    "filters": {"twitter_cricket": ["india*", "wicket*", "six*", "four*", "ipl", "wpl"]},
+}
+
+
+# -----------------------------
+# REGEX TRIE
+# -----------------------------
+def _trie_pattern(words):
+    """
+    Turns ["ipl", "india", "indian"] into "i(?:pl|ndian?)" so the regex
+    engine walks a trie instead of trying every keyword at every position.
+    """
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        if "" in node and len(node) == 1:
+            return None
+        alts, optional = [], False
+        for ch in sorted(node):
+            if ch == "":
+                optional = True
+                continue
+            sub = build(node[ch])
+            alts.append(re.escape(ch) + (sub or ""))
+        if len(alts) == 1 and not optional:
+            return alts[0]
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if optional:
+            body = ("(?:" + body + ")?") if len(alts) == 1 else body + "?"
+        return body
+
+    return build(trie) or ""
+
+
+class Classification:
+    __slots__ = ("category", "trend", "keywords", "filters")
+
+    def __init__(self, category, trend, keywords, filters):
+        self.category = category
+        self.trend = trend
+        self.keywords = keywords      # set of matched rule keywords
+        self.filters = filters        # set of filter names that matched
+
+
+class KeywordRules:
+    """
+    ✅ One compiled matcher for categories, trend weights and filters.
+
+    - keyword "ai"     -> whole word only ("said" / "rail" don't match)
+    - keyword "tech*"  -> word prefix ("tech", "technology")
+    - classify(text) scans the text ONCE and answers everything
+    """
+
+    def __init__(self, rules):
+        self.default_category = rules.get("default_category", "India")
+        self.category_order = []
+        self.trend_base = int(rules.get("trend", {}).get("base", 40))
+        self.trend_max = int(rules.get("trend", {}).get("max", 95))
+
+        # keyword -> list of ("cat", name) / ("trend", weight) / ("filter", name)
+        self.actions = {}
+        for cat in rules.get("categories", []):
+            self.category_order.append(cat["name"])
+            for kw in cat.get("keywords", []):
+                self._add(kw, ("cat", cat["name"]))
+        for kw, weight in rules.get("trend", {}).get("weights", {}).items():
+            self._add(kw, ("trend", int(weight)))
+        for name, kws in rules.get("filters", {}).items():
+            for kw in kws:
+                self._add(kw, ("filter", name))
+
+        exact = [k for k in self.actions if not k.endswith("*")]
+        self.prefixes = sorted((k[:-1] for k in self.actions if k.endswith("*")), key=len, reverse=True)
+
+        parts = []
+        if exact:
+            parts.append(_trie_pattern(exact))
+        if self.prefixes:
+            parts.append("(?:" + _trie_pattern(self.prefixes) + r")\w*")
+        body = "|".join(parts) or r"(?!x)x"
+        self.regex = re.compile(r"(?<!\w)(?:" + body + r")(?!\w)")
+
+    def _add(self, kw, action):
+        kw = kw.strip().lower()
+        if kw:
+            self.actions.setdefault(kw, []).append(action)
+
+    def _lookup(self, word):
+        hits = list(self.actions.get(word, ()))
+        for p in self.prefixes:
+            if word.startswith(p):
+                hits.extend(self.actions[p + "*"])
+        return hits
+
+    def classify(self, text: str):
+        cats, filters, keywords = set(), set(), set()
+        trend = 0
+        seen = set()
+        for m in self.regex.finditer((text or "").lower()):
+            word = m.group(0)
+            if word in seen:
+                continue
+            seen.add(word)
+            for kind, val in self._lookup(word):
+                if kind == "cat":
+                    cats.add(val)
+                elif kind == "trend":
+                    trend += val
+                else:
+                    filters.add(val)
+                keywords.add(word)
+
+        category = next((c for c in self.category_order if c in cats), self.default_category)
+        return Classification(category, min(self.trend_max, self.trend_base + trend), keywords, filters)
+
+
+# -----------------------------
+# LOADING
+# -----------------------------
+_lock = threading.Lock()
+_RULES = None
+
+
+def load_rules(path=RULES_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return KeywordRules(json.load(f))
+    except Exception:
+        return KeywordRules(DEFAULT_RULES)
+
+
+def get_rules():
+    global _RULES
+    if _RULES is None:
+        with _lock:
+            if _RULES is None:
+                _RULES = load_rules()
+    return _RULES
+
+
+def reload_rules(path=RULES_FILE):
+    """Re-read the rules file; a broken file raises and the rules in use stay."""
+    global _RULES
+    with open(path, "r", encoding="utf-8") as f:
+        rules = KeywordRules(json.load(f))
+    with _lock:
+        _RULES = rules
+    return _RULES
+
+
+def classify(text: str):
+    return get_rules().classify(text)
@@ -0,0 +1,38 @@
+import threading
+
+
+class LazyClient:
+    """
+    ✅ Heavy SDK client built on first use, not at import time.
+
+    factory() runs once (double-checked lock, so two threads racing on the
+    first call still build one client). After that the object behaves like
+    the client itself: `supabase.table(...)` just works.
+    """
+
+    def __init__(self, factory, name="client"):
+        self._factory = factory
+        self._name = name
+        self._lock = threading.Lock()
+        self._value = None
+
+    def get(self):
+        value = self._value
+        if value is None:
+            with self._lock:
+                value = self._value
+                if value is None:
+                    value = self._value = self._factory()
+        return value
+
+    @property
+    def ready(self):
+        return self._value is not None
+
+    def __getattr__(self, attr):
+        # only called for names LazyClient itself does not have
+        return getattr(self.get(), attr)
+
+    def __repr__(self):
+        return f"<LazyClient {self._name} {'ready' if self.ready else 'not built'}>"
+
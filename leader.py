@@ -0,0 +1,165 @@
+import os
+import time
+import uuid
+import socket
+import asyncio
+import logging
+
+try:
+    import fcntl
+except ImportError:   # Windows dev machine
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger("uvicorn.error")
+
+LOCK_FILE = os.getenv("LEADER_LOCK_FILE", "trendscope.leader.lock")
+CHECK_SECONDS = int(os.getenv("LEADER_CHECK_SECONDS", "5"))
+
+
+# -----------------------------
+# LOCAL FILE LOCK (same machine: uvicorn workers + worker.py)
+# -----------------------------
+class FileLock:
+    """Non-blocking exclusive lock. The OS drops it when the process dies."""
+
+    def __init__(self, path=LOCK_FILE):
+        self.path = path
+        self.fd = None
+
+    def acquire(self):
+        if self.fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self.fd = fd
+        return True
+
+    def release(self):
+        if self.fd is None:
+            return
+        try:
+            if fcntl:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self.fd)
+            self.fd = None
+
+
+# -----------------------------
+# OPTIONAL SUPABASE LEASE (several machines)
+# -----------------------------
+class SupabaseLease:
+    """
+    Row in `leader_lease` (name text primary key, owner text, expires_at bigint).
+    acquire/renew = conditional update: only if expired or already ours.
+    """
+
+    def __init__(self, get_client, name="trendscope-producers", ttl_seconds=30, table="leader_lease"):
+        self.get_client = get_client
+        self.name = name
+        self.ttl = ttl_seconds
+        self.table = table
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+    def acquire(self):
+        now = int(time.time())
+        row = {"name": self.name, "owner": self.owner, "expires_at": now + self.ttl}
+        client = self.get_client()
+        try:
+            res = (client.table(self.table).update(row)
+                   .eq("name", self.name)
+                   .or_(f"expires_at.lt.{now},owner.eq.{self.owner}")
+                   .execute())
+            if res.data:
+                return True
+            # first run: no row yet -> insert (fails if someone else has it)
+            client.table(self.table).insert(row).execute()
+            return True
+        except Exception:
+            return False
+
+    def release(self):
+        try:
+            (self.get_client().table(self.table).update({"expires_at": 0})
+             .eq("name", self.name).eq("owner", self.owner).execute())
+        except Exception:
+            pass
+
+
+# -----------------------------
+# ELECTION LOOP
+# -----------------------------
+class LeaderElection:
+    """
+    ✅ Exactly one process runs the background producers.
+
+    Leader = holds the local file lock (+ the Supabase lease if enabled).
+    Followers retry every CHECK_SECONDS, so if the leader dies the lock is
+    freed by the OS (or the lease expires) and a follower takes over.
+    """
+
+    def __init__(self, lock=None, lease=None, check_seconds=CHECK_SECONDS, logger=logger):
+        self.lock = lock or FileLock()
+        self.lease = lease
+        self.check_seconds = check_seconds
+        self.logger = logger
+        self.is_leader = False
+        self.task = None
+
+    def _try_acquire(self):
+        if not self.lock.acquire():
+            return False
+        if self.lease and not self.lease.acquire():
+            self.lock.release()
+            return False
+        return True
+
+    def _still_leader(self):
+        return self.lease.acquire() if self.lease else True   # lease renew
+
+    async def run(self, on_elected, on_lost):
+        """on_elected() sync, on_lost() coroutine."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                if not self.is_leader:
+                    if await loop.run_in_executor(None, self._try_acquire):
+                        self.is_leader = True
+                        self.logger.info(f"👑 Leader elected (pid {os.getpid()}) -> starting producers")
+                        on_elected()
+                elif not await loop.run_in_executor(None, self._still_leader):
+                    self.logger.error("⚠️ Leader lease lost -> stopping producers")
+                    self.is_leader = False
+                    self.lock.release()
+                    await on_lost()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Leader election error: {e}")
+            await asyncio.sleep(self.check_seconds)
+
+    def start(self, on_elected, on_lost):
+        self.task = asyncio.get_running_loop().create_task(self.run(on_elected, on_lost))
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        if self.is_leader:
+            self.is_leader = False
+            if self.lease:
+                self.lease.release()
+            self.lock.release()
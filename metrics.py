@@ -0,0 +1,333 @@
+import time
+import bisect
+import threading
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+# seconds: fast cache / DB calls up to slow AI + Graph API calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+class _Shards:
+    """
+    Per-thread value dicts. A writer only touches its own thread's dict
+    (no lock, no contention on the hot path); the scraper copies and sums
+    all of them. Dicts of dead threads are folded into `base` on scrape
+    so short-lived pool threads do not pile up.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+        self.lock = threading.Lock()     # only for registering a new thread
+        self.owners = []                 # [(thread, dict)]
+        self.base = {}
+
+    def mine(self):
+        d = getattr(self.local, "d", None)
+        if d is None:
+            d = self.local.d = {}
+            with self.lock:
+                self.owners.append((threading.current_thread(), d))
+        return d
+
+    def snapshots(self, merge):
+        with self.lock:
+            alive = []
+            for th, d in self.owners:
+                if th.is_alive():
+                    alive.append((th, d))
+                else:
+                    merge(self.base, d.copy())
+            self.owners = alive
+            out = [self.base.copy()]
+            out += [d.copy() for _, d in alive]   # dict.copy() is atomic under the GIL
+        return out
+
+
+def _fmt_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+    body = ",".join(f'{k}="{esc(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _fmt_value(v):
+    if v == float("inf"):
+        return "+Inf"
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+# -----------------------------
+# METRIC TYPES
+# -----------------------------
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.shards = _Shards()
+        self.children = {}
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self.children.get(key)
+        if child is None:
+            child = self.children.setdefault(key, _CounterChild(self, key))
+        return child
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    @staticmethod
+    def _merge(into, d):
+        for k, v in d.items():
+            into[k] = into.get(k, 0) + v
+
+    def collect(self):
+        total = {}
+        for d in self.shards.snapshots(self._merge):
+            self._merge(total, d)
+        return total
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, v in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(v)}")
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("parent", "key")
+
+    def __init__(self, parent, key):
+        self.parent = parent
+        self.key = key
+
+    def inc(self, amount=1):
+        d = self.parent.shards.mine()
+        d[self.key] = d.get(self.key, 0) + amount
+
+
+class Histogram:
+    """Fixed buckets: observe() is a bisect + two adds on a per-thread list."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.bounds = tuple(sorted(buckets))
+        self.shards = _Shards()
+        self.children = {}
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self.children.get(key)
+        if child is None:
+            child = self.children.setdefault(key, _HistogramChild(self, key))
+        return child
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    @staticmethod
+    def _merge(into, d):
+        for k, arr in d.items():
+            cur = into.get(k)
+            if cur is None:
+                into[k] = list(arr)
+            else:
+                for i, v in enumerate(arr):
+                    cur[i] += v
+
+    def collect(self):
+        """{labels: [count per bucket..., +Inf count, sum]}"""
+        total = {}
+        for d in self.shards.snapshots(self._merge):
+            self._merge(total, {k: list(v) for k, v in d.items()})
+        return total
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, arr in sorted(self.collect().items()):
+            running = 0
+            for bound, n in zip(self.bounds + (float("inf"),), arr):
+                running += n
+                le = _fmt_labels(self.labelnames, key, [("le", _fmt_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{le} {running}")
+            lbl = _fmt_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{lbl} {round(arr[-1], 6)}")
+            lines.append(f"{self.name}_count{lbl} {running}")
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ("parent", "key")
+
+    def __init__(self, parent, key):
+        self.parent = parent
+        self.key = key
+
+    def observe(self, value):
+        p = self.parent
+        d = p.shards.mine()
+        arr = d.get(self.key)
+        if arr is None:
+            arr = d[self.key] = [0] * (len(p.bounds) + 1) + [0.0]
+        arr[bisect.bisect_left(p.bounds, value)] += 1
+        arr[-1] += value
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "t0")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.t0)
+        return False
+
+
+class GaugeFunc:
+    """
+    Value read at scrape time (queue depths etc.), nothing on the hot path.
+    fn() -> number, or {label value tuple: number}.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, fn, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            val = self.fn()
+        except Exception:
+            return lines
+        if not isinstance(val, dict):
+            val = {(): val}
+        for key, v in sorted(val.items()):
+            lines.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(float(v))}")
+        return lines
+
+
+# -----------------------------
+# REGISTRY
+# -----------------------------
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+
+    def register(self, metric):
+        with self.lock:
+            # module reloads / double imports get the existing metric back
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge_func(self, name, help_text, fn, labelnames=()):
+        with self.lock:
+            g = self.metrics[name] = GaugeFunc(name, help_text, fn, labelnames)
+        return g
+
+    def render(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for m in metrics:
+            lines += m.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# -----------------------------
+# TRENDSCOPE METRICS
+# -----------------------------
+FEED_FETCH_SECONDS = REGISTRY.histogram(
+    "trendscope_feed_fetch_seconds", "RSS / Nitter feed fetch + parse time", ["source"])
+FEED_FETCH_ERRORS = REGISTRY.counter(
+    "trendscope_feed_fetch_errors_total", "Feed fetches that failed or came back empty", ["source"])
+
+LOAD_POSTED_SECONDS = REGISTRY.histogram(
+    "trendscope_load_posted_seconds", "Time to load the posted URL set")
+
+AI_REQUEST_SECONDS = REGISTRY.histogram(
+    "trendscope_ai_request_seconds", "AI caption request time per provider", ["provider", "outcome"])
+
+RENDER_STAGE_SECONDS = REGISTRY.histogram(
+    "trendscope_render_stage_seconds", "Post render time per stage", ["stage"])
+
+CLOUDINARY_UPLOAD_SECONDS = REGISTRY.histogram(
+    "trendscope_cloudinary_upload_seconds", "Cloudinary upload time", ["outcome"])
+CLOUDINARY_UPLOAD_BYTES = REGISTRY.counter(
+    "trendscope_cloudinary_upload_bytes_total", "Bytes sent to Cloudinary")
+
+GRAPH_API_SECONDS = REGISTRY.histogram(
+    "trendscope_graph_api_seconds", "Instagram Graph API call time", ["step"])
+GRAPH_API_ERRORS = REGISTRY.counter(
+    "trendscope_graph_api_errors_total", "Instagram Graph API errors by code", ["step", "code"])
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "trendscope_cache_requests_total", "Cache lookups by result (hit / miss)", ["cache", "result"])
+
+
+class _OutcomeTimer:
+    """with track(AI_REQUEST_SECONDS, "groq"): ... -> outcome="ok" / "error"."""
+
+    __slots__ = ("hist", "labels", "t0")
+
+    def __init__(self, hist, labels):
+        self.hist = hist
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        outcome = "error" if exc_type else "ok"
+        self.hist.labels(*self.labels, outcome).observe(time.perf_counter() - self.t0)
+        return False
+
+
+def track(hist, *labels):
+    return _OutcomeTimer(hist, labels)
+
+
+def cache_hit(cache, hit):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def render():
+    return REGISTRY.render()
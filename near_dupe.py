@@ -0,0 +1,201 @@
+import re
+import time
+import random
+import hashlib
+import threading
+import itertools
+
+# -----------------------------
+# TEXT NORMALIZATION
+# -----------------------------
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "at", "to", "for", "by", "with", "from", "and", "or",
+    "is", "are", "was", "were", "be", "been", "it", "its", "as", "this", "that", "after",
+    "over", "into", "about", "amid", "says", "said", "will", "has", "have", "had", "live",
+    "updates", "update", "news", "breaking", "latest", "today", "video", "watch",
+}
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_URL_RE = re.compile(r"https?://\S+")
+_WORD_RE = re.compile(r"[a-z0-9\u0900-\u0c7f]+")   # latin + Hindi..Telugu scripts
+
+
+def normalize_tokens(text: str):
+    text = _URL_RE.sub(" ", _TAG_RE.sub(" ", (text or "").lower()))
+    return [w for w in _WORD_RE.findall(text) if w not in STOPWORDS and len(w) > 1]
+
+
+def _h64(token: str):
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+NUM_PERM = 64
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)   # fixed seed: signatures must be stable across restarts
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def story_tokens(title: str, summary: str = ""):
+    """Title words carry the story; summary only helps when the title is tiny (e.g. tweets)."""
+    toks = normalize_tokens(title)
+    if len(toks) < 4:
+        toks += normalize_tokens(summary)[:40]
+    return set(toks[:60])
+
+
+def minhash(tokens):
+    """MinHash signature (NUM_PERM ints) of a token set, or None if empty."""
+    if not tokens:
+        return None
+    hashes = [_h64(t) for t in tokens]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / float(NUM_PERM)
+
+
+# -----------------------------
+# LSH INDEX OVER A SLIDING WINDOW
+# -----------------------------
+class StoryIndex:
+    """
+    ✅ Groups near-duplicate stories (same story from Google News, NDTV,
+    TOI, Telegram, Nitter...) into clusters, so only one copy is sent to
+    AI / rendering / Instagram.
+
+    - MinHash signature per item (normalized title / text words)
+    - signature split into `bands` bands of `rows`; items only get compared
+      with clusters sharing a whole band (LSH), never with the full window
+    - same story = estimated Jaccard >= `threshold`
+    - clusters expire after `window_seconds` of silence
+    """
+
+    def __init__(self, threshold=0.5, bands=16, window_seconds=6 * 3600):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self.window_seconds = window_seconds
+
+        self.lock = threading.Lock()
+        self.clusters = {}                                  # cid -> cluster dict
+        self.tables = [dict() for _ in range(self.bands)]   # band value -> set(cid)
+        self._ids = itertools.count(1)
+
+    def _band_values(self, sig):
+        r = self.rows
+        return [hash(sig[i * r:(i + 1) * r]) for i in range(self.bands)]
+
+    def _expire(self, now):
+        cutoff = now - self.window_seconds
+        for cid in [c for c, cl in self.clusters.items() if cl["last_seen"] < cutoff]:
+            cl = self.clusters.pop(cid)
+            for i, bv in enumerate(self._band_values(cl["sig"])):
+                bucket = self.tables[i].get(bv)
+                if bucket:
+                    bucket.discard(cid)
+                    if not bucket:
+                        del self.tables[i][bv]
+
+    def _find(self, sig):
+        best, best_sim = None, self.threshold
+        seen = set()
+        for i, bv in enumerate(self._band_values(sig)):
+            for cid in self.tables[i].get(bv, ()):
+                if cid in seen:
+                    continue
+                seen.add(cid)
+                sim = similarity(sig, self.clusters[cid]["sig"])
+                if sim >= best_sim:
+                    best, best_sim = cid, sim
+        return best
+
+    def assign(self, title: str, summary: str = "", source: str = ""):
+        """Returns the cluster id for this item (creates a new cluster if needed)."""
+        sig = minhash(story_tokens(title, summary)) or minhash({title or summary or str(time.time())})
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+
+            cid = self._find(sig)
+            if cid is None:
+                cid = next(self._ids)
+                self.clusters[cid] = {
+                    "sig": sig, "size": 0, "sources": set(),
+                    "admitted": False, "first_seen": now, "last_seen": now,
+                }
+                for i, bv in enumerate(self._band_values(sig)):
+                    self.tables[i].setdefault(bv, set()).add(cid)
+
+            cl = self.clusters[cid]
+            cl["size"] += 1
+            cl["last_seen"] = now
+            if source:
+                cl["sources"].add(source)
+            return cid
+
+    # -----------------------------
+    # pipeline gate
+    # -----------------------------
+    def is_admitted(self, cid):
+        with self.lock:
+            cl = self.clusters.get(cid)
+            return bool(cl and cl["admitted"])
+
+    def admit(self, cid):
+        """Mark the cluster as taken by the pipeline. False if someone already took it."""
+        with self.lock:
+            cl = self.clusters.get(cid)
+            if cl is None or cl["admitted"]:
+                return False
+            cl["admitted"] = True
+            return True
+
+    def release(self, cid):
+        """Processing failed -> let another member of the cluster try later."""
+        with self.lock:
+            cl = self.clusters.get(cid)
+            if cl:
+                cl["admitted"] = False
+
+    def select_best(self, items, quality=None):
+        """
+        Batch mode: cluster `items` (dicts with title/summary/link) and return
+        one best representative per cluster whose story has not been admitted yet.
+        Sets item["cluster"] on every item.
+        """
+        quality = quality or default_quality
+        best = {}
+        for it in items:
+            cid = self.assign(it.get("title", ""), it.get("summary", ""), it.get("source") or it.get("link", ""))
+            it["cluster"] = cid
+            if self.is_admitted(cid):
+                continue
+            if cid not in best or quality(it) > quality(best[cid]):
+                best[cid] = it
+        chosen = set(id(it) for it in best.values())
+        # keep the caller's ordering
+        return [it for it in items if id(it) in chosen]
+
+    def should_process(self, text: str, source: str = ""):
+        """Streaming mode: (cluster id, True) only for the first copy of a story."""
+        cid = self.assign(text, "", source)
+        return cid, self.admit(cid)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "clusters": len(self.clusters),
+                "multi_source_clusters": sum(1 for c in self.clusters.values() if c["size"] > 1),
+                "admitted": sum(1 for c in self.clusters.values() if c["admitted"]),
+            }
+
+
+def default_quality(item):
+    """Prefer high trend, real images and richer summaries."""
+    score = float(item.get("trend") or 0)
+    if item.get("image") and "unsplash.com" not in item.get("image", ""):
+        score += 5
+    score += min(len(item.get("summary") or ""), 600) / 100.0
+    return score
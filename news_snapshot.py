@@ -0,0 +1,91 @@
+import time
+import asyncio
+import logging
+
+from metrics import FEED_FETCH_SECONDS, FEED_FETCH_ERRORS
+from feed_stream import fetch_feed_async
+
+logger = logging.getLogger("uvicorn.error")
+
+FEED_CONCURRENCY = 6
+FEED_TIMEOUT_SECONDS = 15
+
+
+class SnapshotState:
+    """One immutable version of what the website shows."""
+
+    __slots__ = ("version", "items", "by_category", "updated_at")
+
+    def __init__(self, version, items, updated_at):
+        self.version = version
+        self.items = tuple(sorted(items, key=lambda x: x["trend"], reverse=True))
+        by_category = {}
+        for n in self.items:
+            by_category.setdefault(n["category"], []).append(n)
+        self.by_category = {k: tuple(v) for k, v in by_category.items()}
+        self.updated_at = updated_at
+
+
+class NewsSnapshot:
+    """
+    ✅ In-memory news for the web handlers.
+
+    A background task fetches + scores feeds and calls replace(); handlers
+    only read `state` (a single attribute swap, so a reader never sees
+    half of an update and never waits on a feed).
+    """
+
+    def __init__(self):
+        self.state = SnapshotState(0, [], 0)
+        self.last_error = None
+        self.refreshes = 0
+
+    def replace(self, items):
+        if not items and self.state.items:
+            # every feed failed -> keep serving the previous version
+            self.last_error = "empty refresh, kept previous snapshot"
+            return self.state
+        self.state = SnapshotState(self.state.version + 1, items, time.time())
+        self.last_error = None
+        self.refreshes += 1
+        return self.state
+
+    def get(self, category=None):
+        st = self.state
+        if category:
+            return st.by_category.get(category, ())
+        return st.items
+
+    def stats(self):
+        st = self.state
+        return {
+            "version": st.version,
+            "items": len(st.items),
+            "age_seconds": int(time.time() - st.updated_at) if st.updated_at else None,
+            "refreshes": self.refreshes,
+            "last_error": self.last_error,
+        }
+
+
+async def fetch_feed_entries(client, sources, max_entries, concurrency=FEED_CONCURRENCY,
+                             timeout=FEED_TIMEOUT_SECONDS, label="rss"):
+    """
+    {name: url} -> {name: [entries] or None}, all feeds at once over one
+    async HTTP client, at most `concurrency` requests in flight. Each feed
+    is parsed while it streams in and dropped after `max_entries` entries.
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(name, url):
+        async with sem:
+            try:
+                with FEED_FETCH_SECONDS.labels(f"{label}:{name}").time():
+                    feed = await fetch_feed_async(client, url, max_entries, timeout=timeout)
+                return name, feed.entries
+            except Exception as e:
+                FEED_FETCH_ERRORS.labels(f"{label}:{name}").inc()
+                logger.warning(f"Feed fetch failed: {name} ({e})")
+                return name, None
+
+    results = await asyncio.gather(*(one(n, u) for n, u in sources.items()))
+    return dict(results)
@@ -0,0 +1,130 @@
+import os
+import gzip
+import hashlib
+import threading
+
+from fastapi import Response
+
+try:
+    import brotli          # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+CACHE_CONTROL = os.getenv(
+    "HOME_CACHE_CONTROL", "public, max-age=60, stale-while-revalidate=300, stale-if-error=3600"
+)
+
+
+class RenderedPage:
+    """One HTML variant, encoded once: identity / gzip / (brotli)."""
+
+    __slots__ = ("hash", "identity", "gzip", "br")
+
+    def __init__(self, html):
+        self.identity = html.encode("utf-8")
+        self.gzip = gzip.compress(self.identity, compresslevel=9, mtime=0)
+        self.br = brotli.compress(self.identity, quality=11) if brotli else None
+        # strong validator from the bytes -> same content = same ETag in every process
+        self.hash = hashlib.blake2b(self.identity, digest_size=12).hexdigest()
+
+    def etag(self, coding=""):
+        # strong ETags must differ per Content-Encoding
+        return f'"{self.hash}-{coding}"' if coding else f'"{self.hash}"'
+
+    def etags(self):
+        return {self.etag(), self.etag("gzip"), self.etag("br")}
+
+
+class PageCache:
+    """
+    ✅ home() variants rendered once per snapshot version.
+
+    render(items, category) -> html. Pages for the current snapshot version
+    are kept; a new version drops the old ones. Unknown ?category= values
+    share one key, so random query strings cannot grow the cache.
+    """
+
+    def __init__(self, render, categories=()):
+        self.render = render
+        self.categories = set(categories)
+        self.lock = threading.Lock()
+        self.version = None
+        self.pages = {}
+        self.renders = 0
+
+    def _key(self, state, category):
+        if not category:
+            return ""
+        if category in state.by_category or category in self.categories:
+            return category
+        return "?"
+
+    def get(self, state, category=None):
+        key = self._key(state, category)
+        with self.lock:
+            if self.version == state.version:
+                page = self.pages.get(key)
+                if page is not None:
+                    return page
+
+        items = state.by_category.get(key, ()) if key else state.items
+        page = RenderedPage(self.render(items, key if key != "?" else category))
+        with self.lock:
+            if self.version != state.version:
+                if self.version is not None and state.version < self.version:
+                    return page        # a late reader of an old state: serve, don't cache
+                self.version = state.version
+                self.pages = {}
+            self.pages[key] = page
+            self.renders += 1
+        return page
+
+    def prerender(self, state):
+        """Called by the snapshot refresher (executor) so visitors never pay for rendering."""
+        for category in [None] + sorted(set(state.by_category) | self.categories):
+            self.get(state, category)
+
+    def stats(self):
+        with self.lock:
+            return {"version": self.version, "variants": len(self.pages), "renders": self.renders,
+                    "brotli": brotli is not None}
+
+
+def _accepts(header, coding):
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() != coding:
+            continue
+        q = params.replace(" ", "").partition("q=")[2]
+        try:
+            return float(q) > 0 if q else True
+        except ValueError:
+            return True
+    return False
+
+
+def page_response(page, request, status_code=200):
+    """304 on a matching If-None-Match, else the best pre-compressed body."""
+    accept = request.headers.get("accept-encoding", "")
+    if page.br is not None and _accepts(accept, "br"):
+        coding, body = "br", page.br
+    elif _accepts(accept, "gzip"):
+        coding, body = "gzip", page.gzip
+    else:
+        coding, body = "", page.identity
+
+    headers = {
+        "ETag": page.etag(coding),
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    inm = request.headers.get("if-none-match", "")
+    if inm:
+        tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+        if "*" in tags or tags & page.etags():
+            return Response(status_code=304, headers=headers)
+
+    if coding:
+        headers["Content-Encoding"] = coding
+    return Response(content=body, status_code=status_code, media_type="text/html; charset=utf-8",
+                    headers=headers)
@@ -1,18 +1,243 @@
-import time, json, os
+import time, json, os, atexit, asyncio, logging, threading
+
+from lazy import LazyClient
+from storage import local_storage
+
+logger = logging.getLogger("uvicorn.error")
 
 LIMIT_FILE = "post_limit.json"
+COOLDOWN_FILE = "ig_cooldown.json"
 MIN_GAP_SECONDS = 15 * 60   # 15 mins gap globally
+BURST = 1                   # max posts that can go out back to back
+FLUSH_SECONDS = 5           # write-behind interval
 
-def can_post_now():
-    if not os.path.exists(LIMIT_FILE):
-        return True
 
+def _load(path, default):
+    if not os.path.exists(path):
+        return dict(default)
     try:
-        data = json.load(open(LIMIT_FILE, "r"))
-        last = int(data.get("last_post_time", 0))
-        return (int(time.time()) - last) >= MIN_GAP_SECONDS
+        with open(path, "r") as f:
+            return json.load(f)
     except:
-        return True
+        return dict(default)
+
+
+def _save(path, data):
+    try:
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except:
+        pass
+
+
+class PostLimiter:
+    """
+    ✅ ONE limiter for every producer (RSS, cricket, Telegram, Twitter)
+
+    - token bucket: 1 token per MIN_GAP_SECONDS, max BURST
+    - IG action-block cooldown deadline
+    - all state in memory behind a lock (no file read per check)
+    - write-behind: a daemon thread saves changes every FLUSH_SECONDS
+      (and on close() / at exit) so restarts keep the limits
+    - wait_for_slot_async(): sleep exactly until the next permitted post
+    """
+
+    def __init__(self, limit_file=LIMIT_FILE, cooldown_file=COOLDOWN_FILE,
+                 min_gap_seconds=MIN_GAP_SECONDS, burst=BURST, flush_seconds=FLUSH_SECONDS, store=None):
+        self.limit_file = limit_file
+        self.cooldown_file = cooldown_file
+        self.store = store          # kv storage: the only copy; JSON files are read once (migration)
+        self.min_gap = min_gap_seconds
+        self.burst = burst
+        self.flush_seconds = flush_seconds
+
+        self.cond = threading.Condition(threading.RLock())
+        self.dirty = False
+        self.writer = None
+        self.stopped = threading.Event()
+
+        now = time.time()
+        data = self._load("limit", limit_file, {})
+        if "tokens" in data:
+            elapsed = max(0, now - data.get("updated", now))
+            self.tokens = min(burst, data["tokens"] + elapsed / self.min_gap)
+        else:
+            # old format: {"last_post_time": ts}
+            last = int(data.get("last_post_time", 0))
+            self.tokens = max(0.0, min(burst, (now - last) / self.min_gap))
+        self.updated = now
+        self.last_post_time = int(data.get("last_post_time", 0))
+        self.blocked_until = int(
+            self._load("cooldown", cooldown_file, {"blocked_until": 0}).get("blocked_until", 0)
+        )
+
+    def _load(self, key, path, default):
+        if self.store is not None:
+            data = self.store.kv_get("post_limiter", key)
+            if data is not None:
+                return data
+        return _load(path, default)
+
+    # -----------------------------
+    # internal (call with lock held)
+    # -----------------------------
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + max(0, now - self.updated) / self.min_gap)
+        self.updated = now
+
+    def _changed(self):
+        self.dirty = True
+        if self.writer is None and not self.stopped.is_set():
+            self.writer = threading.Thread(target=self._write_behind, name="limiter-writer", daemon=True)
+            self.writer.start()
+
+    # -----------------------------
+    # API
+    # -----------------------------
+    def cooldown_remaining(self):
+        """Seconds left on the IG action-block cooldown (0 if none)."""
+        with self.cond:
+            return max(0, self.blocked_until - int(time.time()))
+
+    def set_cooldown(self, seconds):
+        with self.cond:
+            self.blocked_until = int(time.time()) + int(seconds)
+            self._changed()
+
+    def seconds_until_slot(self):
+        """0 if a post may go out now, else seconds until the next slot."""
+        with self.cond:
+            now = time.time()
+            self._refill(now)
+            wait = 0 if self.tokens >= 1 else (1 - self.tokens) * self.min_gap
+            return max(wait, self.blocked_until - now, 0)
+
+    def can_post_now(self):
+        return self.seconds_until_slot() <= 0
+
+    def try_acquire(self):
+        """Take a slot (token). False if none available or IG cooldown active."""
+        with self.cond:
+            now = time.time()
+            if now < self.blocked_until:
+                return False
+            self._refill(now)
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            self.last_post_time = int(now)
+            self._changed()
+            return True
+
+    def refund(self):
+        """Give the slot back (nothing reached Instagram)."""
+        with self.cond:
+            self._refill(time.time())
+            self.tokens = min(self.burst, self.tokens + 1)
+            self._changed()
+
+    def mark_posted_now(self):
+        # for callers that did not try_acquire() first
+        with self.cond:
+            now = time.time()
+            self._refill(now)
+            self.tokens = max(0.0, self.tokens - 1)
+            self.last_post_time = int(now)
+            self._changed()
+
+    async def wait_for_slot_async(self, timeout=None):
+        """Event-loop friendly version: sleeps until the computed slot time."""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            wait = self.seconds_until_slot()
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                left = deadline - time.time()
+                if left <= 0:
+                    return False
+                wait = min(wait, left)
+            await asyncio.sleep(wait)
+
+    # -----------------------------
+    # persistence
+    # -----------------------------
+    def flush(self):
+        with self.cond:
+            if not self.dirty:
+                return
+            limit = {"tokens": self.tokens, "updated": self.updated, "last_post_time": self.last_post_time}
+            cooldown = {"blocked_until": self.blocked_until}
+            self.dirty = False
+        if self.store is not None:
+            try:
+                self.store.kv_set_many("post_limiter", {"limit": limit, "cooldown": cooldown})
+            except Exception as e:
+                logger.error(f"❌ Post limiter state not saved (retrying): {e}")
+                with self.cond:
+                    self.dirty = True
+            return
+        _save(self.limit_file, limit)
+        _save(self.cooldown_file, cooldown)
+
+    def _write_behind(self):
+        while not self.stopped.wait(self.flush_seconds):
+            self.flush()
+
+    def close(self, timeout=5):
+        """Stop the write-behind thread and save what it had not saved yet."""
+        self.stopped.set()
+        writer = self.writer
+        if writer is not None:
+            writer.join(timeout)
+        self.flush()
+
+    def stats(self):
+        with self.cond:
+            self._refill(time.time())
+            return {
+                "tokens": round(self.tokens, 3),
+                "last_post_time": self.last_post_time,
+                "blocked_until": self.blocked_until,
+            }
+
+
+# built on first use: importing this module must not open the SQLite store
+LIMITER = LazyClient(lambda: PostLimiter(store=local_storage()), "post_limiter")
+
+
+@atexit.register
+def close():
+    """Shutdown hook (lifespan / worker, and at exit): final flush if the limiter was used."""
+    if LIMITER.ready:
+        LIMITER.close()
+
+
+# -----------------------------
+# module-level API (old callers)
+# -----------------------------
+def can_post_now():
+    return LIMITER.can_post_now()
 
 def mark_posted_now():
-    json.dump({"last_post_time": int(time.time())}, open(LIMIT_FILE, "w"))
+    LIMITER.mark_posted_now()
+
+def seconds_until_slot():
+    return LIMITER.seconds_until_slot()
+
+def try_acquire():
+    return LIMITER.try_acquire()
+
+def refund():
+    LIMITER.refund()
+
+def cooldown_remaining():
+    return LIMITER.cooldown_remaining()
+
+def set_cooldown(seconds):
+    LIMITER.set_cooldown(seconds)
+
+async def wait_for_slot_async(timeout=None):
+    return await LIMITER.wait_for_slot_async(timeout)
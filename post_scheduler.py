@@ -0,0 +1,213 @@
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+
+from tracing import activate, span
+logger = logging.getLogger("uvicorn.error")
+
+
+class Candidate:
+    """
+    One possible Instagram post from any producer.
+
+    prepare()    -> {"image_url": ..., "caption": ...} or None
+                    (AI + render + upload; only runs for the winner)
+    on_done(ok)  -> called once: posted / failed / expired
+    trace        -> tracing.Trace of this item (optional)
+    """
+
+    def __init__(self, key, score, source, prepare, on_done=None, ttl_seconds=3600, trace=None):
+        self.key = key
+        self.score = float(score)
+        self.source = source
+        self.prepare = prepare
+        self.on_done = on_done
+        self.created_at = time.time()
+        self.expires_at = self.created_at + ttl_seconds
+        self.trace = trace
+
+    def finish(self, ok, status=None):
+        if self.trace:
+            self.trace.finish(status or ("posted" if ok else "dropped"))
+        if self.on_done:
+            try:
+                self.on_done(ok)
+            except Exception as e:
+                logger.error(f"❌ Candidate on_done error ({self.key}): {e}")
+
+
+class PostScheduler:
+    """
+    ✅ Global post-slot scheduler.
+
+    All producers submit() scored candidates. When the limiter opens a
+    slot, the highest-score candidate that has not expired is prepared
+    and published. Nobody races for the slot and nobody renders a post
+    that will not go out.
+    """
+
+    def __init__(self, limiter, publish, logger=logger, max_pending=200):
+        self.limiter = limiter          # post_limiter: wait_for_slot_async, try_acquire, refund
+        self.publish = publish          # publish(image_url, caption) -> IG response dict
+        self.logger = logger
+        self.max_pending = max_pending
+
+        self.lock = threading.Lock()
+        self.heap = []                  # (-score, seq, key)
+        self.by_key = {}                # key -> Candidate
+        self.inflight = set()           # keys popped and being prepared / published
+        self.seq = itertools.count()
+        self.posted = 0
+        self.failed = 0
+        self.expired = 0
+        self.last_post = None
+
+    # -----------------------------
+    # producers
+    # -----------------------------
+    def submit(self, cand: Candidate):
+        """
+        False if the same key is already pending with a higher score, is
+        being posted right now (until its on_done ran), or the queue is full.
+        """
+        with self.lock:
+            if cand.key in self.inflight:
+                return False
+            old = self.by_key.get(cand.key)
+            if old is not None and old.score >= cand.score:
+                return False
+            if old is None and len(self.by_key) >= self.max_pending:
+                worst = min(self.by_key.values(), key=lambda c: c.score)
+                if worst.score >= cand.score:
+                    return False
+                self.by_key.pop(worst.key)
+                dropped = worst
+            else:
+                dropped = None
+            if old is not None and old.trace is cand.trace:
+                old.trace = None            # same trace carries on with the new candidate
+            self.by_key[cand.key] = cand
+            heapq.heappush(self.heap, (-cand.score, next(self.seq), cand.key))
+
+        if old is not None:
+            old.finish(False, "replaced")   # its producer hears about it (cricket state, clusters)
+        if dropped:
+            self.expired += 1
+            dropped.finish(False, "evicted")
+        return True
+
+    # -----------------------------
+    # consumer
+    # -----------------------------
+    def _pop_best(self):
+        expired = []
+        best = None
+        now = time.time()
+        with self.lock:
+            while self.heap:
+                neg, _, key = heapq.heappop(self.heap)
+                cand = self.by_key.get(key)
+                if cand is None or -neg != cand.score:
+                    continue   # stale heap entry (replaced / dropped)
+                del self.by_key[key]
+                if cand.expires_at <= now:
+                    expired.append(cand)
+                    continue
+                best = cand
+                self.inflight.add(key)
+                break
+        for c in expired:
+            self.expired += 1
+            c.finish(False, "expired")
+        return best
+
+    def _release(self, cand: Candidate):
+        with self.lock:
+            self.inflight.discard(cand.key)
+
+    def post_one(self, cand: Candidate):
+        """Blocking: prepare + publish one candidate (slot already acquired)."""
+        try:
+            return self._post_one(cand)
+        finally:
+            # after on_done: producers see the post before the key is accepted again
+            self._release(cand)
+
+    def _post_one(self, cand: Candidate):
+        self.logger.info(f"🎯 Slot winner: {cand.source} score={cand.score:.0f} key={cand.key[:80]}")
+        if cand.trace:
+            cand.trace.add_span("queued", cand.created_at, time.time(), score=round(cand.score, 1))
+
+        with activate(cand.trace):
+            try:
+                with span("prepare"):
+                    assets = cand.prepare()
+            except Exception as e:
+                self.logger.error(f"❌ Prepare failed ({cand.key}): {e}")
+                assets = None
+
+            if not assets:
+                self.limiter.refund()
+                self.failed += 1
+                cand.finish(False, "prepare_failed")
+                return False
+
+            try:
+                with span("publish"):
+                    res = self.publish(assets["image_url"], assets["caption"])
+            except Exception as e:
+                # may have reached Graph -> the slot stays used
+                self.logger.error(f"❌ Publish raised ({cand.key}): {e}")
+                res = None
+        ok = bool(res and isinstance(res, dict) and "id" in res)
+        if ok:
+            self.posted += 1
+            self.last_post = {"key": cand.key, "source": cand.source, "at": int(time.time())}
+            self.logger.info(f"✅ Scheduled post done: {cand.source}")
+        else:
+            self.failed += 1
+            self.logger.error(f"❌ Scheduled post failed: {res}")
+            if isinstance(res, dict) and not res.get("creation_id"):
+                self.limiter.refund()       # no media container was created -> nothing went out
+        cand.finish(ok, None if ok else "publish_failed")
+        return ok
+
+    async def run(self, run_blocking, idle_seconds=5):
+        """Supervised task: wait for slot -> pick best -> post."""
+        self.logger.info("🗓️ Post scheduler started")
+        while True:
+            # sleeps exactly until the next permitted post (re-checks after)
+            await self.limiter.wait_for_slot_async()
+
+            cand = await run_blocking(self._pop_best)
+            if cand is None:
+                await asyncio.sleep(idle_seconds)
+                continue
+
+            if not self.limiter.try_acquire():
+                self._release(cand)
+                self.submit(cand)   # slot vanished (cooldown) -> put it back
+                continue
+
+            await run_blocking(self.post_one, cand)
+
+    def stats(self):
+        with self.lock:
+            pending = sorted(self.by_key.values(), key=lambda c: c.score, reverse=True)
+            top = [{"key": c.key[:120], "source": c.source, "score": round(c.score, 1),
+                    "expires_in": int(c.expires_at - time.time())} for c in pending[:10]]
+            depth = len(pending)
+            inflight = len(self.inflight)
+        return {
+            "pending": depth,
+            "inflight": inflight,
+            "posted": self.posted,
+            "failed": self.failed,
+            "expired": self.expired,
+            "next_slot_in": int(self.limiter.seconds_until_slot()),
+            "last_post": self.last_post,
+            "top": top,
+        }
@@ -0,0 +1,241 @@
+import os
+import re
+import glob
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+
+from leader import FileLock
+
+logger = logging.getLogger("uvicorn.error")
+
+JOURNAL_FILE = os.getenv("POSTED_JOURNAL_FILE", "posted_journal.log")
+FLUSH_SECONDS = float(os.getenv("POSTED_FLUSH_SECONDS", "5"))
+BATCH_SIZE = int(os.getenv("POSTED_BATCH_SIZE", "50"))
+MAX_BACKOFF_SECONDS = 300
+_OWNER_RE = re.compile(r"\d+(-[0-9a-f]{8})?")     # <pid> or <pid>-<random>
+
+
+class PostedJournal:
+    """
+    ✅ Write-behind journal for posted URLs.
+
+    - append(): one line in a local append-only log (fsync'd), then return;
+      the posting thread never waits on Supabase
+    - a daemon thread upserts pending URLs in batches every `flush_seconds`
+      (or as soon as `batch_size` are waiting)
+    - failures are retried with exponential backoff + jitter; nothing is
+      dropped, the log only loses lines after the remote write succeeded
+    - at startup the log is replayed, so URLs that never reached Supabase
+      (crash, outage) are still known locally and get flushed
+    - one log per process (`<name>.<pid>.log`, held by a file lock), so
+      uvicorn workers and worker.py never compact each other's appends;
+      logs whose lock is free (dead process) are adopted at startup
+
+    write_batch(urls) must be idempotent (upsert), since a crash between
+    the remote write and the log compaction replays the same URLs.
+    """
+
+    def __init__(self, write_batch, path=JOURNAL_FILE, flush_seconds=FLUSH_SECONDS,
+                 batch_size=BATCH_SIZE, max_backoff=MAX_BACKOFF_SECONDS, fsync=True):
+        self.write_batch = write_batch
+        self.base_path = path
+        root, ext = os.path.splitext(path)
+        self.path = f"{root}.{os.getpid()}{ext}"
+        self.lock = FileLock(self.path + ".lock")
+        # same pid as a dead owner (containers) -> free again; a live one
+        # (pid 1 in two containers on one volume) -> a name of our own
+        while not self.lock.acquire():
+            self.path = f"{root}.{os.getpid()}-{uuid.uuid4().hex[:8]}{ext}"
+            self.lock = FileLock(self.path + ".lock")
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.fsync = fsync
+
+        self.cond = threading.Condition()
+        self.pending = []          # URLs not yet confirmed by the remote store, oldest first
+        self.failures = 0
+        self.retry_at = 0.0
+        self.flushed = 0
+        self.last_error = None
+        self.writer = None
+        self.replay()
+
+    # -----------------------------
+    # local log
+    # -----------------------------
+    @staticmethod
+    def _read(path):
+        urls = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        urls.append(json.loads(line)["url"])
+                    except Exception:
+                        continue   # torn last line after a crash
+        except FileNotFoundError:
+            pass
+        return urls
+
+    def _orphans(self):
+        """Logs of processes that are gone (their lock is free), incl. the old shared log."""
+        root, ext = os.path.splitext(self.base_path)
+        for path in [self.base_path] + glob.glob(glob.escape(root) + ".*" + ext):
+            middle = path[len(root) + 1:len(path) - len(ext)]
+            if path == self.path or not os.path.exists(path) or (path != self.base_path
+                                                                  and not _OWNER_RE.fullmatch(middle)):
+                continue
+            lock = FileLock(path + ".lock")
+            if lock.acquire():
+                yield path, lock
+
+    def replay(self):
+        seen = set()
+        for url in self._read(self.path):
+            if url not in seen:
+                seen.add(url)
+                self.pending.append(url)
+        adopted = []
+        for path, lock in self._orphans():
+            for url in self._read(path):
+                if url not in seen:
+                    seen.add(url)
+                    self.pending.append(url)
+            adopted.append((path, lock))
+        if adopted:
+            # their URLs are in our log before theirs disappear
+            self._compact()
+            for path, lock in adopted:
+                for p in (path, path + ".lock"):
+                    try:
+                        os.remove(p)
+                    except OSError:
+                        pass
+                lock.release()
+        if self.pending:
+            logger.info(f"📒 Posted journal: replaying {len(self.pending)} unsynced URLs")
+            self._start()
+
+    def _compact(self):
+        """Rewrite the log with only the still-pending URLs (lock held)."""
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for url in self.pending:
+                f.write(json.dumps({"url": url}) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    # -----------------------------
+    # API
+    # -----------------------------
+    def append(self, url):
+        line = json.dumps({"url": url, "ts": int(time.time())}) + "\n"
+        with self.cond:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self.pending.append(url)
+            if len(self.pending) >= self.batch_size:
+                self.cond.notify_all()
+        self._start()
+
+    def pending_urls(self):
+        with self.cond:
+            return set(self.pending)
+
+    def flush(self):
+        """One batch to the remote store. True if nothing is left pending."""
+        with self.cond:
+            if not self.pending:
+                return True
+            if time.time() < self.retry_at:
+                return False
+            batch = self.pending[:self.batch_size]
+
+        try:
+            self.write_batch(batch)
+        except Exception as e:
+            with self.cond:
+                self.failures += 1
+                delay = min(self.max_backoff, self.flush_seconds * 2 ** self.failures)
+                self.retry_at = time.time() + delay * random.uniform(0.5, 1.0)
+                self.last_error = str(e)[:300]
+            logger.error(f"❌ Posted journal flush failed ({len(batch)} URLs, retry in {delay:.0f}s): {e}")
+            return False
+
+        with self.cond:
+            # appends only go to the end -> the batch is still the head
+            del self.pending[:len(batch)]
+            self.failures = 0
+            self.retry_at = 0.0
+            self.flushed += len(batch)
+            self.last_error = None
+            try:
+                self._compact()
+            except Exception as e:
+                logger.error(f"❌ Posted journal compaction failed: {e}")
+            return not self.pending
+
+    def close(self, timeout=10):
+        """Best-effort final flush (at exit). An empty log is removed with its lock."""
+        deadline = time.time() + timeout
+        with self.cond:
+            self.retry_at = 0.0
+        while time.time() < deadline:
+            if self.flush():
+                self._remove()
+                return True
+            with self.cond:
+                if self.retry_at:
+                    return False
+        return False
+
+    def _remove(self):
+        with self.cond:
+            if self.pending:
+                return
+            for p in (self.path, self.path + ".lock"):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            self.lock.release()
+
+    def _start(self):
+        if self.writer is None:
+            with self.cond:
+                if self.writer is None:
+                    self.writer = threading.Thread(target=self._write_behind, name="posted-journal",
+                                                   daemon=True)
+                    self.writer.start()
+
+    def _write_behind(self):
+        while True:
+            with self.cond:
+                if len(self.pending) < self.batch_size:
+                    self.cond.wait(self.flush_seconds)
+            while not self.flush():
+                with self.cond:
+                    wait = self.retry_at - time.time()
+                if wait > 0:
+                    time.sleep(wait)
+
+    def stats(self):
+        with self.cond:
+            return {
+                "path": self.path,
+                "pending": len(self.pending),
+                "flushed": self.flushed,
+                "failures": self.failures,
+                "retry_in": max(0, round(self.retry_at - time.time(), 1)) if self.retry_at else 0,
+                "last_error": self.last_error,
+            }
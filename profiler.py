@@ -0,0 +1,249 @@
+import os
+import sys
+import time
+import marshal
+import threading
+import logging
+from collections import Counter
+
+logger = logging.getLogger("uvicorn.error")
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_SECONDS = 300
+PROFILE_INTERVAL_SECONDS = 0.01     # 100 samples / second
+PROFILE_KEEP_FILES = 20
+
+# target -> function names that mark "this stack belongs to it".
+# Producers share the event loop + executor threads, so stacks are
+# matched by their root functions instead of by thread.
+TARGETS = {
+    "rss": ("rss_producer", "run_rss_cycle", "post_category_wise_news", "post_cricket_news"),
+    "telegram": ("telegram_producer", "telegram_loop", "telegram_push_loop", "telegram_poll_loop"),
+    "twitter": ("twitter_producer", "twitter_loop", "fetch_all_accounts", "fetch_twitter_rss",
+                "_fetch_from_host", "new_tweet_events"),
+    "cricket": ("cricket_producer", "cricket_loop", "cricket_poll_once", "build_cricket_post"),
+    "social": ("process_social_event",),
+    "scheduler": ("scheduler_consumer", "post_one"),
+}
+
+
+def _frame_key(code):
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    ✅ Time-bounded sampling profile of running producer code.
+
+    A daemon thread wakes every `interval` seconds, reads every thread's
+    current stack (sys._current_frames) and keeps the stacks that match the
+    target. Nothing is hooked into the profiled code, so there is no cost
+    at all unless a capture is running.
+
+    Output (PROFILE_DIR):
+    - <id>.collapsed : "thread;root;...;leaf count" (flamegraph.pl / speedscope)
+    - <id>.pstats    : synthesized from the samples, opens with pstats / snakeviz
+                       (ncalls = samples, times = samples * interval)
+    """
+
+    def __init__(self, target, seconds=30, interval=PROFILE_INTERVAL_SECONDS, out_dir=PROFILE_DIR):
+        if target not in TARGETS and not target.startswith("thread:") and target != "all":
+            raise ValueError(f"unknown profile target: {target}")
+        self.target = target
+        self.seconds = max(1, min(int(seconds), PROFILE_MAX_SECONDS))
+        self.interval = interval
+        self.out_dir = out_dir
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}_{target.replace(':', '-')}"
+        self.stacks = Counter()        # tuple(code objects, root first) + thread name -> samples
+        self.samples = 0
+        self.ticks = 0
+        self.status = "pending"
+        self.files = []
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    # -----------------------------
+    # sampling
+    # -----------------------------
+    def _match(self, thread_name, codes):
+        if self.target == "all":
+            return True
+        if self.target.startswith("thread:"):
+            return thread_name.startswith(self.target[7:])
+        roots = TARGETS[self.target]
+        return any(c.co_name in roots for c in codes)
+
+    def _sample_once(self, names, me):
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            name = names.get(ident, str(ident))
+            if self._match(name, codes):
+                self.stacks[(name, tuple(codes))] += 1
+                self.samples += 1
+
+    def _run(self):
+        self.status = "running"
+        me = threading.get_ident()
+        deadline = time.monotonic() + self.seconds
+        try:
+            while not self.stop_event.is_set() and time.monotonic() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                self._sample_once(names, me)
+                self.ticks += 1
+                self.stop_event.wait(self.interval)
+            self.files = self.write()
+            self.status = "done"
+            logger.info(f"🔬 Profile {self.id} done: {self.samples} samples -> {', '.join(self.files)}")
+        except Exception as e:
+            self.status = f"error: {e}"
+            logger.error(f"❌ Profile {self.id} failed: {e}")
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name=f"profiler-{self.target}", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    # -----------------------------
+    # output
+    # -----------------------------
+    def collapsed(self):
+        lines = []
+        for (name, codes), n in self.stacks.most_common():
+            lines.append(";".join([name] + [_frame_label(c) for c in codes]) + f" {n}")
+        return "\n".join(lines) + "\n"
+
+    def pstats_dict(self):
+        """{(file, line, func): (cc, nc, tt, ct, {caller: (cc, nc, tt, ct)})} like cProfile."""
+        dt = self.interval
+        stats = {}
+
+        def entry(key):
+            st = stats.get(key)
+            if st is None:
+                st = stats[key] = [0, 0, 0.0, 0.0, {}]
+            return st
+
+        for (_, codes), n in self.stacks.items():
+            keys = [_frame_key(c) for c in codes]
+            if not keys:
+                continue
+            entry(keys[-1])[2] += n * dt                # self time: leaf only
+            for k in set(keys):                         # cumulative: once per stack (recursion)
+                st = entry(k)
+                st[0] += n
+                st[1] += n
+                st[3] += n * dt
+            for caller, callee in set(zip(keys, keys[1:])):
+                callers = entry(callee)[4]
+                cc, nc, tt, ct = callers.get(caller, (0, 0, 0.0, 0.0))
+                callers[caller] = (cc + n, nc + n, tt, ct + n * dt)
+        return {k: (v[0], v[1], v[2], v[3], v[4]) for k, v in stats.items()}
+
+    def write(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, self.id)
+        with open(base + ".collapsed", "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        with open(base + ".pstats", "wb") as f:
+            marshal.dump(self.pstats_dict(), f)
+        _prune(self.out_dir)
+        return [self.id + ".collapsed", self.id + ".pstats"]
+
+    def info(self):
+        return {
+            "id": self.id,
+            "target": self.target,
+            "seconds": self.seconds,
+            "status": self.status,
+            "samples": self.samples,
+            "ticks": self.ticks,
+            "files": self.files,
+        }
+
+
+def _prune(out_dir, keep=PROFILE_KEEP_FILES):
+    files = sorted(
+        (os.path.join(out_dir, f) for f in os.listdir(out_dir) if f.endswith((".collapsed", ".pstats"))),
+        key=os.path.getmtime,
+    )
+    for path in files[:-keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# -----------------------------
+# module API (admin endpoint / env flag)
+# -----------------------------
+_LOCK = threading.Lock()
+_CURRENT = None
+_HISTORY = []
+
+
+def start_profile(target, seconds=30, interval=PROFILE_INTERVAL_SECONDS):
+    """Starts a capture in the background. Only one at a time."""
+    global _CURRENT
+    with _LOCK:
+        if _CURRENT is not None and _CURRENT.status in ("pending", "running"):
+            raise RuntimeError(f"profile {_CURRENT.id} already running")
+        _CURRENT = SamplingProfiler(target, seconds, interval).start()
+        _HISTORY.append(_CURRENT)
+        del _HISTORY[:-10]
+        logger.info(f"🔬 Profiling {target} for {_CURRENT.seconds}s ({_CURRENT.id})")
+        return _CURRENT.info()
+
+
+def stop_profile():
+    with _LOCK:
+        if _CURRENT is not None:
+            _CURRENT.stop()
+
+
+def profile_status():
+    with _LOCK:
+        return [p.info() for p in reversed(_HISTORY)]
+
+
+def list_profile_files(out_dir=PROFILE_DIR):
+    if not os.path.isdir(out_dir):
+        return []
+    return sorted((f for f in os.listdir(out_dir) if f.endswith((".collapsed", ".pstats"))), reverse=True)
+
+
+def profile_file_path(name, out_dir=PROFILE_DIR):
+    """Path of a stored profile file, None for anything else (no path tricks)."""
+    if name != os.path.basename(name) or name not in list_profile_files(out_dir):
+        return None
+    return os.path.join(out_dir, name)
+
+
+def start_from_env():
+    """PROFILE_ON_START="twitter:60" -> capture right after startup."""
+    spec = os.getenv("PROFILE_ON_START", "").strip()
+    if not spec:
+        return None
+    target, _, seconds = spec.rpartition(":")
+    if not seconds.isdigit():
+        target, seconds = spec, "30"
+    try:
+        return start_profile(target, int(seconds))
+    except Exception as e:
+        logger.error(f"❌ PROFILE_ON_START ignored: {e}")
+        return None
@@ -0,0 +1,564 @@
+"""
+Offline record / replay harness for every external service.
+
+    REPLAY_MODE=record  python worker.py       # real traffic, responses saved to REPLAY_DIR
+    REPLAY_MODE=replay  uvicorn app:app        # no network: fixtures + local stand-ins
+
+Hooks requests.Session.send and httpx.Client/AsyncClient.send, so RSS,
+AI providers (requests + google-genai), CricAPI, Nitter, image downloads
+and the Graph API all go through it. Cloudinary (urllib3 SDK) and
+Telegram (MTProto) get stand-in objects instead.
+
+Replay order per request: exact fixture (method + URL without secrets +
+body hash) -> any fixture for the same method/host/path (round robin, so
+new AI prompts still get a recorded answer) -> built-in stand-in -> a
+ConnectionError (nothing ever leaves the machine).
+
+    REPLAY_DIR=fixtures
+    REPLAY_LATENCY="graph.facebook.com=0.4,api.groq.com=1.2,*=0.05"   # seconds (+-25% jitter)
+    REPLAY_ERRORS="graph.facebook.com=0.1:500,api.groq.com=0.2:timeout" # rate:kind
+    kinds: 500 | 429 | timeout | reset
+"""
+import io
+import os
+import json
+import time
+import base64
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+
+logger = logging.getLogger("uvicorn.error")
+
+REPLAY_MODE = os.getenv("REPLAY_MODE", "off").strip().lower()       # off | record | replay
+REPLAY_DIR = os.getenv("REPLAY_DIR", "fixtures")
+
+_SECRET_PARAMS = {"apikey", "api_key", "key", "access_token", "token", "client_secret"}
+_DROP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection",
+                 "set-cookie", "date"}
+_OPENAI_STYLE_HOSTS = {"api.groq.com", "api.deepseek.com", "api.perplexity.ai", "openrouter.ai"}
+
+_ORIG_REQUESTS_SEND = requests.Session.send
+_local = threading.local()
+
+
+class InjectedError(Exception):
+    pass
+
+
+def parse_host_map(spec, cast=float):
+    """"a.com=0.3,*=0.05" -> {"a.com": 0.3, "*": 0.05}"""
+    out = {}
+    for part in (spec or "").split(","):
+        host, _, val = part.strip().partition("=")
+        if host and val:
+            out[host.strip().lower()] = cast(val.strip())
+    return out
+
+
+def _error_spec(val):
+    rate, _, kind = val.partition(":")
+    return float(rate), (kind or "500").strip().lower()
+
+
+def _clean_url(url):
+    """URL without secret query params (fixtures never contain keys)."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k.lower() not in _SECRET_PARAMS]
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, urlencode(query), ""))
+
+
+def _body_bytes(body):
+    if body is None:
+        return b""
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    if isinstance(body, (bytes, bytearray)):
+        return bytes(body)
+    return b""          # streamed upload bodies are not part of the key
+
+
+# ======================================================
+# FIXTURES
+# ======================================================
+class FixtureStore:
+    """One JSON file per recorded response: <root>/<host>/<method>_<key>.json"""
+
+    def __init__(self, root=REPLAY_DIR):
+        self.root = root
+        self.lock = threading.Lock()
+        self.exact = {}
+        self.by_path = {}
+        self.turn = {}
+        self.load()
+
+    @staticmethod
+    def key(method, url, body):
+        h = hashlib.sha1(f"{method} {_clean_url(url)}".encode("utf-8"))
+        h.update(hashlib.sha1(body).digest())
+        return h.hexdigest()[:20]
+
+    @staticmethod
+    def _path_key(method, url):
+        p = urlsplit(url)
+        return method, p.netloc.lower(), p.path
+
+    def load(self):
+        if not os.path.isdir(self.root):
+            return
+        for host in os.listdir(self.root):
+            folder = os.path.join(self.root, host)
+            if not os.path.isdir(folder):
+                continue
+            for name in sorted(os.listdir(folder)):
+                if name.endswith(".json"):
+                    try:
+                        with open(os.path.join(folder, name), "r", encoding="utf-8") as f:
+                            self._index(json.load(f))
+                    except Exception as e:
+                        logger.warning(f"Bad fixture {host}/{name}: {e}")
+
+    def _index(self, rec):
+        self.exact[rec["key"]] = rec
+        self.by_path.setdefault(self._path_key(rec["method"], rec["url"]), []).append(rec)
+
+    def save(self, method, url, body, status, headers, content, final_url=None):
+        rec = {
+            "key": self.key(method, url, body),
+            "method": method,
+            "url": _clean_url(url),
+            "final_url": _clean_url(final_url) if final_url and final_url != url else None,
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS},
+            "content_b64": base64.b64encode(content).decode("ascii"),
+            "recorded_at": int(time.time()),
+        }
+        folder = os.path.join(self.root, urlsplit(url).netloc.lower().replace(":", "_") or "_")
+        os.makedirs(folder, exist_ok=True)
+        tmp = os.path.join(folder, f"{method}_{rec['key']}.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(rec, f, indent=1)
+        os.replace(tmp, tmp[:-4])
+        with self.lock:
+            self._index(rec)
+
+    def find(self, method, url, body):
+        with self.lock:
+            rec = self.exact.get(self.key(method, url, body))
+            if rec is not None:
+                return rec
+            same = self.by_path.get(self._path_key(method, url))
+            if not same:
+                return None
+            k = self._path_key(method, url)
+            i = self.turn.get(k, 0)
+            self.turn[k] = i + 1
+            return same[i % len(same)]
+
+
+# ======================================================
+# STAND-INS (used in replay when no fixture matches)
+# ======================================================
+_FEED_WORDS = [
+    ("India", "Parliament passes new bill on digital India mission"),
+    ("Cricket", "India beat Australia by 6 wickets, Kohli hits century"),
+    ("Tech", "ISRO startup unveils AI chip for smartphones"),
+    ("Business", "Sensex jumps 800 points as RBI holds repo rate"),
+    ("Sports", "Neeraj Chopra wins gold at Diamond League"),
+    ("World", "UN summit agrees on climate finance deal"),
+]
+
+
+def _ai_json(prompt_text):
+    text = prompt_text.split("News text:", 1)[-1].strip() or "Breaking update"
+    words = text.split()
+    return json.dumps({
+        "headline": " ".join(words[:7]).upper(),
+        "image_info": "\n".join(" ".join(words[i:i + 8]) for i in range(0, min(len(words), 32), 8)),
+        "short_caption": " ".join(words[:12]) + " 🔥",
+    }, ensure_ascii=False)
+
+
+def _synthetic_feed(url, entries=20):
+    seed = int(hashlib.sha1(url.encode("utf-8")).hexdigest()[:8], 16)
+    host = urlsplit(url).netloc or "feed.local"
+    items = []
+    for i in range(entries):
+        cat, title = _FEED_WORDS[(seed + i) % len(_FEED_WORDS)]
+        n = (seed + i) % 100000
+        items.append(
+            f"<item><title>{title} ({host} #{n})</title>"
+            f"<link>https://{host}/story/{n}?utm_source=rss</link>"
+            f"<description><![CDATA[<p>{title}. {cat} desk report with details, quotes and "
+            f"reactions from across the country. Story {n}.</p>]]></description>"
+            f"<media:content url='https://images.unsplash.com/photo-{n}.jpg' medium='image'/>"
+            f"</item>"
+        )
+    return (
+        "<?xml version='1.0' encoding='UTF-8'?><rss version='2.0' "
+        "xmlns:media='http://search.yahoo.com/mrss/'><channel><title>offline</title>"
+        + "".join(items) + "</channel></rss>"
+    ).encode("utf-8")
+
+
+_IMAGE_BYTES = None
+
+
+def _image_bytes():
+    global _IMAGE_BYTES
+    if _IMAGE_BYTES is None:
+        from PIL import Image
+
+        img = Image.new("RGB", (1080, 620), (40, 70, 110))
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=80)
+        _IMAGE_BYTES = buf.getvalue()
+    return _IMAGE_BYTES
+
+
+def _looks_like_feed(host, path):
+    p = path.lower()
+    return host.startswith("feeds.") or "rss" in p or "feed" in p or p.endswith((".xml", ".cms", ".rss"))
+
+
+def stand_in(method, url, body):
+    """-> (status, headers, content) or None"""
+    parts = urlsplit(url)
+    host, path = parts.netloc.lower(), parts.path
+    js = {"Content-Type": "application/json"}
+
+    if host == "graph.facebook.com":
+        n = random.randint(10 ** 14, 10 ** 15)
+        if path.endswith("/media_publish"):
+            return 200, js, json.dumps({"id": f"1790{n}"}).encode()
+        return 200, js, json.dumps({"id": f"1780{n}"}).encode()
+
+    if host in _OPENAI_STYLE_HOSTS and method == "POST":
+        try:
+            prompt = json.loads(body or b"{}")["messages"][-1]["content"]
+        except Exception:
+            prompt = ""
+        return 200, js, json.dumps({"choices": [{"message": {"role": "assistant",
+                                                             "content": _ai_json(prompt)}}]}).encode()
+
+    if host == "generativelanguage.googleapis.com" and method == "POST":
+        try:
+            prompt = json.loads(body or b"{}")["contents"][0]["parts"][0]["text"]
+        except Exception:
+            prompt = ""
+        return 200, js, json.dumps({
+            "candidates": [{"content": {"role": "model", "parts": [{"text": _ai_json(prompt)}]},
+                            "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": 120},
+        }).encode()
+
+    if host == "api.cricapi.com":
+        return 200, js, json.dumps({"status": "success", "data": []}).encode()
+
+    if method == "GET" and _looks_like_feed(host, path):
+        return 200, {"Content-Type": "application/rss+xml"}, _synthetic_feed(url)
+
+    if method == "GET" and (host.startswith("images.") or path.lower().endswith((".jpg", ".jpeg", ".png"))):
+        return 200, {"Content-Type": "image/jpeg"}, _image_bytes()
+
+    return None
+
+
+class FakeCloudinary:
+    """upload(path) -> Cloudinary-shaped result, with the harness latency/errors for 'cloudinary'."""
+
+    def __init__(self, harness):
+        self.harness = harness
+        self.uploads = 0
+
+    def upload(self, path, **kwargs):
+        self.harness.delay("api.cloudinary.com")
+        self.harness.maybe_fail("api.cloudinary.com")
+        self.uploads += 1
+        name = os.path.splitext(os.path.basename(path))[0]
+        return {
+            "public_id": f"{kwargs.get('folder', 'offline')}/{name}",
+            "secure_url": f"https://res.cloudinary.com/offline/image/upload/{name}.png",
+            "bytes": os.path.getsize(path) if os.path.exists(path) else 0,
+        }
+
+
+# ======================================================
+# HARNESS
+# ======================================================
+class Harness:
+    def __init__(self, mode=REPLAY_MODE, root=REPLAY_DIR, latency=None, errors=None, seed=None):
+        self.mode = mode
+        self.store = FixtureStore(root)
+        self.latency = latency if latency is not None else parse_host_map(os.getenv("REPLAY_LATENCY"))
+        self.errors = errors if errors is not None else parse_host_map(os.getenv("REPLAY_ERRORS"), _error_spec)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"fixture": 0, "stand_in": 0, "injected": 0, "recorded": 0, "missing": 0,
+                       "published": 0}     # Graph media_publish calls answered (bench checks)
+        self.telegram_path = os.path.join(root, "telegram.jsonl")
+
+    # -----------------------------
+    # latency / error injection
+    # -----------------------------
+    def _for_host(self, table, host):
+        return table.get(host, table.get("*"))
+
+    def latency_for(self, host):
+        base = self._for_host(self.latency, host) or 0.0
+        with self.lock:
+            return base * self.rng.uniform(0.75, 1.25) if base else 0.0
+
+    def delay(self, host):
+        d = self.latency_for(host)
+        if d:
+            time.sleep(d)
+
+    def injected(self, host):
+        """-> error kind to inject for this call, or None"""
+        spec = self._for_host(self.errors, host)
+        if not spec:
+            return None
+        rate, kind = spec
+        with self.lock:
+            hit = self.rng.random() < rate
+            if hit:
+                self.counts["injected"] += 1
+        return kind if hit else None
+
+    def maybe_fail(self, host):
+        kind = self.injected(host)
+        if kind:
+            raise InjectedError(f"injected {kind} for {host}")
+
+    def _count(self, what):
+        with self.lock:
+            self.counts[what] += 1
+
+    # -----------------------------
+    # replay core (transport independent)
+    # -----------------------------
+    def lookup(self, method, url, body):
+        """-> (status, headers, content, final_url); raises ConnectionError when nothing matches."""
+        if "graph.facebook.com" in url and "/media_publish" in url:
+            self._count("published")
+        rec = self.store.find(method, url, body)
+        if rec is not None:
+            self._count("fixture")
+            return (rec["status"], rec["headers"], base64.b64decode(rec["content_b64"]),
+                    rec.get("final_url") or url)
+        fake = stand_in(method, url, body)
+        if fake is not None:
+            self._count("stand_in")
+            return fake[0], fake[1], fake[2], url
+        self._count("missing")
+        logger.warning(f"📼 No fixture / stand-in: {method} {_clean_url(url)}")
+        raise requests.ConnectionError(f"offline replay: no fixture for {method} {_clean_url(url)}")
+
+    def _injected_response(self, kind):
+        if kind in ("500", "429", "503"):
+            # Graph / OpenAI-style error body
+            body = {"error": {"message": f"injected {kind}", "code": int(kind), "is_transient": True}}
+            return int(kind), {"Content-Type": "application/json"}, json.dumps(body).encode()
+        return None
+
+    # -----------------------------
+    # requests
+    # -----------------------------
+    def requests_send(self, session, request, **kwargs):
+        if getattr(_local, "inner", False):
+            return _ORIG_REQUESTS_SEND(session, request, **kwargs)
+
+        body = _body_bytes(request.body)
+        if self.mode == "record":
+            _local.inner = True
+            try:
+                r = _ORIG_REQUESTS_SEND(session, request, **kwargs)   # follows redirects itself
+            finally:
+                _local.inner = False
+            self.store.save(request.method, request.url, body, r.status_code, dict(r.headers),
+                            r.content, r.url)
+            self._count("recorded")
+            return r
+
+        host = urlsplit(request.url).netloc.lower()
+        self.delay(host)
+        kind = self.injected(host)
+        if kind == "timeout":
+            raise requests.Timeout(f"injected timeout for {host}")
+        if kind == "reset":
+            raise requests.ConnectionError(f"injected connection reset for {host}")
+        injected = self._injected_response(kind)
+        if injected is not None:
+            status, headers, content = injected
+            final_url = request.url
+        else:
+            status, headers, content, final_url = self.lookup(request.method, request.url, body)
+        return _requests_response(request, status, headers, content, final_url, kwargs.get("stream"))
+
+    # -----------------------------
+    # httpx (website client, google-genai)
+    # -----------------------------
+    def httpx_send(self, orig, client, request, **kwargs):
+        if self.mode == "record":
+            resp = orig(client, request, **kwargs)
+            resp.read()
+            self.store.save(request.method, str(request.url), _httpx_body(request), resp.status_code,
+                            dict(resp.headers), resp.content)
+            self._count("recorded")
+            return resp
+        host = request.url.host
+        self.delay(host)
+        return self._httpx_replay(request, host)
+
+    async def httpx_send_async(self, orig, client, request, **kwargs):
+        if self.mode == "record":
+            resp = await orig(client, request, **kwargs)
+            await resp.aread()
+            self.store.save(request.method, str(request.url), _httpx_body(request), resp.status_code,
+                            dict(resp.headers), resp.content)
+            self._count("recorded")
+            return resp
+        host = request.url.host
+        d = self.latency_for(host)
+        if d:
+            await asyncio.sleep(d)
+        return self._httpx_replay(request, host)
+
+    def _httpx_replay(self, request, host):
+        import httpx
+
+        kind = self.injected(host)
+        if kind == "timeout":
+            raise httpx.ReadTimeout(f"injected timeout for {host}", request=request)
+        if kind == "reset":
+            raise httpx.ConnectError(f"injected connection reset for {host}", request=request)
+        injected = self._injected_response(kind)
+        if injected is not None:
+            status, headers, content = injected
+            final_url = str(request.url)
+        else:
+            try:
+                status, headers, content, final_url = self.lookup(request.method, str(request.url),
+                                                                  _httpx_body(request))
+            except requests.ConnectionError as e:
+                raise httpx.ConnectError(str(e), request=request) from None
+        if final_url != str(request.url):
+            request = httpx.Request(request.method, final_url)
+        return httpx.Response(status, headers=headers, content=content, request=request)
+
+    # -----------------------------
+    # Telegram
+    # -----------------------------
+    def record_telegram(self, on_event):
+        """Wraps the Telegram on_event callback: every message is also appended to telegram.jsonl."""
+        os.makedirs(os.path.dirname(self.telegram_path) or ".", exist_ok=True)
+
+        async def recorder(text, source):
+            with open(self.telegram_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"text": text, "source": source}, ensure_ascii=False) + "\n")
+            await on_event(text, source)
+
+        return recorder
+
+    async def replay_telegram(self, on_event, logger=None, interval=None, loop_forever=True):
+        """Recorded Telegram messages -> on_event, one every `interval` seconds (REPLAY_TELEGRAM_INTERVAL)."""
+        interval = float(os.getenv("REPLAY_TELEGRAM_INTERVAL", "5")) if interval is None else interval
+        msgs = []
+        if os.path.exists(self.telegram_path):
+            with open(self.telegram_path, "r", encoding="utf-8") as f:
+                msgs = [json.loads(line) for line in f if line.strip()]
+        if logger:
+            logger.info(f"📼 Telegram replay: {len(msgs)} recorded messages")
+        if not msgs:
+            return
+        while True:
+            for m in msgs:
+                await on_event(m["text"], m["source"])
+                await asyncio.sleep(interval)
+            if not loop_forever:
+                return
+
+    def cloudinary(self):
+        return FakeCloudinary(self)
+
+    # -----------------------------
+    # install
+    # -----------------------------
+    def install(self):
+        global ACTIVE
+        harness = self
+        requests.Session.send = lambda session, request, **kw: harness.requests_send(session, request, **kw)
+        try:
+            import httpx
+
+            orig_sync, orig_async = httpx.Client.send, httpx.AsyncClient.send
+
+            def sync_send(client, request, **kw):
+                return harness.httpx_send(orig_sync, client, request, **kw)
+
+            async def async_send(client, request, **kw):
+                return await harness.httpx_send_async(orig_async, client, request, **kw)
+
+            httpx.Client.send, httpx.AsyncClient.send = sync_send, async_send
+            self._httpx_orig = (orig_sync, orig_async)
+        except ImportError:
+            self._httpx_orig = None
+        ACTIVE = self
+        logger.info(f"📼 Replay harness: mode={self.mode}, fixtures={len(self.store.exact)} ({self.store.root})")
+        return self
+
+    def uninstall(self):
+        global ACTIVE
+        requests.Session.send = _ORIG_REQUESTS_SEND
+        if self._httpx_orig:
+            import httpx
+
+            httpx.Client.send, httpx.AsyncClient.send = self._httpx_orig
+        ACTIVE = None
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, mode=self.mode, fixtures=len(self.store.exact))
+
+
+def _httpx_body(request):
+    try:
+        return bytes(request.content)
+    except Exception:
+        return b""
+
+
+def _requests_response(request, status, headers, content, final_url, stream):
+    from urllib3 import HTTPResponse
+    from requests.structures import CaseInsensitiveDict
+    from requests.utils import get_encoding_from_headers
+
+    r = requests.Response()
+    r.status_code = status
+    r.reason = "OK" if status < 400 else "Error"
+    r.headers = CaseInsensitiveDict(headers)
+    r.raw = HTTPResponse(body=io.BytesIO(content), headers=headers, status=status,
+                         preload_content=False, decode_content=False)
+    r.url = final_url
+    r.request = request
+    r.encoding = get_encoding_from_headers(r.headers)
+    if not stream:
+        r.content
+    return r
+
+
+ACTIVE = None
+
+
+def install_from_env():
+    """REPLAY_MODE=record|replay -> installed Harness, else None (no hooks at all)."""
+    if REPLAY_MODE not in ("record", "replay"):
+        return None
+    return Harness().install()
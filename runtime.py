@@ -0,0 +1,84 @@
+import time
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("uvicorn.error")
+
+# ✅ One pool for ALL blocking work (AI calls, PIL, Cloudinary, Graph API, feeds)
+SHARED_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="blocking")
+
+
+class Supervisor:
+    """
+    ✅ Runs every ingestion/posting producer as a task on ONE event loop.
+
+    - add(name, factory): factory() must return a fresh coroutine
+    - a task that crashes is restarted with exponential backoff
+    - a task that returns normally (e.g. Telegram disabled) is not restarted
+    - run_blocking(fn, ...) runs sync code on the shared executor
+    """
+
+    def __init__(self, executor=SHARED_EXECUTOR, logger=logger, base_backoff=5, max_backoff=300,
+                 healthy_after=600):
+        self.executor = executor
+        self.logger = logger
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.healthy_after = healthy_after   # run this long -> backoff resets
+        self.loop = None
+        self.factories = {}
+        self.tasks = {}
+        self.state = {}
+
+    def add(self, name, factory):
+        self.factories[name] = factory
+        self.state[name] = {"status": "pending", "restarts": 0, "last_error": None, "started_at": None}
+        if self.loop is not None:
+            self.tasks[name] = self.loop.create_task(self._supervise(name), name=name)
+
+    def start(self, loop=None):
+        self.loop = loop or asyncio.get_running_loop()
+        for name in self.factories:
+            if name not in self.tasks:
+                self.tasks[name] = self.loop.create_task(self._supervise(name), name=name)
+        self.logger.info(f"✅ Runtime started: {', '.join(self.factories)}")
+
+    async def stop(self):
+        for t in self.tasks.values():
+            t.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        self.tasks = {}
+
+    async def run_blocking(self, fn, *args, **kwargs):
+        loop = self.loop or asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def _supervise(self, name):
+        backoff = self.base_backoff
+        st = self.state[name]
+        while True:
+            started = time.monotonic()
+            st["status"] = "running"
+            st["started_at"] = int(time.time())
+            try:
+                await self.factories[name]()
+                st["status"] = "finished"
+                self.logger.info(f"✅ Task {name} finished")
+                return
+            except asyncio.CancelledError:
+                st["status"] = "stopped"
+                raise
+            except Exception as e:
+                if time.monotonic() - started >= self.healthy_after:
+                    backoff = self.base_backoff
+                st["status"] = "restarting"
+                st["restarts"] += 1
+                st["last_error"] = str(e)[:300]
+                self.logger.error(f"❌ Task {name} crashed: {e}. Restarting in {backoff}s")
+                await asyncio.sleep(backoff)
+                backoff = min(self.max_backoff, backoff * 2)
+
+    def status(self):
+        return {name: dict(st) for name, st in self.state.items()}
@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from array import array
+
+
+def _key_hash(key: str):
+    """64-bit hash of a link/id (8 bytes per entry on disk)."""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class RotatingSeenStore:
+    """
+    ✅ Time-windowed "have we seen this?" set with a fixed memory budget.
+
+    - keys are kept as 64-bit hashes in N time buckets
+    - a bucket older than the window is dropped as a whole (rotation)
+    - if max_items is hit before that, the oldest bucket is dropped early
+    - saved to disk as packed uint64s, reloaded at startup
+
+    Usage is the same as the old set:
+        if link in SEEN: ...
+        SEEN.add(link)
+    """
+
+    def __init__(self, path=None, window_seconds=3 * 24 * 3600, buckets=12, max_items=100000,
+                 save_every_seconds=60):
+        self.path = path
+        self.bucket_seconds = max(1, int(window_seconds // buckets))
+        self.num_buckets = buckets
+        self.max_items = max_items
+        self.per_bucket = max(1, max_items // buckets)
+        self.save_every_seconds = save_every_seconds
+
+        self.lock = threading.Lock()
+        self.buckets = []        # [[bucket_start_ts, set(hashes)], ...] oldest first
+        self.size = 0
+        self.dirty = False
+        self.last_save = time.time()
+
+        if path:
+            self.load()
+
+    # -----------------------------
+    # set API
+    # -----------------------------
+    def __contains__(self, key):
+        h = _key_hash(key)
+        with self.lock:
+            self._rotate()
+            return any(h in b[1] for b in self.buckets)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, key):
+        h = _key_hash(key)
+        with self.lock:
+            self._rotate()
+            start = int(time.time()) // self.bucket_seconds * self.bucket_seconds
+            # new bucket on time boundary, or when the current one is full
+            if (not self.buckets or self.buckets[-1][0] != start
+                    or len(self.buckets[-1][1]) >= self.per_bucket):
+                self.buckets.append([start, set()])
+            cur = self.buckets[-1][1]
+            if h not in cur:
+                cur.add(h)
+                self.size += 1
+                self.dirty = True
+
+            # memory budget: drop oldest buckets first (never the current one)
+            while self.size > self.max_items and len(self.buckets) > 1:
+                self.size -= len(self.buckets.pop(0)[1])
+
+        if self.path and time.time() - self.last_save >= self.save_every_seconds:
+            self.save()
+
+    def _rotate(self):
+        cutoff = int(time.time()) - self.bucket_seconds * self.num_buckets
+        while self.buckets and self.buckets[0][0] + self.bucket_seconds <= cutoff:
+            self.size -= len(self.buckets.pop(0)[1])
+            self.dirty = True
+
+    # -----------------------------
+    # persistence
+    # -----------------------------
+    def save(self):
+        """File = one JSON header line + packed little-endian uint64 hashes."""
+        if not self.path:
+            return
+        with self.lock:
+            if not self.dirty:
+                return
+            header = {"v": 1, "bucket_seconds": self.bucket_seconds, "buckets": []}
+            payload = array("Q")
+            for start, hashes in self.buckets:
+                header["buckets"].append([start, len(hashes)])
+                payload.extend(hashes)
+            self.dirty = False
+            self.last_save = time.time()
+
+        if sys.byteorder != "little":
+            payload.byteswap()
+
+        try:
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                payload.tofile(f)
+            os.replace(tmp, self.path)
+        except Exception:
+            with self.lock:
+                self.dirty = True
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                header = json.loads(f.readline().decode("utf-8"))
+                payload = array("Q")
+                payload.frombytes(f.read())
+            if sys.byteorder != "little":
+                payload.byteswap()
+        except Exception:
+            return
+
+        buckets, pos = [], 0
+        for start, count in header.get("buckets", []):
+            buckets.append([int(start), set(payload[pos:pos + count])])
+            pos += count
+
+        with self.lock:
+            self.buckets = buckets
+            self.size = sum(len(b[1]) for b in buckets)
+            self._rotate()
+            self.dirty = False
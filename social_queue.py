@@ -0,0 +1,173 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("uvicorn.error")
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+# block       -> producer waits until there is room (backpressure)
+# drop_oldest -> oldest queued event is thrown away to make room
+# drop_new    -> incoming event is thrown away when full
+POLICIES = ("block", "drop_oldest", "drop_new")
+
+
+def _merge_key(text: str):
+    # same text from two channels / accounts = same event
+    return " ".join((text or "").lower().split())[:200]
+
+
+class SocialEventQueue:
+    """
+    ✅ Bounded queue between ingestion (Telegram / Twitter) and processing.
+
+    Ingestion only does `await queue.put(text, source)` and returns
+    immediately. A small pool of async workers pops events and runs the
+    blocking `process(text, source)` (AI -> image -> Cloudinary ->
+    Instagram) in a thread executor, so the event loop never freezes.
+
+    put(..., durable=True) events are never dropped: when the queue is
+    full the producer waits (as with "block"), and drop_oldest only
+    evicts non-durable events. Telegram uses this, since its channel
+    checkpoint moves on as soon as put() returns.
+    """
+
+    def __init__(self, process, maxsize=50, workers=2, policy="drop_oldest", executor=None, logger=logger):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown queue policy: {policy}")
+        self.process = process
+        self.maxsize = maxsize
+        self.workers = workers
+        self.policy = policy
+        self.logger = logger
+        self.executor = executor or ThreadPoolExecutor(max_workers=workers, thread_name_prefix="social")
+
+        self.items = deque()        # [key, text, [sources], enqueued_at, durable]
+        self.by_key = {}
+        self.loop = None
+        self.cond = None
+        self.tasks = []
+
+        # counters for stats()
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.merged = 0
+        self.busy = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    # -----------------------------
+    # lifecycle
+    # -----------------------------
+    def start(self, loop=None):
+        """Must be called from (or with) the event loop that will run the workers."""
+        self.loop = loop or asyncio.get_running_loop()
+        self.cond = asyncio.Condition()
+        for n in range(self.workers):
+            self.tasks.append(self.loop.create_task(self._worker(n)))
+        self.logger.info(f"✅ Social queue started (max={self.maxsize}, workers={self.workers}, policy={self.policy})")
+
+    async def stop(self):
+        for t in self.tasks:
+            t.cancel()
+        self.tasks = []
+
+    # -----------------------------
+    # producer side
+    # -----------------------------
+    async def put(self, text: str, source: str, durable: bool = False):
+        """Returns True if queued (or merged), False if dropped."""
+        key = _merge_key(text)
+        if not key:
+            return False
+
+        async with self.cond:
+            while True:
+                # (re)checked after every wait: the same text may have been queued meanwhile
+                item = self.by_key.get(key)
+                if item is not None:
+                    if source not in item[2]:
+                        item[2].append(source)
+                    item[4] = item[4] or durable
+                    self.merged += 1
+                    return True
+
+                if len(self.items) < self.maxsize:
+                    break
+                policy = "block" if durable else self.policy
+                if policy == "drop_oldest":
+                    old = next((it for it in self.items if not it[4]), None)
+                    if old is not None:
+                        self.items.remove(old)
+                        self.by_key.pop(old[0], None)
+                        self.dropped += 1
+                        self.logger.warning(f"⚠️ Social queue full, dropped oldest event from {old[2][0]}")
+                        break
+                    policy = "drop_new"     # only durable events queued
+                if policy == "drop_new":
+                    self.dropped += 1
+                    self.logger.warning(f"⚠️ Social queue full, dropped new event from {source}")
+                    return False
+                await self.cond.wait()
+
+            item = [key, text, [source], time.monotonic(), durable]
+            self.items.append(item)
+            self.by_key[key] = item
+            self.enqueued += 1
+            self.cond.notify_all()
+            return True
+
+    # -----------------------------
+    # consumer side
+    # -----------------------------
+    async def _get(self):
+        async with self.cond:
+            await self.cond.wait_for(lambda: len(self.items) > 0)
+            item = self.items.popleft()
+            self.by_key.pop(item[0], None)
+            self.cond.notify_all()   # wake blocked producers
+            return item
+
+    async def _worker(self, n):
+        while True:
+            _, text, sources, enqueued_at, _ = await self._get()
+            lag = time.monotonic() - enqueued_at
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+
+            source = ",".join(sources)
+            self.busy += 1
+            try:
+                await self.loop.run_in_executor(self.executor, self.process, text, source)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                self.logger.error(f"❌ Social worker {n} error: {e}")
+            finally:
+                self.busy -= 1
+
+    # -----------------------------
+    # metrics
+    # -----------------------------
+    def stats(self):
+        oldest = (time.monotonic() - self.items[0][3]) if self.items else 0.0
+        return {
+            "depth": len(self.items),
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "workers": self.workers,
+            "busy_workers": self.busy,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "oldest_age_seconds": round(oldest, 3),
+            "last_lag_seconds": round(self.last_lag, 3),
+            "max_lag_seconds": round(self.max_lag, 3),
+        }
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger("uvicorn.error")
+
+STORAGE_SQLITE_PATH = os.getenv("STORAGE_SQLITE_PATH", "trendscope.db")
+# posted URLs: "supabase" (shared, survives redeploys) or "sqlite" (local / offline)
+STORAGE_BACKEND = os.getenv(
+    "STORAGE_BACKEND", "supabase" if os.getenv("SUPABASE_URL") else "sqlite"
+).strip().lower()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posted_urls (
+    url TEXT PRIMARY KEY,
+    posted_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS posted_urls_at ON posted_urls(posted_at);
+
+CREATE TABLE IF NOT EXISTS cricket_events (
+    event_id TEXT PRIMARY KEY,
+    posted_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cricket_events_at ON cricket_events(posted_at);
+
+CREATE TABLE IF NOT EXISTS kv (
+    ns TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (ns, key)
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteStorage:
+    """
+    ✅ Embedded storage for everything the bot remembers.
+
+    - posted_urls / cricket_events: primary-key lookups, batched inserts
+    - kv(ns, key) -> JSON value: cooldowns, checkpoints, cricket match state
+    - WAL journal: readers in other processes never block the writer,
+      synchronous=NORMAL is crash-safe in WAL mode
+    - one connection per process behind a lock (writes are tiny)
+
+    import_json() moves an old whole-file JSON state into a namespace once.
+    """
+
+    def __init__(self, path=STORAGE_SQLITE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+
+    # -----------------------------
+    # posted URLs
+    # -----------------------------
+    def posted_urls(self):
+        with self.lock:
+            return {r[0] for r in self.db.execute("SELECT url FROM posted_urls")}
+
+    def add_posted(self, urls):
+        now = time.time()
+        with self.lock:
+            self.db.executemany("INSERT OR IGNORE INTO posted_urls VALUES (?, ?)", [(u, now) for u in urls])
+
+    # -----------------------------
+    # cricket events
+    # -----------------------------
+    def cricket_events(self):
+        with self.lock:
+            return [r[0] for r in self.db.execute("SELECT event_id FROM cricket_events ORDER BY posted_at")]
+
+    def add_cricket_events(self, event_ids):
+        now = time.time()
+        with self.lock:
+            self.db.executemany("INSERT OR IGNORE INTO cricket_events VALUES (?, ?)",
+                                [(e, now) for e in event_ids])
+
+    # -----------------------------
+    # key / value namespaces
+    # -----------------------------
+    def kv_get(self, ns, key, default=None):
+        with self.lock:
+            row = self.db.execute("SELECT value FROM kv WHERE ns = ? AND key = ?", (ns, key)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def kv_all(self, ns):
+        with self.lock:
+            rows = self.db.execute("SELECT key, value FROM kv WHERE ns = ?", (ns,)).fetchall()
+        return {k: json.loads(v) for k, v in rows}
+
+    def kv_set(self, ns, key, value):
+        self.kv_set_many(ns, {key: value})
+
+    def kv_set_many(self, ns, items):
+        now = time.time()
+        rows = [(ns, str(k), json.dumps(v), now) for k, v in items.items()]
+        with self.lock:
+            self.db.executemany(
+                "INSERT INTO kv VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(ns, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                rows,
+            )
+
+    def import_json(self, ns, path):
+        """Old JSON file -> namespace (only if the namespace is still empty). Returns the dict."""
+        if not os.path.exists(path) or self.kv_all(ns):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return None
+        if isinstance(data, dict) and data:
+            self.kv_set_many(ns, data)
+            logger.info(f"📦 Imported {path} into storage ({ns})")
+            return data
+        return None
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "posted_urls": self.db.execute("SELECT COUNT(*) FROM posted_urls").fetchone()[0],
+                "cricket_events": self.db.execute("SELECT COUNT(*) FROM cricket_events").fetchone()[0],
+                "kv": self.db.execute("SELECT COUNT(*) FROM kv").fetchone()[0],
+            }
+
+
+def _no_unique_constraint(err):
+    # Postgres 42P10: "there is no unique or exclusion constraint matching the ON CONFLICT specification"
+    return getattr(err, "code", None) == "42P10" or "42P10" in str(err) or "ON CONFLICT" in str(err)
+
+
+class SupabaseStorage:
+    """
+    Posted URLs in the Supabase `posted_news` table (shared by every
+    deploy); per-host state (cricket events, cooldowns, checkpoints)
+    stays in the local SQLite store.
+    """
+
+    def __init__(self, get_client, local, table="posted_news"):
+        self.get_client = get_client
+        self.local = local
+        self.table = table
+        self.upsert = True          # False once the table turned out to have no UNIQUE(url)
+
+    def posted_urls(self):
+        res = self.get_client().table(self.table).select("url").execute()
+        return {item["url"] for item in res.data}
+
+    def add_posted(self, urls):
+        client = self.get_client()
+        if self.upsert:
+            try:
+                # idempotent: needs a unique constraint on posted_news.url (supabase_schema.sql)
+                client.table(self.table).upsert(
+                    [{"url": u} for u in urls], on_conflict="url", ignore_duplicates=True
+                ).execute()
+                return
+            except Exception as e:
+                if not _no_unique_constraint(e):
+                    raise
+                self.upsert = False
+                logger.warning(f"⚠️ {self.table}.url has no UNIQUE constraint (run supabase_schema.sql); "
+                               f"falling back to select + insert")
+        # old schema: insert only the URLs not stored yet, so journal replays stay idempotent
+        urls = list(dict.fromkeys(urls))
+        res = client.table(self.table).select("url").in_("url", urls).execute()
+        have = {item["url"] for item in res.data}
+        new = [u for u in urls if u not in have]
+        if new:
+            client.table(self.table).insert([{"url": u} for u in new]).execute()
+
+    def cricket_events(self):
+        return self.local.cricket_events()
+
+    def add_cricket_events(self, event_ids):
+        self.local.add_cricket_events(event_ids)
+
+    def kv_get(self, ns, key, default=None):
+        return self.local.kv_get(ns, key, default)
+
+    def kv_all(self, ns):
+        return self.local.kv_all(ns)
+
+    def kv_set(self, ns, key, value):
+        self.local.kv_set(ns, key, value)
+
+    def kv_set_many(self, ns, items):
+        self.local.kv_set_many(ns, items)
+
+    def import_json(self, ns, path):
+        return self.local.import_json(ns, path)
+
+    def stats(self):
+        return dict(self.local.stats(), backend="supabase", table=self.table)
+
+
+_LOCAL = None
+_LOCAL_LOCK = threading.Lock()
+
+
+def local_storage():
+    """Process-wide SQLite store (opened on first use)."""
+    global _LOCAL
+    if _LOCAL is None:
+        with _LOCAL_LOCK:
+            if _LOCAL is None:
+                _LOCAL = SQLiteStorage()
+    return _LOCAL
+
+
+def open_storage(get_supabase=None, backend=STORAGE_BACKEND):
+    """STORAGE_BACKEND=sqlite|supabase -> the store used for posted URLs."""
+    if backend == "supabase" and get_supabase is not None:
+        return SupabaseStorage(get_supabase, local_storage())
+    return local_storage()
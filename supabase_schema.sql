@@ -0,0 +1,18 @@
+-- Supabase tables used by TrendScope (run once in the SQL editor).
+
+-- posted_news: STORAGE_BACKEND=supabase upserts on url, which needs a unique constraint.
+-- Existing deployments: drop duplicate rows first, then add the constraint.
+-- (Without it the app falls back to select + insert and logs a warning.)
+DELETE FROM posted_news a
+USING posted_news b
+WHERE a.url = b.url AND a.ctid > b.ctid;
+
+ALTER TABLE posted_news
+    ADD CONSTRAINT posted_news_url_key UNIQUE (url);
+
+-- leader_lease: LEADER_BACKEND=supabase (leader.SupabaseLease)
+CREATE TABLE IF NOT EXISTS leader_lease (
+    name text PRIMARY KEY,
+    owner text NOT NULL,
+    expires_at bigint NOT NULL
+);
@@ -1,9 +1,14 @@
 import os
+import json
+import time
 import asyncio
 import logging
-from telethon import TelegramClient
-from telethon.errors.rpcerrorlist import UsernameInvalidError, UsernameNotOccupiedError
+from telethon import TelegramClient, events, utils
+from telethon.errors.rpcerrorlist import FloodWaitError, UsernameInvalidError, UsernameNotOccupiedError
 from telethon.tl.functions.contacts import ResolveUsernameRequest
+from telethon.tl.types import Channel, Chat, InputPeerChannel, InputPeerChat, InputPeerUser
+from metrics import cache_hit
+from storage import local_storage
 
 TELEGRAM_CHANNELS = [
     "cricinformer",
@@ -19,6 +24,28 @@ API_ID_RAW = os.getenv("TELEGRAM_API_ID", "").strip()
 API_HASH = os.getenv("TELEGRAM_API_HASH", "").strip()
 SESSION_FILE = os.getenv("TELEGRAM_SESSION_FILE", "trendscope_session.session").strip()
 
+# ✅ Resolved usernames are cached next to the session file (id + access_hash)
+ENTITY_CACHE_FILE = os.getenv(
+    "TELEGRAM_ENTITY_CACHE_FILE",
+    SESSION_FILE.replace(".session", "") + ".entities.json"
+).strip()
+ENTITY_TTL_SECONDS = int(os.getenv("TELEGRAM_ENTITY_TTL_SECONDS", str(7 * 24 * 3600)))
+INVALID_TTL_SECONDS = int(os.getenv("TELEGRAM_INVALID_TTL_SECONDS", str(12 * 3600)))
+
+# ✅ Per-channel low-water marks (every id <= it delivered), survives restarts
+CHECKPOINT_FILE = os.getenv(
+    "TELEGRAM_CHECKPOINT_FILE",
+    SESSION_FILE.replace(".session", "") + ".checkpoints.json"
+).strip()
+
+# "push" = Telethon update handlers (+ min_id catch-up), "poll" = old 30s polling
+TELEGRAM_MODE = os.getenv("TELEGRAM_MODE", "push").strip().lower()
+POLL_SECONDS = 30
+FIRST_RUN_BACKFILL = 5          # channel never seen before -> only last N msgs
+CATCHUP_MAX_MESSAGES = 500      # safety cap per channel per catch-up
+RECONCILE_SECONDS = int(os.getenv("TELEGRAM_RECONCILE_SECONDS", "300"))
+CATCHUP_RETRY_SECONDS = 30      # a channel whose catch-up failed is retried sooner
+
 
 def _log(logger, msg):
     try:
@@ -58,19 +85,138 @@ def create_client(logger=None):
         return None
 
 
+def clean_username(username: str):
+    return (username or "").strip().replace("@", "").replace("https://t.me/", "").replace("t.me/", "")
+
+
+# -----------------------------
+# ENTITY CACHE (memory + json file)
+# -----------------------------
+# username -> {"kind": "channel"|"chat"|"user", "id": ..., "access_hash": ..., "ts": ...}
+# username -> {"invalid": True, "retry_at": ...}   (negative cache)
+ENTITY_CACHE = {}
+_ENTITY_CACHE_LOADED = False
+_FLOOD_WAIT_UNTIL = 0   # no resolve calls before this unix time
+
+
+def load_entity_cache():
+    global ENTITY_CACHE, _ENTITY_CACHE_LOADED
+    _ENTITY_CACHE_LOADED = True
+    if not os.path.exists(ENTITY_CACHE_FILE):
+        return ENTITY_CACHE
+    try:
+        with open(ENTITY_CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            ENTITY_CACHE = data
+    except Exception:
+        ENTITY_CACHE = {}
+    return ENTITY_CACHE
+
+
+def save_entity_cache():
+    try:
+        tmp = ENTITY_CACHE_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(ENTITY_CACHE, f, indent=2)
+        os.replace(tmp, ENTITY_CACHE_FILE)
+    except Exception:
+        pass
+
+
+def _entity_to_record(entity):
+    if isinstance(entity, Channel):
+        kind = "channel"
+    elif isinstance(entity, Chat):
+        kind = "chat"
+    else:
+        kind = "user"
+    return {
+        "kind": kind,
+        "id": entity.id,
+        "access_hash": getattr(entity, "access_hash", None) or 0,
+        "ts": int(time.time()),
+    }
+
+
+def _record_to_input_peer(rec):
+    if rec["kind"] == "channel":
+        return InputPeerChannel(rec["id"], rec["access_hash"])
+    if rec["kind"] == "chat":
+        return InputPeerChat(rec["id"])
+    return InputPeerUser(rec["id"], rec["access_hash"])
+
+
+def invalidate_entity(username: str):
+    """Drop a cached entity (e.g. access_hash stopped working) so next cycle re-resolves it."""
+    username = clean_username(username)
+    if ENTITY_CACHE.pop(username, None) is not None:
+        save_entity_cache()
+
+
+def _mark_invalid(username: str, retry_after: int):
+    ENTITY_CACHE[username] = {"invalid": True, "retry_at": int(time.time()) + retry_after}
+    save_entity_cache()
+
+
+async def get_cached_entity(client, username: str, logger=None):
+    """
+    ✅ Returns an InputPeer for username without hitting Telegram
+    when we already know its id + access_hash.
+    Falls back to ResolveUsernameRequest on miss / expiry.
+    """
+    if not _ENTITY_CACHE_LOADED:
+        load_entity_cache()
+
+    username = clean_username(username)
+    if not username:
+        return None
+
+    now = int(time.time())
+    rec = ENTITY_CACHE.get(username)
+    if rec:
+        if rec.get("invalid"):
+            if now < int(rec.get("retry_at", 0)):
+                cache_hit("telegram_entity", True)
+                return None
+        elif now - int(rec.get("ts", 0)) < ENTITY_TTL_SECONDS:
+            cache_hit("telegram_entity", True)
+            return _record_to_input_peer(rec)
+    cache_hit("telegram_entity", False)
+
+    if now < _FLOOD_WAIT_UNTIL:
+        entity = None
+    else:
+        entity = await safe_resolve_username(client, username, logger)
+
+    if entity is None:
+        # transient failure (flood wait / network) -> keep using last good record
+        cur = ENTITY_CACHE.get(username)
+        if cur and not cur.get("invalid"):
+            return _record_to_input_peer(cur)
+        return None
+
+    ENTITY_CACHE[username] = _entity_to_record(entity)
+    save_entity_cache()
+    return _record_to_input_peer(ENTITY_CACHE[username])
+
+
 async def safe_resolve_username(client, username: str, logger=None):
+    global _FLOOD_WAIT_UNTIL
     try:
-        username = username.strip().replace("@", "").replace("https://t.me/", "").replace("t.me/", "")
+        username = clean_username(username)
         if not username:
             return None
 
         # Telegram username rules safety
         if len(username) < 5 or len(username) > 32:
             _log(logger, f"⚠️ Skip TG username invalid length: {username}")
+            _mark_invalid(username, INVALID_TTL_SECONDS)
             return None
 
         if not username[0].isalpha():
             _log(logger, f"⚠️ Skip TG username invalid start: {username}")
+            _mark_invalid(username, INVALID_TTL_SECONDS)
             return None
 
         result = await client(ResolveUsernameRequest(username))
@@ -82,71 +228,261 @@ async def safe_resolve_username(client, username: str, logger=None):
 
     except (UsernameInvalidError, UsernameNotOccupiedError):
         _log_err(logger, f"❌ TG username invalid/not occupied: {username}")
+        _mark_invalid(username, INVALID_TTL_SECONDS)
+        return None
+    except FloodWaitError as e:
+        _FLOOD_WAIT_UNTIL = int(time.time()) + int(e.seconds or 60)
+        _log_err(logger, f"⏳ TG FLOOD_WAIT resolving {username}: {e.seconds}s")
         return None
     except Exception as e:
         _log_err(logger, f"❌ Resolve error {username}: {e}")
         return None
 
 
-async def telegram_loop(on_event=None, logger=None):
+# -----------------------------
+# CHECKPOINTS (per-channel low-water marks)
+# -----------------------------
+# channel -> msg id                          (nothing delivered past a gap)
+# channel -> {"id": ..., "above": [ids]}     (live messages delivered past a gap)
+CHECKPOINT_NS = "telegram_checkpoints"
+
+
+def load_checkpoints():
+    """channel -> (mark, ids delivered above it) (old CHECKPOINT_FILE is imported once)."""
+    try:
+        store = local_storage()
+        store.import_json(CHECKPOINT_NS, CHECKPOINT_FILE)
+        out = {}
+        for ch, v in store.kv_all(CHECKPOINT_NS).items():
+            if isinstance(v, dict):
+                out[ch] = (int(v.get("id", 0)), {int(i) for i in v.get("above", [])})
+            else:
+                out[ch] = (int(v), set())
+        return out
+    except Exception:
+        return {}
+
+
+def save_checkpoint(ch, msg_id, above=()):
+    """One row upsert (WAL commit), so a crash never loses or tears other channels."""
+    value = {"id": int(msg_id), "above": sorted(above)} if above else int(msg_id)
+    try:
+        local_storage().kv_set(CHECKPOINT_NS, ch, value)
+    except Exception:
+        pass
+
+
+class ChannelDelivery:
     """
-    ✅ Reads Telegram messages.
-    ✅ Calls callback:
-        await on_event(text, source)
+    ✅ Delivers each channel message to on_event exactly once, in id order.
+
+    - the checkpoint is a low-water mark: every id <= it was delivered
+      (or does not exist). A live message past a gap is delivered at once
+      but only remembered in `above`; the mark moves over contiguous ids,
+      or up to the newest id a catch-up (min_id = mark) fetched. So the
+      next reconcile always refetches a gap.
+    - an id counts as delivered only after the callback returned without
+      raising; a failed one stays a gap and the next catch-up retries it
+    - live updates that arrive while a channel is still catching up
+      are buffered and flushed after the catch-up; if the catch-up
+      fails they stay buffered until a retry succeeds
     """
-    _log(logger, "📨 Telegram Engine Started...")
 
-    client = create_client(logger)
-    if client is None:
-        _log(logger, "⚠️ Telegram engine not started. Continuing without Telegram.")
-        return
+    def __init__(self, on_event=None, logger=None):
+        self.on_event = on_event
+        self.logger = logger
+        self.checkpoints = {}
+        self.above = {}                 # channel -> ids delivered past the mark
+        for ch, (mark, above) in load_checkpoints().items():
+            self.checkpoints[ch] = mark
+            self.above[ch] = above
+        self.locks = {}
+        self.ready = set()
+        self.pending = {}
+
+    def _lock(self, ch):
+        if ch not in self.locks:
+            self.locks[ch] = asyncio.Lock()
+        return self.locks[ch]
+
+    def _delivered(self, ch, msg_id):
+        return msg_id <= self.checkpoints.get(ch, 0) or msg_id in self.above.get(ch, ())
+
+    def _advance(self, ch, msg_id=None, upto=0):
+        """Record a delivered id and/or a fetched range, then persist the mark."""
+        mark = max(self.checkpoints.get(ch, 0), upto)
+        above = self.above.setdefault(ch, set())
+        if msg_id is not None:
+            above.add(msg_id)
+        while mark + 1 in above:
+            mark += 1
+        above.difference_update([i for i in above if i <= mark])
+        self.checkpoints[ch] = mark
+        save_checkpoint(ch, mark, above)
+
+    async def _deliver_locked(self, ch, msg):
+        """False if on_event raised (the id is not marked delivered)."""
+        if not msg or not msg.id or self._delivered(ch, msg.id):
+            return True
+
+        text = (msg.message or "").strip()
+        if text:
+            _log(self.logger, f"TG [{ch}] => {text[:90]}")
+            if self.on_event:
+                try:
+                    await self.on_event(text, f"telegram:{ch}")
+                except Exception as cb_err:
+                    _log_err(self.logger, f"❌ TG callback error ({ch} #{msg.id}, retried later): {cb_err}")
+                    return False
+
+        # media-only posts also count as delivered
+        self._advance(ch, msg.id)
+        return True
+
+    async def live(self, ch, msg):
+        async with self._lock(ch):
+            if ch not in self.ready:
+                buf = self.pending.setdefault(ch, [])
+                buf.append(msg)
+                if len(buf) > CATCHUP_MAX_MESSAGES:
+                    del buf[0]          # still above the mark -> the catch-up refetches it
+                return
+            await self._deliver_locked(ch, msg)
+
+    async def catch_up(self, client, ch, entity):
+        """
+        Fetch everything after the channel checkpoint (min_id), oldest first.
+        Raises if the fetch fails: the channel then stays "not ready" (live
+        messages keep buffering) and the next reconcile retries.
+        """
+        async with self._lock(ch):
+            last_id = self.checkpoints.get(ch, 0)
+            if last_id:
+                msgs = [m async for m in client.iter_messages(
+                    entity, min_id=last_id, reverse=True, limit=CATCHUP_MAX_MESSAGES)]
+            else:
+                msgs = [m async for m in client.iter_messages(entity, limit=FIRST_RUN_BACKFILL)]
+            msgs.sort(key=lambda m: m.id)
+            failed = None
+            for msg in msgs:
+                if not await self._deliver_locked(ch, msg) and failed is None:
+                    failed = msg.id
+            if msgs:
+                # ids between the mark and the newest fetched one were all seen (or deleted),
+                # up to the first one whose callback failed
+                self._advance(ch, upto=msgs[-1].id if failed is None else failed - 1)
+
+            # flush anything the live handler buffered meanwhile
+            buffered = self.pending.pop(ch, [])
+            for msg in sorted(buffered, key=lambda m: m.id):
+                await self._deliver_locked(ch, msg)
+            self.ready.add(ch)
+
+
+async def _resolve_channels(client, logger=None):
+    """channel username -> InputPeer (via entity cache)"""
+    out = {}
+    for ch in TELEGRAM_CHANNELS:
+        entity = await get_cached_entity(client, ch, logger)
+        if entity:
+            out[ch] = entity
+    return out
+
+
+async def _catch_up_all(client, delivery, entities, logger=None):
+    for ch, entity in entities.items():
+        try:
+            await delivery.catch_up(client, ch, entity)
+        except Exception as ex:
+            _log_err(logger, f"❌ Telegram catch-up error {ch}: {ex}")
+            invalidate_entity(ch)
 
-    await client.start()
 
-    last_ids = {}  # channel -> last msg id (avoid duplicates)
+async def telegram_push_loop(client, on_event=None, logger=None):
+    """
+    ✅ Push mode:
+    1) register NewMessage handler for our channels (events buffered until caught up)
+    2) catch-up with min_id from persisted checkpoints
+    3) every RECONCILE_SECONDS re-resolve the channels (missing at startup
+       or invalidated since), re-register the handler if that changed the
+       list, and re-run catch-up, which fills any update gap
+    4) channels whose catch-up failed are retried every CATCHUP_RETRY_SECONDS
+    """
+    delivery = ChannelDelivery(on_event, logger)
+    entities = {}
+    peer_to_channel = {}
+
+    async def handler(event):
+        ch = peer_to_channel.get(event.chat_id)
+        if ch:
+            await delivery.live(ch, event.message)
+
+    async def subscribe():
+        resolved = await _resolve_channels(client, logger)
+        if resolved == entities:
+            return
+        entities.clear()
+        entities.update(resolved)
+        peer_to_channel.clear()
+        peer_to_channel.update({utils.get_peer_id(e): ch for ch, e in entities.items()})
+        # NewMessage(chats=...) resolves its list once -> swap the whole filter
+        client.remove_event_handler(handler)
+        client.add_event_handler(handler, events.NewMessage(chats=list(entities.values())))
+        _log(logger, f"📨 Telegram push mode: {len(entities)} channels")
+
+    await subscribe()
+    await _catch_up_all(client, delivery, entities, logger)
+    next_reconcile = time.time() + RECONCILE_SECONDS
 
     while True:
+        behind = any(ch not in delivery.ready for ch in entities)
+        await asyncio.sleep(CATCHUP_RETRY_SECONDS if behind else max(1, next_reconcile - time.time()))
         try:
-            for ch in TELEGRAM_CHANNELS:
-                entity = await safe_resolve_username(client, ch, logger)
-                if not entity:
-                    continue
+            await subscribe()
+            if time.time() >= next_reconcile:
+                next_reconcile = time.time() + RECONCILE_SECONDS
+                await _catch_up_all(client, delivery, entities, logger)
+            else:
+                retry = {ch: e for ch, e in entities.items() if ch not in delivery.ready}
+                await _catch_up_all(client, delivery, retry, logger)
+        except Exception as e:
+            _log_err(logger, f"Telegram reconcile error: {e}")
 
-                try:
-                    async for msg in client.iter_messages(entity, limit=5):
-                        if not msg or not msg.id:
-                            continue
 
-                        text = (msg.message or "").strip()
-                        if not text:
-                            continue
+async def telegram_poll_loop(client, on_event=None, logger=None):
+    """Old polling mode, now min_id based so bursts are never cut at 5."""
+    delivery = ChannelDelivery(on_event, logger)
 
-                        # ✅ prevent repeated processing of same message
-                        prev = last_ids.get(ch, 0)
-                        if msg.id <= prev:
-                            continue
+    while True:
+        try:
+            entities = await _resolve_channels(client, logger)
+            await _catch_up_all(client, delivery, entities, logger)
+            await asyncio.sleep(POLL_SECONDS)
 
-                        # update latest seen
-                        last_ids[ch] = msg.id
+        except Exception as e:
+            _log_err(logger, f"Telegram loop error: {e}")
+            await asyncio.sleep(60)
 
-                        _log(logger, f"TG [{ch}] => {text[:90]}")
 
-                        # ✅ Trigger callback to your app
-                        if on_event:
-                            try:
-                                await on_event(text, f"telegram:{ch}")
-                            except Exception as cb_err:
-                                _log_err(logger, f"❌ TG callback error: {cb_err}")
+async def telegram_loop(on_event=None, logger=None):
+    """
+    ✅ Reads Telegram messages.
+    ✅ Calls callback:
+        await on_event(text, source)
+    """
+    _log(logger, "📨 Telegram Engine Started...")
 
-                except Exception as ex:
-                    _log_err(logger, f"❌ Telegram read error {ch}: {ex}")
-                    continue
+    client = create_client(logger)
+    if client is None:
+        _log(logger, "⚠️ Telegram engine not started. Continuing without Telegram.")
+        return
 
-            await asyncio.sleep(30)
+    await client.start()
 
-        except Exception as e:
-            _log_err(logger, f"Telegram loop error: {e}")
-            await asyncio.sleep(60)
+    if TELEGRAM_MODE == "poll":
+        await telegram_poll_loop(client, on_event, logger)
+    else:
+        await telegram_push_loop(client, on_event, logger)
 
 
 def telegram_fetch_loop(on_event=None, logger=None):
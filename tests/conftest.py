@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import storage
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Fresh SQLite store behind storage.local_storage() for one test."""
+    db = storage.SQLiteStorage(str(tmp_path / "test.db"))
+    monkeypatch.setattr(storage, "_LOCAL", db)
+    yield db
+    db.close()
@@ -0,0 +1,22 @@
+import app
+from feed_stream import parse_feed_bytes
+
+GNEWS = "https://news.google.com/rss/articles/CBMiQ2xvbmctaWQ?oc=5"
+PUBLISHER = "https://publisher.com/sport/story-1"
+FEED = (f"<?xml version='1.0'?><rss version='2.0'><channel><title>G</title>"
+        f"<item><title>India win</title><link>{GNEWS}</link></item></channel></rss>").encode("utf-8")
+
+
+def test_id_is_stable_across_late_resolution(monkeypatch):
+    entries = parse_feed_bytes(FEED, 6).entries
+
+    # cycle 1: the resolver missed its deadline
+    monkeypatch.setattr(app.URL_RESOLVER, "resolve_many", lambda links: {GNEWS: GNEWS})
+    before = app.rss_feed_items("gnews", entries)[0]
+
+    # cycle 2: the publisher URL is known now
+    monkeypatch.setattr(app.URL_RESOLVER, "resolve_many", lambda links: {GNEWS: PUBLISHER})
+    after = app.rss_feed_items("gnews", entries)[0]
+
+    assert before["key"] != after["key"]
+    assert before["id"] == after["id"] == app.article_id(GNEWS, "India win")
@@ -0,0 +1,32 @@
+import logging
+import threading
+
+import cricket_engine
+from cricket_engine import cricket_poll_once, load_cricket_state
+
+logger = logging.getLogger("test")
+MATCH = {"id": 7, "name": "India vs Australia", "teams": ["India", "Australia"], "status": "India won by 5 runs"}
+
+
+def test_result_event_is_recorded_when_the_scheduler_posts_it(store, monkeypatch, tmp_path):
+    monkeypatch.setattr(cricket_engine, "CRICKET_STATE_FILE", str(tmp_path / "cricket_posted.json"))
+    monkeypatch.setattr(cricket_engine, "fetch_current_matches", lambda: [MATCH])
+    submitted = []
+
+    def submit(event_id, event_type, score, ttl, prepare, on_done):
+        submitted.append((event_id, on_done))
+
+    state = load_cricket_state()
+    cricket_poll_once(state, None, None, submit, logger)
+    cricket_poll_once(state, None, None, submit, logger)     # not posted yet -> resubmitted
+    assert [e for e, _ in submitted] == ["7_RESULT_india won by 5 runs"] * 2
+
+    # the scheduler thread reports while the next poll may be running
+    worker = threading.Thread(target=submitted[0][1], args=(True,))
+    worker.start()
+    worker.join(5)
+    assert state["posted_events"] == ["7_RESULT_india won by 5 runs"]
+    assert store.cricket_events() == ["7_RESULT_india won by 5 runs"]
+
+    cricket_poll_once(state, None, None, submit, logger)
+    assert len(submitted) == 2
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from article_index import ArticleIndex
+from enrichment import Enricher
+
+
+class Store:
+    """kv store that records which thread touched it."""
+
+    def __init__(self):
+        self.kv = {}
+        self.threads = set()
+
+    def kv_get(self, ns, key):
+        self.threads.add(threading.get_ident())
+        return self.kv.get((ns, key))
+
+    def kv_set(self, ns, key, value):
+        self.threads.add(threading.get_ident())
+        self.kv[(ns, key)] = value
+
+
+def article(i):
+    return {"id": f"a{i}", "title": f"Title {i}", "summary": f"Summary {i}", "link": f"https://x/{i}"}
+
+
+def test_cycle_keeps_storage_off_the_event_loop(tmp_path):
+    index = ArticleIndex(disk_path=str(tmp_path / "articles"))
+    items = [article(i) for i in range(3)]
+    index.put_many(items)
+    store = Store()
+    store.kv[("enrichment", "a0")] = {"headline": "shared"}
+
+    def convert(text):
+        return {"headline": text, "image_info": text, "short_caption": text}
+
+    async def scenario():
+        enricher = Enricher(convert, index, ThreadPoolExecutor(2), store=lambda: store)
+        enricher.want(items[2])
+        await enricher.run(items)
+        return threading.get_ident(), enricher
+
+    loop_thread, enricher = asyncio.run(scenario())
+    assert store.threads and loop_thread not in store.threads
+    assert enricher.last_cycle["enriched"] == 2
+    assert index.enrichment("a0") == {"headline": "shared"}
+    assert store.kv[("enrichment", "a1")]["headline"] == "Summary 1"
+    index.close()
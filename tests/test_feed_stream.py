@@ -0,0 +1,50 @@
+from feed_stream import StreamingFeedParser, parse_feed_bytes
+
+
+def rss(entries=6, title=lambda i: f"Story {i}", channel="Bench"):
+    items = "".join(
+        f"<item><title>{title(i)}</title><link>https://example.com/{i}</link>"
+        f"<description>Body {i}</description></item>"
+        for i in range(entries)
+    )
+    return (f"<?xml version='1.0'?><rss version='2.0'><channel><title>{channel}</title>"
+            f"{items}</channel></rss>").encode("utf-8")
+
+
+def links(parsed):
+    return [e.get("link") for e in parsed.entries]
+
+
+def test_stops_after_max_entries():
+    content = rss(entries=50)
+    parsed = parse_feed_bytes(content, 6)
+    assert links(parsed) == [f"https://example.com/{i}" for i in range(6)]
+    assert not parsed.fallback
+    assert parsed.bytes_read <= len(content)
+
+
+def test_entity_after_first_entry_falls_back_to_whole_feed():
+    content = rss(title=lambda i: "It&rsquo;s over" if i == 3 else f"Story {i}")
+    parsed = parse_feed_bytes(content, 6)
+    assert parsed.fallback
+    assert links(parsed) == [f"https://example.com/{i}" for i in range(6)]
+    assert parsed.entries[3]["title"] == "It’s over"
+
+
+def test_entity_before_first_entry_reads_the_rest():
+    content = rss(channel="Top&nbsp;News")
+    p = StreamingFeedParser(6)
+    for i in range(0, len(content), 32):
+        if p.feed(content[i:i + 32]):
+            break
+    parsed = p.result()
+    assert parsed.fallback
+    assert parsed.bytes_read == len(content)
+    assert len(parsed.entries) == 6
+
+
+def test_byte_cap_still_applies_after_error():
+    content = rss(entries=200, channel="A&nbsp;B")
+    parsed = parse_feed_bytes(content, 6, max_bytes=2048)
+    assert parsed.truncated
+    assert parsed.bytes_read == 2048
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+import keyword_rules
+from keyword_rules import DEFAULT_RULES, KeywordRules, classify, reload_rules
+
+RULES = KeywordRules(DEFAULT_RULES)
+
+
+def test_prefix_and_whole_word_keywords():
+    c = RULES.classify("Indian team wins as technology stocks rally")
+    assert c.category == "Tech"                       # tech* -> technology
+    assert c.trend == 50                              # india* -> indian (+10)
+    assert c.keywords == {"indian", "technology"}
+    assert RULES.classify("He said the rail budget grew").category == "India"   # "ai" whole word only
+    assert RULES.classify("AI chips").category == "Tech"
+
+
+def test_category_order_and_trend_cap():
+    assert RULES.classify("Cricket market update").category == "Sports"       # first listed wins
+    text = "Breaking: Modi court ruling on India"
+    assert RULES.classify(text).trend == 80
+    capped = KeywordRules(dict(DEFAULT_RULES, trend={"base": 40, "max": 60, "weights": {"modi": 50}}))
+    assert capped.classify(text).trend == 60
+
+
+def test_filters():
+    assert RULES.classify("Bumrah takes two wickets").filters == {"twitter_cricket"}
+    assert RULES.classify("Monsoon arrives early").filters == set()
+
+
+def test_reload_swaps_rules_and_keeps_them_on_a_broken_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(keyword_rules, "_RULES", None)
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(dict(DEFAULT_RULES, default_category="World")))
+    reload_rules(str(path))
+    assert classify("Monsoon arrives early").category == "World"
+
+    path.write_text("{broken")
+    with pytest.raises(ValueError):
+        reload_rules(str(path))
+    assert classify("Monsoon arrives early").category == "World"
@@ -0,0 +1,154 @@
+import asyncio
+import subprocess
+import sys
+import time
+
+from conftest import ROOT
+from leader import FileLock, LeaderElection, SupabaseLease
+
+
+# -----------------------------
+# FileLock
+# -----------------------------
+def test_file_lock_is_exclusive_until_released(tmp_path):
+    path = str(tmp_path / "leader.lock")
+    a, b = FileLock(path), FileLock(path)
+    assert a.acquire()
+    assert a.acquire()                 # re-entrant for the holder
+    assert not b.acquire()
+    a.release()
+    assert b.acquire()
+    b.release()
+
+
+def test_file_lock_is_freed_when_the_holder_dies(tmp_path):
+    path = str(tmp_path / "leader.lock")
+    holder = subprocess.Popen(
+        [sys.executable, "-c",
+         "import sys, time; sys.path.insert(0, sys.argv[1]); from leader import FileLock\n"
+         "assert FileLock(sys.argv[2]).acquire(); print('held', flush=True); time.sleep(60)",
+         ROOT, path],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == "held"
+        assert not FileLock(path).acquire()
+    finally:
+        holder.kill()
+        holder.wait()
+    lock = FileLock(path)
+    assert lock.acquire()
+    lock.release()
+
+
+# -----------------------------
+# SupabaseLease (fake PostgREST table)
+# -----------------------------
+class Query:
+    def __init__(self, table, op, row):
+        self.table, self.op, self.row, self.filters = table, op, row, []
+
+    def eq(self, col, value):
+        self.filters.append(lambda r: str(r[col]) == str(value))
+        return self
+
+    def or_(self, expr):
+        # "expires_at.lt.<now>,owner.eq.<owner>"
+        conds = []
+        for part in expr.split(","):
+            col, op, value = part.split(".", 2)
+            conds.append((col, op, value))
+
+        def match(r):
+            return any(int(r[c]) < int(v) if op == "lt" else str(r[c]) == v for c, op, v in conds)
+
+        self.filters.append(match)
+        return self
+
+    def execute(self):
+        class Res:
+            data = []
+        if self.op == "insert":
+            if any(r["name"] == self.row["name"] for r in self.table.rows):
+                raise Exception("duplicate key value violates unique constraint")
+            self.table.rows.append(dict(self.row))
+            Res.data = [self.row]
+            return Res
+        for r in self.table.rows:
+            if all(f(r) for f in self.filters):
+                r.update(self.row)
+                Res.data.append(r)
+        return Res
+
+
+class Table:
+    def __init__(self):
+        self.rows = []
+
+    def update(self, row):
+        return Query(self, "update", row)
+
+    def insert(self, row):
+        return Query(self, "insert", row)
+
+
+class Client:
+    def __init__(self):
+        self.t = Table()
+
+    def table(self, name):
+        return self.t
+
+
+def test_lease_is_held_by_one_owner_until_it_expires():
+    client = Client()
+    a = SupabaseLease(lambda: client, ttl_seconds=30)
+    b = SupabaseLease(lambda: client, ttl_seconds=30)
+    assert a.acquire()                 # first run: insert
+    assert a.acquire()                 # renew
+    assert not b.acquire()
+
+    client.t.rows[0]["expires_at"] = int(time.time()) - 1
+    assert b.acquire()
+    assert not a.acquire()
+    assert client.t.rows[0]["owner"] == b.owner
+
+
+def test_released_lease_is_free_at_once():
+    client = Client()
+    a = SupabaseLease(lambda: client)
+    b = SupabaseLease(lambda: client)
+    assert a.acquire()
+    a.release()
+    assert b.acquire()
+
+
+# -----------------------------
+# LeaderElection
+# -----------------------------
+def test_losing_the_lease_stops_producers_and_frees_the_lock(tmp_path):
+    client = Client()
+    lock_path = str(tmp_path / "leader.lock")
+    lease = SupabaseLease(lambda: client, ttl_seconds=30)
+    events = []
+
+    async def on_lost():
+        events.append("lost")
+
+    async def scenario():
+        election = LeaderElection(lock=FileLock(lock_path), lease=lease, check_seconds=0.01)
+        election.start(lambda: events.append("elected"), on_lost)
+        await asyncio.sleep(0.1)
+        assert election.is_leader
+
+        # another host took the lease over
+        client.t.rows[0]["owner"] = "other-host"
+        await asyncio.sleep(0.1)
+        assert not election.is_leader
+        await election.stop()
+
+    asyncio.run(scenario())
+    assert events == ["elected", "lost"]
+    other = FileLock(lock_path)
+    assert other.acquire()
+    other.release()
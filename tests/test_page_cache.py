@@ -0,0 +1,76 @@
+import gzip
+from types import SimpleNamespace
+
+from page_cache import PageCache, page_response
+
+
+def state(version, items=("a", "b"), by_category=None):
+    return SimpleNamespace(version=version, items=list(items), by_category=by_category or {"Tech": ["a"]})
+
+
+def request(**headers):
+    return SimpleNamespace(headers={k.replace("_", "-"): v for k, v in headers.items()})
+
+
+def render_counter():
+    calls = []
+
+    def render(items, category):
+        calls.append(category)
+        return f"<p>{category or 'home'}: {','.join(items)}</p>"
+
+    return render, calls
+
+
+def test_pages_render_once_per_snapshot_version():
+    render, calls = render_counter()
+    cache = PageCache(render, ["Tech", "Sports"])
+    v1 = state(1)
+    cache.prerender(v1)
+    assert sorted(calls) == ["", "Sports", "Tech"]          # "" = home page
+
+    assert cache.get(v1, "Tech") is cache.get(v1, "Tech")
+    cache.get(v1, "x1")
+    cache.get(v1, "x2")                       # unknown categories share one variant
+    assert len(calls) == 4
+
+    cache.get(state(2), "Tech")
+    assert cache.stats()["variants"] == 1     # old version dropped
+    cache.get(v1, "Tech")                     # late reader of an old state: served, not cached
+    assert cache.stats()["version"] == 2
+
+
+def test_gzip_body_and_etag_per_encoding():
+    render, _ = render_counter()
+    page = PageCache(render).get(state(1))
+
+    res = page_response(page, request(accept_encoding="br;q=0, gzip, deflate"))
+    assert res.status_code == 200
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(res.body) == page.identity
+    assert res.headers["etag"] == page.etag("gzip")
+
+    plain = page_response(page, request(accept_encoding="gzip;q=0"))
+    assert "content-encoding" not in plain.headers
+    assert plain.body == page.identity
+    assert plain.headers["etag"] == page.etag() != res.headers["etag"]
+
+
+def test_if_none_match_gives_304():
+    render, _ = render_counter()
+    page = PageCache(render).get(state(1))
+
+    for inm in (page.etag("gzip"), f'W/{page.etag()}', f'"other", {page.etag("gzip")}', "*"):
+        res = page_response(page, request(accept_encoding="gzip", if_none_match=inm))
+        assert res.status_code == 304, inm
+        assert res.body == b""
+        assert res.headers["etag"] == page.etag("gzip")
+
+    stale = page_response(page, request(accept_encoding="gzip", if_none_match='"old-gzip"'))
+    assert stale.status_code == 200
+
+
+def test_same_content_same_etag_in_every_process():
+    render, _ = render_counter()
+    assert PageCache(render).get(state(1)).etag() == PageCache(render).get(state(7)).etag()
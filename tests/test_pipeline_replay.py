@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+def bench(*args):
+    return subprocess.run(
+        [sys.executable, os.path.join(ROOT, "bench_pipeline.py"), *args],
+        capture_output=True, text=True, timeout=300,
+    )
+
+
+def test_offline_pipeline_posts_each_story_once():
+    res = bench("--items", "10", "--per-cycle", "3")
+    assert res.returncode == 0, res.stdout[-2000:] + res.stderr[-2000:]
+    assert "'posted': 10" in res.stdout
+    assert "checks: OK" in res.stdout
+
+
+def test_offline_pipeline_with_injected_errors():
+    res = bench("--items", "10", "--per-cycle", "3",
+                "--errors", "graph.facebook.com=0.3:500,api.cloudinary.com=0.2:500")
+    assert res.returncode == 0, res.stdout[-2000:] + res.stderr[-2000:]
+    assert "checks: OK" in res.stdout
@@ -0,0 +1,59 @@
+import time
+
+from post_limiter import PostLimiter
+
+
+def limiter(store, **kw):
+    kw.setdefault("flush_seconds", 60)
+    return PostLimiter(limit_file="missing.json", cooldown_file="missing.json", store=store, **kw)
+
+
+def test_one_slot_per_window_and_refund(store):
+    lim = limiter(store, min_gap_seconds=900)
+    lim.tokens = 1
+    assert lim.try_acquire()
+    assert not lim.try_acquire()
+    assert 899 < lim.seconds_until_slot() <= 900
+
+    lim.refund()                      # nothing reached Instagram
+    assert lim.seconds_until_slot() == 0
+    assert lim.try_acquire()
+
+
+def test_refill_after_the_gap(store):
+    lim = limiter(store, min_gap_seconds=0.2)
+    lim.tokens = 1
+    assert lim.try_acquire()
+    assert not lim.try_acquire()
+    time.sleep(0.25)
+    assert lim.try_acquire()
+
+
+def test_burst_caps_saved_tokens(store):
+    lim = limiter(store, min_gap_seconds=0.01, burst=2)
+    time.sleep(0.1)
+    assert [lim.try_acquire() for _ in range(3)] == [True, True, False]
+
+
+def test_cooldown_blocks_slots(store):
+    lim = limiter(store)
+    lim.tokens = 1
+    lim.set_cooldown(600)
+    assert not lim.try_acquire()
+    assert 599 <= lim.cooldown_remaining() <= 600
+    assert lim.seconds_until_slot() > 590
+
+
+def test_close_flushes_and_state_survives_restart(store):
+    lim = limiter(store, min_gap_seconds=900)
+    lim.tokens = 1
+    assert lim.try_acquire()
+    lim.set_cooldown(300)
+    assert store.kv_get("post_limiter", "limit") is None      # write-behind, nothing saved yet
+
+    lim.close()
+    assert not lim.writer.is_alive()
+    restarted = limiter(store, min_gap_seconds=900)
+    assert restarted.tokens < 0.01
+    assert restarted.last_post_time == lim.last_post_time
+    assert restarted.cooldown_remaining() > 290
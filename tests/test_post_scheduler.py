@@ -0,0 +1,93 @@
+import threading
+
+from post_scheduler import Candidate, PostScheduler
+
+
+class Limiter:
+    def __init__(self):
+        self.refunds = 0
+
+    def refund(self):
+        self.refunds += 1
+
+
+def assets():
+    return {"image_url": "https://img", "caption": "caption"}
+
+
+def test_resubmit_rejected_while_publishing():
+    publishing, release = threading.Event(), threading.Event()
+    published, done = [], []
+
+    def publish(image_url, caption):
+        publishing.set()
+        release.wait(5)
+        published.append(caption)
+        return {"id": "1"}
+
+    sched = PostScheduler(Limiter(), publish)
+    assert sched.submit(Candidate("cricapi:42", 90, "cricapi", assets, on_done=done.append))
+
+    cand = sched._pop_best()
+    worker = threading.Thread(target=sched.post_one, args=(cand,))
+    worker.start()
+    assert publishing.wait(5)
+
+    # the 60s poll resubmits the same event during the publish wait
+    assert not sched.submit(Candidate("cricapi:42", 90, "cricapi", assets))
+    assert sched._pop_best() is None
+
+    release.set()
+    worker.join(5)
+    assert published == ["caption"]
+    assert done == [True]
+    assert not sched.inflight
+
+
+def test_key_accepted_again_after_failed_prepare():
+    limiter = Limiter()
+    sched = PostScheduler(limiter, lambda *a: {"id": "1"})
+    sched.submit(Candidate("social:1", 50, "telegram", lambda: None))
+    assert not sched.post_one(sched._pop_best())
+    assert limiter.refunds == 1
+    assert sched.submit(Candidate("social:1", 50, "telegram", assets))
+
+
+def test_inflight_released_when_publish_raises():
+    def publish(image_url, caption):
+        raise RuntimeError("graph down")
+
+    limiter, done = Limiter(), []
+    sched = PostScheduler(limiter, publish)
+    sched.submit(Candidate("rss:1", 50, "rss", assets, on_done=done.append))
+    assert not sched.post_one(sched._pop_best())
+    assert done == [False]
+    assert limiter.refunds == 0               # may have reached Graph
+    assert sched.submit(Candidate("rss:1", 50, "rss", assets))
+
+
+def test_failed_create_refunds_the_slot():
+    limiter = Limiter()
+    sched = PostScheduler(limiter, lambda *a: {"error": {"code": 2, "message": "500"}})
+    sched.submit(Candidate("rss:1", 50, "rss", assets))
+    assert not sched.post_one(sched._pop_best())
+    assert limiter.refunds == 1
+
+
+def test_failed_publish_after_create_keeps_the_slot():
+    limiter = Limiter()
+    sched = PostScheduler(limiter, lambda *a: {"error": {"code": 2}, "creation_id": "1780"})
+    sched.submit(Candidate("rss:1", 50, "rss", assets))
+    assert not sched.post_one(sched._pop_best())
+    assert limiter.refunds == 0
+
+
+def test_replaced_candidate_hears_about_it():
+    old_done, new_done = [], []
+    sched = PostScheduler(Limiter(), lambda *a: {"id": "1"})
+    sched.submit(Candidate("cricapi:7", 60, "cricapi", assets, on_done=old_done.append))
+    assert sched.submit(Candidate("cricapi:7", 90, "cricapi", assets, on_done=new_done.append))
+    assert old_done == [False]
+    assert sched.post_one(sched._pop_best())
+    assert new_done == [True]
+    assert old_done == [False]
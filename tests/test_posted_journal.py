@@ -0,0 +1,151 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+from posted_journal import PostedJournal
+from storage import SupabaseStorage
+
+
+def urls_in(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["url"] for line in f]
+
+
+class Down(Exception):
+    pass
+
+
+def failing(batch):
+    raise Down("supabase down")
+
+
+def test_flush_compacts_the_log(tmp_path):
+    written = []
+    j = PostedJournal(written.extend, path=str(tmp_path / "posted.log"), batch_size=2, fsync=False)
+    j._start = lambda: None                    # flush by hand, no write-behind thread
+    for u in ("https://a", "https://b", "https://c"):
+        j.append(u)
+    assert urls_in(j.path) == ["https://a", "https://b", "https://c"]
+
+    assert not j.flush()                       # one batch of 2, one URL left
+    assert written == ["https://a", "https://b"]
+    assert urls_in(j.path) == ["https://c"]
+    assert j.close()
+    assert written == ["https://a", "https://b", "https://c"]
+    assert not os.path.exists(j.path)
+
+
+def test_failed_flush_keeps_everything_and_backs_off(tmp_path):
+    j = PostedJournal(failing, path=str(tmp_path / "posted.log"), fsync=False)
+    j.append("https://a")
+    assert not j.flush()
+    assert j.stats()["failures"] == 1
+    assert j.stats()["retry_in"] > 0
+    assert j.pending_urls() == {"https://a"}
+    assert urls_in(j.path) == ["https://a"]
+
+
+def test_each_journal_gets_its_own_file(tmp_path):
+    path = str(tmp_path / "posted.log")
+    a = PostedJournal(failing, path=path, fsync=False)
+    b = PostedJournal(failing, path=path, fsync=False)   # lock on <pid>.log is taken
+    assert a.path != b.path
+    a.append("https://a")
+    b.append("https://b")
+    assert urls_in(a.path) == ["https://a"]
+    assert urls_in(b.path) == ["https://b"]
+
+
+def test_logs_of_dead_processes_are_adopted(tmp_path):
+    path = str(tmp_path / "posted.log")
+    with open(path, "w", encoding="utf-8") as f:         # old shared log
+        f.write(json.dumps({"url": "https://old"}) + "\n")
+    script = (
+        "import sys, os; sys.path.insert(0, sys.argv[1])\n"
+        "from posted_journal import PostedJournal\n"
+        "def down(b): raise OSError('down')\n"
+        "j = PostedJournal(down, path=sys.argv[2], fsync=False)\n"
+        "j.append('https://crashed')\n"
+        "os._exit(0)\n"
+    )
+    subprocess.run([sys.executable, "-c", script, ROOT, path], check=True)
+
+    written = []
+    j = PostedJournal(written.extend, path=path, fsync=False)
+    assert j.pending_urls() == {"https://old", "https://crashed"}
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(j.path), os.path.basename(j.path) + ".lock"])
+    assert j.close()
+    assert sorted(written) == ["https://crashed", "https://old"]
+
+
+# -----------------------------
+# Supabase posted_news without UNIQUE(url)
+# -----------------------------
+class Query:
+    def __init__(self, table, op, arg=None):
+        self.table, self.op, self.arg = table, op, arg
+
+    def in_(self, col, values):
+        self.arg = values
+        return self
+
+    def execute(self):
+        return self.table.run(self.op, self.arg)
+
+
+class Table:
+    def __init__(self, unique):
+        self.unique = unique
+        self.rows = []
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        return Query(self, "upsert", rows)
+
+    def insert(self, rows):
+        return Query(self, "insert", rows)
+
+    def select(self, cols):
+        return Query(self, "select")
+
+    def run(self, op, arg):
+        class Res:
+            data = []
+        if op == "upsert":
+            if not self.unique:
+                raise Exception({"code": "42P10", "message": "there is no unique or exclusion constraint "
+                                                             "matching the ON CONFLICT specification"})
+            for r in arg:
+                if r["url"] not in self.rows:
+                    self.rows.append(r["url"])
+        elif op == "insert":
+            self.rows += [r["url"] for r in arg]
+        else:
+            Res.data = [{"url": u} for u in self.rows if u in arg]
+        return Res
+
+
+class Client:
+    def __init__(self, unique):
+        self.t = Table(unique)
+
+    def table(self, name):
+        return self.t
+
+
+def test_supabase_upsert_falls_back_to_insert_without_unique_constraint(store):
+    client = Client(unique=False)
+    sb = SupabaseStorage(lambda: client, store)
+    sb.add_posted(["https://a", "https://b"])
+    sb.add_posted(["https://b", "https://c"])              # journal replay overlap
+    assert not sb.upsert
+    assert client.t.rows == ["https://a", "https://b", "https://c"]
+
+
+def test_supabase_upsert_with_unique_constraint(store):
+    client = Client(unique=True)
+    sb = SupabaseStorage(lambda: client, store)
+    sb.add_posted(["https://a", "https://a"])
+    assert sb.upsert
+    assert client.t.rows == ["https://a"]
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from seen_store import RotatingSeenStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+def test_set_api_and_reload(tmp_path, clock):
+    path = str(tmp_path / "seen.bin")
+    seen = RotatingSeenStore(path=path, window_seconds=120, buckets=12)
+    seen.add("https://x.com/a/status/1")
+    seen.add("https://x.com/a/status/1")
+    assert "https://x.com/a/status/1" in seen
+    assert "https://x.com/a/status/2" not in seen
+    assert len(seen) == 1
+    seen.save()
+
+    again = RotatingSeenStore(path=path, window_seconds=120, buckets=12)
+    assert "https://x.com/a/status/1" in again
+    assert len(again) == 1
+
+
+def test_whole_buckets_expire_after_the_window(clock):
+    seen = RotatingSeenStore(window_seconds=120, buckets=12)     # 10 s buckets
+    seen.add("old")
+    clock[0] += 60
+    seen.add("newer")
+    clock[0] += 70                                               # "old" is out of the window
+    assert "old" not in seen
+    assert "newer" in seen
+    assert len(seen) == 1
+
+
+def test_memory_budget_drops_oldest_buckets_first(clock):
+    seen = RotatingSeenStore(window_seconds=120, buckets=4, max_items=8)   # 2 per bucket
+    for i in range(10):
+        seen.add(f"k{i}")
+    assert len(seen) <= 8
+    assert "k0" not in seen and "k1" not in seen
+    assert "k9" in seen
+
+
+def test_expired_entries_are_not_reloaded(tmp_path, clock):
+    path = str(tmp_path / "seen.bin")
+    seen = RotatingSeenStore(path=path, window_seconds=120, buckets=12)
+    seen.add("k")
+    seen.save()
+    clock[0] += 300
+    assert "k" not in RotatingSeenStore(path=path, window_seconds=120, buckets=12)
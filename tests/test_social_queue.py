@@ -0,0 +1,63 @@
+import asyncio
+
+from social_queue import SocialEventQueue
+
+
+def queue(**kw):
+    q = SocialEventQueue(lambda text, source: None, **kw)
+    q.cond = asyncio.Condition()       # no workers: the test pops by hand
+    return q
+
+
+def texts(q):
+    return [it[1] for it in q.items]
+
+
+def test_blocked_put_merges_into_an_event_queued_while_it_waited():
+    async def scenario():
+        q = queue(maxsize=1, policy="block")
+        await q.put("first", "tg:a")
+        blocked = asyncio.create_task(q.put("Same  story", "tg:b"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        await q._get()                     # room for one
+        await q.put("same story", "tw:c")  # queued first by another producer
+        assert await asyncio.wait_for(blocked, 1)
+        return q
+
+    q = asyncio.run(scenario())
+    assert texts(q) == ["same story"]
+    assert q.items[0][2] == ["tw:c", "tg:b"]
+    assert q.merged == 1
+
+
+def test_drop_oldest_never_drops_durable_events():
+    async def scenario():
+        q = queue(maxsize=2, policy="drop_oldest")
+        await q.put("telegram 1", "tg", durable=True)
+        await q.put("tweet 1", "tw")
+        assert await q.put("tweet 2", "tw")          # evicts tweet 1, not the durable one
+        assert texts(q) == ["telegram 1", "tweet 2"]
+
+        blocked = asyncio.create_task(q.put("telegram 2", "tg", durable=True))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()                     # durable: waits instead of dropping
+        await q._get()
+        assert await asyncio.wait_for(blocked, 1)
+        return q
+
+    q = asyncio.run(scenario())
+    assert texts(q) == ["tweet 2", "telegram 2"]
+    assert q.dropped == 1
+
+
+def test_drop_new_when_only_durable_events_are_queued():
+    async def scenario():
+        q = queue(maxsize=1, policy="drop_oldest")
+        await q.put("telegram 1", "tg", durable=True)
+        return q, await q.put("tweet 1", "tw")
+
+    q, queued = asyncio.run(scenario())
+    assert not queued
+    assert texts(q) == ["telegram 1"]
@@ -0,0 +1,120 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from telegram_engine import ChannelDelivery, load_checkpoints
+
+
+def msg(i):
+    return SimpleNamespace(id=i, message=f"message {i}")
+
+
+class Client:
+    """iter_messages() over a fixed channel history; fail=True -> raises."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.fail = False
+
+    async def iter_messages(self, entity, min_id=0, reverse=False, limit=None):
+        if self.fail:
+            raise ConnectionError("telegram down")
+        ids = [i for i in sorted(self.ids, reverse=not reverse) if i > min_id][:limit]
+        for i in ids:
+            yield msg(i)
+
+
+def delivery():
+    got = []
+
+    async def on_event(text, source):
+        got.append(int(text.rsplit(" ", 1)[1]))
+
+    return ChannelDelivery(on_event), got
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_reconcile_recovers_update_gap(store):
+    d, got = delivery()
+    d.checkpoints["ch"] = 10
+    d.ready.add("ch")
+
+    async def scenario():
+        await d.live("ch", msg(11))
+        await d.live("ch", msg(13))          # update for 12 never arrived
+        assert d.checkpoints["ch"] == 11
+        await d.catch_up(Client([11, 12, 13]), "ch", None)
+
+    run(scenario())
+    assert got == [11, 13, 12]
+    assert d.checkpoints["ch"] == 13
+    assert load_checkpoints()["ch"] == (13, set())
+
+
+def test_gap_survives_restart(store):
+    d, _ = delivery()
+    d.checkpoints["ch"] = 10
+    d.ready.add("ch")
+    run(d.live("ch", msg(12)))
+    assert load_checkpoints()["ch"] == (10, {12})
+
+    d2, got = delivery()
+    run(d2.catch_up(Client([11, 12]), "ch", None))
+    assert got == [11]                        # 12 was already delivered
+    assert d2.checkpoints["ch"] == 12
+
+
+def test_failed_catch_up_keeps_buffering_and_retries(store):
+    d, got = delivery()
+    d.checkpoints["ch"] = 10
+    client = Client([11, 12])
+    client.fail = True
+
+    async def scenario():
+        await d.live("ch", msg(12))
+        with pytest.raises(ConnectionError):
+            await d.catch_up(client, "ch", None)
+        assert "ch" not in d.ready
+        await d.live("ch", msg(13))
+        assert got == []
+
+        client.fail = False
+        client.ids.append(13)
+        await d.catch_up(client, "ch", None)
+
+    run(scenario())
+    assert got == [11, 12, 13]
+    assert "ch" in d.ready
+    assert d.checkpoints["ch"] == 13
+
+
+def test_old_integer_checkpoint_is_read(store):
+    store.kv_set("telegram_checkpoints", "ch", 7)
+    d, _ = delivery()
+    assert d.checkpoints["ch"] == 7
+
+
+def test_failed_callback_is_not_marked_delivered(store):
+    got, fail = [], {12}
+
+    async def on_event(text, source):
+        i = int(text.rsplit(" ", 1)[1])
+        if i in fail:
+            raise RuntimeError("queue closed")
+        got.append(i)
+
+    d = ChannelDelivery(on_event)
+    d.checkpoints["ch"] = 10
+    client = Client([11, 12, 13])
+    run(d.catch_up(client, "ch", None))
+    assert got == [11, 13]
+    assert d.checkpoints["ch"] == 11
+
+    fail.clear()
+    run(d.catch_up(client, "ch", None))
+    assert got == [11, 13, 12]
+    assert d.checkpoints["ch"] == 13
@@ -0,0 +1,29 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import twitter_engine
+from twitter_engine import HostScoreboard, fetch_all_accounts
+
+
+def test_slow_host_is_hedged_on_the_given_executor(monkeypatch):
+    monkeypatch.setattr(twitter_engine, "HOST_SCOREBOARD", HostScoreboard(["slow", "fast"]))
+    monkeypatch.setattr(twitter_engine, "HEDGE_AFTER_SECONDS", 0.05)
+    monkeypatch.setattr(twitter_engine, "ACCOUNT_CONCURRENCY", 3)
+    calls = []
+
+    def fetch(username, host):
+        calls.append(host)
+        if host == "slow":
+            time.sleep(0.5)
+        return [f"{username}@{host}"]
+
+    monkeypatch.setattr(twitter_engine, "_fetch_from_host", fetch)
+    # first requests and hedges share one pool; no pool thread waits on another
+    pool = ThreadPoolExecutor(max_workers=6, thread_name_prefix="test")
+    t0 = time.monotonic()
+    got = asyncio.run(fetch_all_accounts(["a", "b", "c"], pool))
+    assert time.monotonic() - t0 < 0.45
+    assert got == {"a": ["a@fast"], "b": ["b@fast"], "c": ["c@fast"]}
+    assert calls.count("slow") == 3
+    pool.shutdown(wait=True)
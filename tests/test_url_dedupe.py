@@ -0,0 +1,35 @@
+from url_resolver import UrlResolver, canonical_url
+
+GNEWS = "https://news.google.com/rss/articles/CBMiQ2xvbmctaWQ?oc=5"
+PUBLISHER = "https://www.publisher.com/sport/story-1/?utm_source=gnews"
+
+
+def test_canonical_url():
+    assert canonical_url("http://WWW.Example.com/a/?utm_source=x&b=2&a=1#top") == "https://example.com/a?a=1&b=2"
+    assert canonical_url("https://nitter.net/user/status/1?s=20") == "https://x.com/user/status/1"
+
+
+def test_posted_before_resolution_still_matches_after_it(store):
+    resolver = UrlResolver(store)
+
+    # cycle 1: resolution missed its deadline -> posted with the redirect keys only
+    posted = set(resolver.keys(GNEWS))
+    assert GNEWS in posted
+
+    # cycle 2: the publisher URL is cached now and becomes the item key
+    resolver._store({GNEWS: PUBLISHER})
+    assert resolver.canonical(GNEWS) == "https://publisher.com/sport/story-1"
+    assert any(k in posted for k in resolver.keys(GNEWS))
+
+
+def test_keys_after_resolution_cover_the_publisher_feed(store):
+    resolver = UrlResolver(store)
+    resolver._store({GNEWS: PUBLISHER})
+    posted = set(resolver.keys(GNEWS))
+    # the same story from the publisher's own RSS feed
+    assert any(k in posted for k in resolver.keys(PUBLISHER))
+
+
+def test_resolution_cache_is_persistent(store):
+    UrlResolver(store)._store({GNEWS: PUBLISHER})
+    assert UrlResolver(store).canonical(GNEWS) == "https://publisher.com/sport/story-1"
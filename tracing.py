@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from collections import deque
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "").strip()   # "" -> no JSONL export
+
+# (trace, parent span index) for the code running right now
+_CURRENT = contextvars.ContextVar("trendscope_trace", default=None)
+
+
+class Span:
+    __slots__ = ("name", "start", "end", "parent", "attrs", "error")
+
+    def __init__(self, name, start, parent=None, attrs=None):
+        self.name = name
+        self.start = start
+        self.end = None
+        self.parent = parent
+        self.attrs = attrs or {}
+        self.error = None
+
+
+class Trace:
+    """
+    One candidate item: every stage it went through, as timed spans.
+    Spans are wall-clock (time.time()) so stages that ran in different
+    threads (queue worker, scheduler, executor) line up on one waterfall.
+    """
+
+    def __init__(self, name, start=None, **attrs):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.attrs = attrs
+        self.start = start or time.time()
+        self.end = None
+        self.status = "running"
+        self.spans = []
+        self.tracer = None
+
+    def add_span(self, name, start, end=None, parent=None, **attrs):
+        sp = Span(name, start, parent, attrs)
+        sp.end = end
+        self.spans.append(sp)          # list.append is atomic
+        return len(self.spans) - 1
+
+    def fork(self, name, **attrs):
+        """New trace that starts with a copy of this one's spans (shared fetch cycle -> per item)."""
+        t = Trace(name, start=self.start, **attrs)
+        for sp in list(self.spans):
+            t.add_span(sp.name, sp.start, sp.end, sp.parent, **sp.attrs)
+            t.spans[-1].error = sp.error
+        return t
+
+    def activate(self):
+        return _Activation(self)
+
+    def finish(self, status="ok"):
+        if self.end is not None:
+            return
+        self.end = time.time()
+        self.status = status
+        if self.tracer:
+            self.tracer._finished(self)
+
+    def to_dict(self):
+        spans = []
+        for sp in list(self.spans):
+            depth, p = 0, sp.parent
+            while p is not None and depth < 20:
+                depth += 1
+                p = self.spans[p].parent
+            spans.append({
+                "name": sp.name,
+                "start_ms": round((sp.start - self.start) * 1000, 1),
+                "duration_ms": round(((sp.end or time.time()) - sp.start) * 1000, 1),
+                "depth": depth,
+                "error": sp.error,
+                "running": sp.end is None,
+                **({"attrs": sp.attrs} if sp.attrs else {}),
+            })
+        end = self.end or time.time()
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "started_at": round(self.start, 3),
+            "duration_ms": round((end - self.start) * 1000, 1),
+            "attrs": self.attrs,
+            "spans": spans,
+        }
+
+
+class _Activation:
+    __slots__ = ("trace", "token")
+
+    def __init__(self, trace):
+        self.trace = trace
+
+    def __enter__(self):
+        self.token = _CURRENT.set((self.trace, None)) if self.trace else None
+        return self.trace
+
+    def __exit__(self, *exc):
+        if self.token is not None:
+            _CURRENT.reset(self.token)
+        return False
+
+
+class _SpanCtx:
+    __slots__ = ("name", "attrs", "trace", "idx", "token")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.trace = None
+
+    def __enter__(self):
+        cur = _CURRENT.get()
+        if cur is None:
+            return self            # no trace active -> no-op
+        self.trace, parent = cur
+        self.idx = self.trace.add_span(self.name, time.time(), parent=parent, **self.attrs)
+        self.token = _CURRENT.set((self.trace, self.idx))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.trace is None:
+            return False
+        sp = self.trace.spans[self.idx]
+        sp.end = time.time()
+        if exc_type is not None:
+            sp.error = f"{exc_type.__name__}: {exc}"[:200]
+        _CURRENT.reset(self.token)
+        return False
+
+
+def span(name, **attrs):
+    """with span("ai:gemini"): ... -> child of the current span (no-op outside a trace)."""
+    return _SpanCtx(name, attrs)
+
+
+def activate(trace):
+    """with activate(cand.trace): ... (trace may be None)."""
+    return _Activation(trace)
+
+
+# -----------------------------
+# RING BUFFER + EXPORT
+# -----------------------------
+class Tracer:
+    def __init__(self, size=TRACE_BUFFER_SIZE, export_path=TRACE_EXPORT_FILE):
+        self.traces = deque(maxlen=size)
+        self.lock = threading.Lock()
+        self.export_path = export_path
+        self.export_lock = threading.Lock()
+
+    def start(self, name, fork=None, **attrs):
+        trace = fork.fork(name, **attrs) if fork else Trace(name, **attrs)
+        trace.tracer = self
+        with self.lock:
+            self.traces.append(trace)
+        return trace
+
+    def recent(self, n=20):
+        with self.lock:
+            items = list(self.traces)[-n:]
+        return [t.to_dict() for t in reversed(items)]
+
+    def _finished(self, trace):
+        if not self.export_path:
+            return
+        try:
+            line = json.dumps(trace.to_dict(), ensure_ascii=False, default=str)
+            with self.export_lock, open(self.export_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except Exception:
+            pass
+
+
+TRACER = Tracer()
@@ -0,0 +1,193 @@
+import math
+import time
+import threading
+from collections import OrderedDict
+
+from near_dupe import normalize_tokens
+
+# (name, slot_seconds, slots)
+WINDOWS = (
+    ("5m", 60, 5),
+    ("1h", 60, 60),
+    ("24h", 3600, 24),
+)
+
+
+class RingCounter:
+    """
+    Counts events in the last `slots * slot_seconds` seconds.
+    add()/total() are O(1) amortized: expired slots are subtracted
+    from a running sum as time moves on, history is never rescanned.
+    """
+
+    __slots__ = ("slot_seconds", "counts", "epochs", "sum", "head")
+
+    def __init__(self, slot_seconds, slots):
+        self.slot_seconds = slot_seconds
+        self.counts = [0] * slots
+        self.epochs = [-1] * slots
+        self.sum = 0
+        self.head = -1     # newest slot epoch we advanced to
+
+    def _advance(self, epoch):
+        if epoch <= self.head:
+            return
+        n = len(self.counts)
+        start = max(self.head + 1, epoch - n + 1)
+        for e in range(start, epoch + 1):
+            i = e % n
+            if self.epochs[i] != e:
+                self.sum -= self.counts[i]
+                self.counts[i] = 0
+                self.epochs[i] = e
+        self.head = epoch
+
+    def add(self, now, n=1):
+        epoch = int(now // self.slot_seconds)
+        self._advance(epoch)
+        self.counts[epoch % len(self.counts)] += n
+        self.sum += n
+
+    def total(self, now):
+        self._advance(int(now // self.slot_seconds))
+        return self.sum
+
+
+class KeyStats:
+    __slots__ = ("rings", "sources", "velocity", "accel", "last_calc")
+
+    def __init__(self):
+        self.rings = {name: RingCounter(sec, slots) for name, sec, slots in WINDOWS}
+        self.sources = {}      # source family -> RingCounter (1h)
+        self.velocity = 0.0
+        self.accel = 0.0
+        self.last_calc = 0.0
+
+
+class TrendEngine:
+    """
+    ✅ Sliding-window trend velocity across ALL sources.
+
+    observe(key, text, source, cluster) is called once per item as it arrives:
+    - every title term and the story cluster get +1 in 5m / 1h / 24h rings
+    - velocity = last-5-min rate vs. the rest-of-hour baseline rate
+    - acceleration = change of velocity per minute (updated incrementally)
+
+    score(key, static) -> 0..99 used for ordering on home() and posting.
+    """
+
+    def __init__(self, max_items=20000, max_terms_per_item=12):
+        self.lock = threading.Lock()
+        self.stats = {}                 # ("term", w) / ("cluster", id) -> KeyStats
+        self.items = OrderedDict()      # item key -> (stat keys, source family)
+        self.max_items = max_items
+        self.max_terms = max_terms_per_item
+        self.last_prune = time.time()
+
+    # -----------------------------
+    # ingest
+    # -----------------------------
+    def has(self, key):
+        with self.lock:
+            return key in self.items
+
+    def observe(self, key, text, source="", cluster=None):
+        """Record one item (only the first time `key` is seen). Returns True if new."""
+        family = (source or "other").split(":")[0]
+        now = time.time()
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                return False
+
+            terms = list(dict.fromkeys(normalize_tokens(text)))[:self.max_terms]
+            stat_keys = [("term", t) for t in terms]
+            if cluster is not None:
+                stat_keys.append(("cluster", cluster))
+
+            for sk in stat_keys:
+                st = self.stats.get(sk)
+                if st is None:
+                    st = self.stats[sk] = KeyStats()
+                for ring in st.rings.values():
+                    ring.add(now)
+                src = st.sources.get(family)
+                if src is None:
+                    src = st.sources[family] = RingCounter(60, 60)
+                src.add(now)
+                self._update_velocity(st, now)
+
+            self.items[key] = (stat_keys, family)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+            if now - self.last_prune > 600:
+                self._prune(now)
+            return True
+
+    def _rates(self, st, now):
+        c5 = st.rings["5m"].total(now)
+        c1h = st.rings["1h"].total(now)
+        rate5 = c5 / 5.0
+        baseline = max(c1h - c5, 0) / 55.0
+        return c5, rate5 / max(baseline, 1.0 / 60)
+
+    def _update_velocity(self, st, now):
+        _, velocity = self._rates(st, now)
+        if st.last_calc:
+            minutes = max((now - st.last_calc) / 60.0, 0.5)
+            st.accel = (velocity - st.velocity) / minutes
+        st.velocity = velocity
+        st.last_calc = now
+
+    def _prune(self, now):
+        # drop keys with nothing in the last 24h (keeps memory flat)
+        dead = [k for k, st in self.stats.items() if st.rings["24h"].total(now) == 0]
+        for k in dead:
+            del self.stats[k]
+        self.last_prune = now
+
+    # -----------------------------
+    # scoring
+    # -----------------------------
+    def score(self, key, static=40):
+        """
+        static = keyword based score (40..95). Blended with live heat:
+        - volume in last 5 min, velocity, acceleration
+        - number of different source families (rss / telegram / twitter...)
+        """
+        now = time.time()
+        with self.lock:
+            entry = self.items.get(key)
+            if not entry:
+                return min(99, int(static))
+            stat_keys, _ = entry
+
+            best_heat = 0.0
+            for sk in stat_keys:
+                st = self.stats.get(sk)
+                if st is None:
+                    continue
+                c5, velocity = self._rates(st, now)
+                if c5 < 2:
+                    # a single mention is not a trend
+                    continue
+                diversity = sum(1 for r in st.sources.values() if r.total(now) > 0)
+                heat = (math.log2(1 + c5) * 10
+                        + math.log2(1 + velocity) * 12
+                        + 8 * max(diversity - 1, 0)
+                        + max(-10.0, min(10.0, st.accel)))
+                if sk[0] == "cluster":
+                    heat *= 1.5    # the same story everywhere beats a common word
+                best_heat = max(best_heat, heat)
+
+        # never below the keyword score; surging stories climb above it
+        return min(99, int(max(static, static * 0.5 + best_heat)))
+
+    def top(self, n=20, window="5m"):
+        now = time.time()
+        with self.lock:
+            rows = [(k, st.rings[window].total(now), round(st.velocity, 2), round(st.accel, 2))
+                    for k, st in self.stats.items()]
+        rows.sort(key=lambda r: r[1], reverse=True)
+        return [{"key": f"{k[0]}:{k[1]}", "count": c, "velocity": v, "accel": a} for k, c, v, a in rows[:n]]
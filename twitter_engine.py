@@ -1,6 +1,12 @@
+import os
 import time
-import feedparser
+import asyncio
+import threading
 import logging
+from seen_store import RotatingSeenStore
+from metrics import FEED_FETCH_SECONDS, FEED_FETCH_ERRORS, cache_hit
+from feed_stream import fetch_feed
+from url_resolver import canonical_url
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -33,7 +39,12 @@ NITTER_HOSTS = [
     "https://nitter.lunar.icu",
 ]
 
-SEEN_TWEETS = set()
+# ✅ bounded + persisted: flat memory, survives redeploys (no first-poll flood)
+SEEN_TWEETS = RotatingSeenStore(
+    path=os.getenv("SEEN_TWEETS_FILE", "seen_tweets.bin"),
+    window_seconds=int(os.getenv("SEEN_TWEETS_WINDOW_SECONDS", str(3 * 24 * 3600))),
+    max_items=int(os.getenv("SEEN_TWEETS_MAX", "50000")),
+)
 
 
 def build_nitter_rss_url(username: str, host: str):
@@ -41,70 +52,187 @@ def build_nitter_rss_url(username: str, host: str):
     return f"{host}/{username}/rss"
 
 
-def fetch_twitter_rss(username: str):
+# -----------------------------
+# NITTER HOST HEALTH
+# -----------------------------
+FETCH_TIMEOUT_SECONDS = 10
+TWEETS_PER_ACCOUNT = 5          # newest tweets looked at per poll (parser stops there)
+HEDGE_AFTER_SECONDS = float(os.getenv("NITTER_HEDGE_AFTER_SECONDS", "2.5"))
+ACCOUNT_CONCURRENCY = int(os.getenv("TWITTER_FETCH_CONCURRENCY", "6"))
+
+
+class HostScoreboard:
     """
-    Tries multiple nitter hosts.
+    ✅ Tracks each nitter host:
+    - success rate (EWMA)
+    - latency (EWMA)
+    - exponential backoff after consecutive failures
+    ranked() -> best host first, backed-off hosts last
+    """
+
+    def __init__(self, hosts, alpha=0.3, base_backoff=30, max_backoff=30 * 60):
+        self.alpha = alpha
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lock = threading.Lock()
+        self.stats = {
+            h: {"ok_rate": 1.0, "latency": 1.0, "fails": 0, "down_until": 0.0, "requests": 0}
+            for h in hosts
+        }
+
+    def _score(self, st):
+        # lower is better: slow or flaky hosts sink
+        return st["latency"] / max(st["ok_rate"], 0.05)
+
+    def ranked(self):
+        now = time.time()
+        with self.lock:
+            up = [h for h, st in self.stats.items() if st["down_until"] <= now]
+            down = [h for h, st in self.stats.items() if st["down_until"] > now]
+            up.sort(key=lambda h: self._score(self.stats[h]))
+            down.sort(key=lambda h: self.stats[h]["down_until"])
+        return up + down
+
+    def record(self, host, ok, latency):
+        a = self.alpha
+        with self.lock:
+            st = self.stats[host]
+            st["requests"] += 1
+            st["ok_rate"] = (1 - a) * st["ok_rate"] + a * (1.0 if ok else 0.0)
+            st["latency"] = (1 - a) * st["latency"] + a * latency
+            if ok:
+                st["fails"] = 0
+                st["down_until"] = 0.0
+            else:
+                st["fails"] += 1
+                backoff = min(self.max_backoff, self.base_backoff * (2 ** (st["fails"] - 1)))
+                st["down_until"] = time.time() + backoff
+
+    def snapshot(self):
+        with self.lock:
+            return {h: dict(st) for h, st in self.stats.items()}
+
+
+HOST_SCOREBOARD = HostScoreboard(NITTER_HOSTS)
+
+
+def _fetch_from_host(username: str, host: str):
+    url = build_nitter_rss_url(username, host)
+    t0 = time.monotonic()
+    try:
+        entries = fetch_feed(url, TWEETS_PER_ACCOUNT, timeout=(5, FETCH_TIMEOUT_SECONDS)).entries
+    except Exception:
+        entries = []
+    # nitter answers 200 + empty feed when rate limited -> count as failure
+    elapsed = time.monotonic() - t0
+    HOST_SCOREBOARD.record(host, bool(entries), elapsed)
+    FEED_FETCH_SECONDS.labels(f"nitter:{host}").observe(elapsed)
+    if not entries:
+        FEED_FETCH_ERRORS.labels(f"nitter:{host}").inc()
+    return entries
+
+
+async def fetch_twitter_rss(username: str, executor=None):
+    """
+    Asks the best nitter host first.
+    If it has not answered after HEDGE_AFTER_SECONDS (or failed),
+    the second best host is asked too and the first good answer wins.
+    Remaining hosts are tried one by one as last resort.
+    Every request runs on `executor`; nothing waits inside a pool thread.
     Returns feed entries list.
     """
-    for host in NITTER_HOSTS:
-        try:
-            url = build_nitter_rss_url(username, host)
-            feed = feedparser.parse(url)
-            if feed and feed.entries:
-                return feed.entries
-        except:
-            continue
+    loop = asyncio.get_running_loop()
+    ranked = HOST_SCOREBOARD.ranked()
+    if not ranked:
+        return []
+
+    pending = {loop.run_in_executor(executor, _fetch_from_host, username, ranked[0])}
+    hedged = len(ranked) < 2
+
+    while pending:
+        done, pending = await asyncio.wait(pending, timeout=None if hedged else HEDGE_AFTER_SECONDS,
+                                           return_when=asyncio.FIRST_COMPLETED)
+        for fut in done:
+            entries = fut.result()
+            if entries:
+                return entries
+        if not hedged:
+            pending.add(loop.run_in_executor(executor, _fetch_from_host, username, ranked[1]))
+            hedged = True
+
+    for host in ranked[2:]:
+        entries = await loop.run_in_executor(executor, _fetch_from_host, username, host)
+        if entries:
+            return entries
     return []
 
 
-def twitter_fetch_loop(on_event=None, logger=None, poll_seconds=60):
-    """
-    ✅ Free Twitter (X) fetcher using RSS (Nitter)
-    calls:
-        on_event(text, source)
-    """
+async def fetch_all_accounts(accounts, executor=None):
+    """Fetch all accounts concurrently (ACCOUNT_CONCURRENCY at a time) -> {account: entries}"""
+    sem = asyncio.Semaphore(ACCOUNT_CONCURRENCY)
 
-    if logger:
-        logger.info("🐦 Twitter RSS Engine Started...")
+    async def one(acc):
+        async with sem:
+            return await fetch_twitter_rss(acc, executor)
 
-    while True:
-        try:
-            for acc in TWITTER_ACCOUNTS:
-                entries = fetch_twitter_rss(acc)
+    results = await asyncio.gather(*(one(acc) for acc in accounts))
+    return dict(zip(accounts, results))
 
-                for e in entries[:5]:
-                    link = getattr(e, "link", "")
-                    title = getattr(e, "title", "")
 
-                    if not link or not title:
-                        continue
+def new_tweet_events(all_entries, logger=None):
+    """{account: entries} -> [(text, source)] for tweets not seen before"""
+    out = []
+    for acc in TWITTER_ACCOUNTS:
+        entries = all_entries.get(acc) or []
 
-                    # ✅ avoid duplicates
-                    if link in SEEN_TWEETS:
-                        continue
-                    SEEN_TWEETS.add(link)
+        for e in entries[:TWEETS_PER_ACCOUNT]:
+            link = getattr(e, "link", "")
+            title = getattr(e, "title", "")
 
-                    # cleanup title text
-                    text = title.strip()
-                    source = f"twitter:{acc}"
+            if not link or not title:
+                continue
+
+            # ✅ avoid duplicates: one key per tweet whichever Nitter mirror served it
+            # (raw link too: entries stored before canonical URLs)
+            key = canonical_url(link)
+            seen = key in SEEN_TWEETS or link in SEEN_TWEETS
+            cache_hit("seen_tweets", seen)
+            if seen:
+                continue
+            SEEN_TWEETS.add(key)
+
+            # cleanup title text
+            text = title.strip()
+            source = f"twitter:{acc}"
 
-                    if logger:
-                        logger.info(f"✅ Tweet from {acc}: {text[:80]}")
-
-                    if on_event:
-                        try:
-                            # on_event can be async or sync
-                            res = on_event(text, source)
-                            if hasattr(res, "__await__"):
-                                import asyncio
-                                asyncio.run(res)
-                        except Exception as cb_err:
-                            if logger:
-                                logger.error(f"❌ Twitter callback error: {cb_err}")
-
-            time.sleep(poll_seconds)
-
-        except Exception as e:
             if logger:
-                logger.error(f"❌ Twitter loop error: {e}")
-            time.sleep(60)
+                logger.info(f"✅ Tweet from {acc}: {text[:80]}")
+
+            out.append((text, source))
+    return out
+
+
+async def twitter_loop(on_event=None, logger=None, poll_seconds=60, executor=None):
+    """
+    ✅ Async Twitter (X) fetcher for the shared runtime.
+    Blocking HTTP runs on `executor`; calls:
+        await on_event(text, source)
+    """
+    if logger:
+        logger.info("🐦 Twitter RSS Engine Started...")
+
+    loop = asyncio.get_running_loop()
+
+    while True:
+        all_entries = await fetch_all_accounts(TWITTER_ACCOUNTS, executor)
+
+        for text, source in new_tweet_events(all_entries, logger):
+            if on_event:
+                try:
+                    await on_event(text, source)
+                except Exception as cb_err:
+                    if logger:
+                        logger.error(f"❌ Twitter callback error: {cb_err}")
+
+        await loop.run_in_executor(executor, SEEN_TWEETS.save)
+        await asyncio.sleep(poll_seconds)
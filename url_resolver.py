@@ -0,0 +1,227 @@
+import os
+import re
+import time
+import base64
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+
+logger = logging.getLogger("uvicorn.error")
+
+RESOLVE_CONCURRENCY = int(os.getenv("URL_RESOLVE_CONCURRENCY", "6"))
+RESOLVE_TIMEOUT_SECONDS = float(os.getenv("URL_RESOLVE_TIMEOUT_SECONDS", "6"))
+RETRY_FAILED_SECONDS = 3600
+MEMORY_ITEMS = 20000
+CACHE_NS = "url_resolve"
+
+_TRACKING_PREFIXES = ("utm_", "mc_", "_hs", "pk_")
+_TRACKING_KEYS = {
+    "fbclid", "gclid", "dclid", "yclid", "msclkid", "igshid", "ocid", "cmpid", "ito", "ref",
+    "ref_src", "ref_url", "taid", "_ga", "ns_mchannel", "ns_source", "ns_campaign",
+    "oc",   # news.google.com
+}
+_X_HOSTS = {"twitter.com", "mobile.twitter.com", "x.com", "xcancel.com"}
+_REDIRECT_HOSTS = {
+    "news.google.com", "t.co", "feedproxy.google.com", "feeds.feedburner.com",
+    "bit.ly", "dlvr.it", "ow.ly", "buff.ly", "trib.al",
+}
+_URL_IN_BYTES = re.compile(rb"https?://[\x21-\x7e]+")
+_URL_IN_HTML = re.compile(r'(?:data-n-au|href)="(https?://[^"]+)"')
+
+
+def _host(netloc):
+    host = netloc.lower().rsplit("@", 1)[-1]
+    if host.endswith(":80") or host.endswith(":443"):
+        host = host.rsplit(":", 1)[0]
+    if host.startswith("www."):
+        host = host[4:]
+    if host.startswith("nitter.") or host in _X_HOSTS:
+        return "x.com"          # every Nitter mirror / Twitter host -> one tweet URL
+    return host
+
+
+def canonical_url(url):
+    """
+    Pure normalization (no network): https, lower-case host without
+    www., Nitter/Twitter mirrors -> x.com, no fragment, no tracking
+    params, remaining params sorted, no trailing slash.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    parts = urlsplit(url)
+    if not parts.netloc:
+        return url
+    host = _host(parts.netloc)
+    keep = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if not k.lower().startswith(_TRACKING_PREFIXES) and k.lower() not in _TRACKING_KEYS]
+    path = parts.path.rstrip("/") or "/"
+    if host == "x.com":
+        keep = []
+    return urlunsplit(("https", host, path, urlencode(sorted(keep)), ""))
+
+
+def needs_resolve(url):
+    """Link that only redirects to the real article (Google News, t.co, feed proxies...)."""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return False
+    host = _host(parts.netloc)
+    if host == "news.google.com":
+        return "/articles/" in parts.path
+    if host == "feeds.feedburner.com":
+        return "/~r/" in parts.path
+    return host in _REDIRECT_HOSTS
+
+
+def _decode_google_news(url):
+    """Older Google News ids are base64 protobufs that contain the target URL."""
+    token = urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except Exception:
+        return None
+    m = _URL_IN_BYTES.search(raw)
+    return m.group(0).decode("ascii", "ignore") if m else None
+
+
+class UrlResolver:
+    """
+    ✅ Link -> canonical article URL, for every dedupe path.
+
+    - canonical(url): cached resolution if we have one, then canonical_url()
+      (no network, safe to call anywhere)
+    - resolve_many(urls): redirect links without a cached answer are
+      resolved concurrently (bounded pool, one overall deadline); answers
+      go to a persistent kv cache, so each redirect is fetched once.
+      Failures are cached too and retried after RETRY_FAILED_SECONDS.
+    """
+
+    def __init__(self, store=None, concurrency=RESOLVE_CONCURRENCY, timeout=RESOLVE_TIMEOUT_SECONDS):
+        self.store = store
+        self.timeout = timeout
+        self.pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="url-resolve")
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()      # raw url -> (resolved or "", ts)
+        self.inflight = set()
+        self.session = requests.Session()
+        self.resolved = 0
+        self.failed = 0
+        self.cache_hits = 0
+
+    # -----------------------------
+    # cache
+    # -----------------------------
+    def _cached(self, url):
+        with self.lock:
+            rec = self.memory.get(url)
+        if rec is None and self.store is not None:
+            try:
+                val = self.store.kv_get(CACHE_NS, url)
+            except Exception:
+                val = None
+            if val is not None:
+                rec = (val["url"], val["ts"])
+                self._remember(url, rec)
+        if rec is not None and not rec[0] and time.time() - rec[1] > RETRY_FAILED_SECONDS:
+            return None                  # failed a while ago -> try again
+        return rec
+
+    def _remember(self, url, rec):
+        with self.lock:
+            self.memory[url] = rec
+            self.memory.move_to_end(url)
+            while len(self.memory) > MEMORY_ITEMS:
+                self.memory.popitem(last=False)
+
+    def _store(self, results):
+        now = time.time()
+        for url, resolved in results.items():
+            self._remember(url, (resolved, now))
+        if self.store is not None and results:
+            try:
+                self.store.kv_set_many(CACHE_NS, {u: {"url": r, "ts": now} for u, r in results.items()})
+            except Exception as e:
+                logger.error(f"❌ URL cache write failed: {e}")
+
+    # -----------------------------
+    # network
+    # -----------------------------
+    def _resolve_one(self, url):
+        if _host(urlsplit(url).netloc) == "news.google.com":
+            decoded = _decode_google_news(url)
+            if decoded:
+                return decoded
+        with self.session.get(url, timeout=self.timeout, allow_redirects=True, stream=True,
+                              headers={"User-Agent": "Mozilla/5.0"}) as r:
+            if not needs_resolve(r.url):
+                return r.url
+            # still on the redirector: the target is in the interstitial page
+            head = r.raw.read(64 * 1024, decode_content=True).decode("utf-8", "ignore")
+        for cand in _URL_IN_HTML.findall(head):
+            if not needs_resolve(cand) and "google." not in urlsplit(cand).netloc:
+                return cand
+        return ""
+
+    def _resolve_and_store(self, url):
+        try:
+            resolved = self._resolve_one(url) or ""
+        except Exception:
+            resolved = ""
+        self._store({url: resolved})
+        with self.lock:
+            self.inflight.discard(url)
+            if resolved:
+                self.resolved += 1
+            else:
+                self.failed += 1
+
+    def resolve_many(self, urls):
+        """
+        Resolves uncached redirect links concurrently, waiting at most
+        ~timeout overall (late answers still land in the cache for the
+        next cycle). Returns {url: canonical}.
+        """
+        futures = []
+        for u in dict.fromkeys(u for u in urls if u):
+            if not needs_resolve(u):
+                continue
+            if self._cached(u) is not None:
+                self.cache_hits += 1
+                continue
+            with self.lock:
+                if u in self.inflight:
+                    continue
+                self.inflight.add(u)
+            futures.append(self.pool.submit(self._resolve_and_store, u))
+        if futures:
+            wait(futures, timeout=self.timeout + 1)
+        return {u: self.canonical(u) for u in urls if u}
+
+    def canonical(self, url):
+        if not url:
+            return ""
+        if needs_resolve(url):
+            rec = self._cached(url)
+            if rec is not None and rec[0]:
+                return canonical_url(rec[0])
+        return canonical_url(url)
+
+    def keys(self, url):
+        """
+        Every dedupe key of a link: as published, normalized, and resolved
+        (when known). Marking all of them posted keeps a story deduped
+        whether a later cycle sees the redirect resolved or not.
+        """
+        return list(dict.fromkeys(k for k in (url, canonical_url(url), self.canonical(url)) if k))
+
+    def stats(self):
+        with self.lock:
+            memory = len(self.memory)
+        return {"memory": memory, "resolved": self.resolved, "failed": self.failed,
+                "cache_hits": self.cache_hits}
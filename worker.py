@@ -1,27 +1,29 @@
-import time
-from app import post_category_wise_news
-from cricket_engine import cricket_worker_loop
-import threading
+import asyncio
+import post_limiter
+from app import LEADER, RUNTIME, SOCIAL_QUEUE, logger
 
-# Start Cricket Engine
-t2 = threading.Thread(
-    target=cricket_worker_loop,
-    args=(generate_news_image, upload_image_to_cloudinary, post_to_instagram, logger),
-    daemon=True
-)
-t2.start()
+# Standalone background worker (no web server).
+# Same producers as the web app's lifespan, and the same leader lock:
+# if a web process already owns production, this one waits as a follower
+# and takes over when that process dies.
 
 
-print("🚀 TrendScope Background Worker started")
-
-while True:
+async def main():
+    print("🚀 TrendScope Background Worker started")
+    SOCIAL_QUEUE.start()
+    LEADER.start(on_elected=RUNTIME.start, on_lost=RUNTIME.stop)
     try:
-        # This function now handles the 1AM-6AM IST check inside itself
-        post_category_wise_news()
-    except Exception as e:
-        print(f"Worker Loop Error: {e}")
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await LEADER.stop()
+        await RUNTIME.stop()
+        await SOCIAL_QUEUE.stop()
+        post_limiter.close()
+
 
-    # Wait 1 hour before checking for fresh news again
-    # This prevents the bot from constantly hitting the RSS feeds
-    print("💤 Worker sleeping for 1 hour...")
-    time.sleep(3600)
\ No newline at end of file
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Worker stopped")